@@ -0,0 +1,10 @@
+from core.metrics import generate_metrics
+from fastapi import APIRouter, Response
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    content, content_type = generate_metrics()
+    return Response(content=content, headers={"Content-Type": content_type})
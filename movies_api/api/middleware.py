@@ -0,0 +1,110 @@
+import random
+import secrets
+import time
+from contextlib import nullcontext
+from http import HTTPStatus
+from typing import Dict, Optional, Tuple
+
+from backoff.circuit_breaker import RetryBudget, retry_budget
+from core import metrics as app_metrics
+from core import profiling
+from core.config import settings
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+PROFILING_HEADER = "X-Profile-Token"
+
+
+class RequestMiddleware:
+    """
+    Shares one retry budget between the backend calls of the request, records its metrics and profiles it.
+
+    It is a plain ASGI middleware: a middleware based on BaseHTTPMiddleware runs the rest of
+    the application in a task of its own and passes the response through a stream, which
+    costs more than the backend calls of a request served from memory.
+
+    Requests sent with the profiling token and a sampled fraction of the others are profiled.
+    Profiles of slow requests are kept for the admin endpoint, the requests sent with the
+    token also get the profile in the Server-Timing header of the response.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = retry_budget.set(RetryBudget(settings.request_retry_budget))
+        try:
+            profiler, requested = self._get_profiler(scope)
+            if profiler is None and not settings.metrics_enabled:
+                await self.app(scope, receive, send)
+            else:
+                await self._observe(scope, receive, send, profiler, requested)
+        finally:
+            retry_budget.reset(token)
+
+    async def _observe(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+        profiler: Optional[profiling.RequestProfiler],
+        requested: bool,
+    ) -> None:
+        collect_metrics = settings.metrics_enabled
+        response_start: Message = {}
+
+        async def send_observed(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                if profiler is not None:
+                    # Sending the body depends on the client, the profile ends once the response starts
+                    profiler.finish()
+                    profiler.profile.status = message["status"]
+                    if requested:
+                        MutableHeaders(scope=message).append("Server-Timing", profiler.profile.server_timing())
+                response_start.update(message)
+            await send(message)
+
+        started_at = time.perf_counter()
+        if collect_metrics:
+            layer_time, timing_token = app_metrics.start_request_timing()
+            app_metrics.REQUESTS_IN_FLIGHT.inc()
+        try:
+            with profiler or nullcontext():
+                await self.app(scope, receive, send_observed)
+        finally:
+            if collect_metrics:
+                app_metrics.REQUESTS_IN_FLIGHT.dec()
+                app_metrics.stop_request_timing(timing_token)
+                self._record_metrics(scope, response_start, time.perf_counter() - started_at, layer_time)
+        if profiler is not None:
+            profiling.slow_requests.add(profiler.profile)
+
+    @staticmethod
+    def _get_profiler(scope: Scope) -> Tuple[Optional[profiling.RequestProfiler], bool]:
+        """Returns the profiler of the request, None when it is not profiled, and whether the token was sent."""
+        token = Headers(scope=scope).get(PROFILING_HEADER)
+        requested = bool(token and settings.profiling_token and secrets.compare_digest(token, settings.profiling_token))
+        if not requested and (not settings.profiling_sample_rate or random.random() >= settings.profiling_sample_rate):
+            return None, False
+        path = scope.get("root_path", "") + scope["path"]
+        return profiling.RequestProfiler(scope["method"], path, scope["query_string"].decode("latin-1")), requested
+
+    @staticmethod
+    def _record_metrics(scope: Scope, response_start: Message, elapsed: float, layer_time: Dict[str, float]) -> None:
+        """Records the latency of the request, the time it spent in every layer and the size of the response."""
+        # Templates of the routes are used as labels, so the number of series does not depend on the ids requested
+        route = getattr(scope.get("route"), "path", "unmatched")
+        status = response_start.get("status", HTTPStatus.INTERNAL_SERVER_ERROR)
+        app_metrics.REQUEST_LATENCY.labels(scope["method"], route, int(status)).observe(elapsed)
+        for layer, layer_elapsed in layer_time.items():
+            app_metrics.REQUEST_LAYER_LATENCY.labels(route, layer).observe(layer_elapsed)
+        # Backend calls made concurrently may take longer in total than the request itself
+        app_metrics.REQUEST_LAYER_LATENCY.labels(route, "application").observe(
+            max(0.0, elapsed - sum(layer_time.values()))
+        )
+        content_length = Headers(raw=response_start.get("headers", [])).get("content-length")
+        if content_length is not None:
+            app_metrics.RESPONSE_SIZE.labels(route).observe(int(content_length))
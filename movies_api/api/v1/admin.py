@@ -0,0 +1,92 @@
+import secrets
+from http import HTTPStatus
+
+from core import profiling
+from core.config import settings
+from db.elastic import get_elastic, get_elastic_pool_stats
+from db.redis import get_redis, get_redis_pool_stats
+from fastapi import APIRouter, Depends, Header, HTTPException
+from services.film import get_film_service
+from services.genre import get_genre_service
+from services.person import get_person_service
+from services.searchable_model_service import SearchableModelService
+
+router = APIRouter()
+
+
+def check_admin_token(token: str | None = Header(None, alias="X-Admin-Token")) -> None:
+    """Admin routes expose other users' requests and the backends, they are hidden unless the token is configured."""
+    if not settings.admin_token:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="Not Found")
+    if not token or not secrets.compare_digest(token, settings.admin_token):
+        raise HTTPException(status_code=HTTPStatus.FORBIDDEN, detail="invalid admin token")
+
+
+@router.get(
+    "/pools",
+    summary="Connection pools utilization",
+    description="Returns the number of open, busy and idle connections to Redis and to every Elasticsearch node.",
+    tags=["Admin"],
+    dependencies=[Depends(check_admin_token)],
+)
+async def pools_stats(redis=Depends(get_redis), elastic=Depends(get_elastic)) -> dict:
+    return {"redis": get_redis_pool_stats(redis), "elastic": get_elastic_pool_stats(elastic)}
+
+
+@router.get(
+    "/slow-requests",
+    summary="Profiles of slow requests",
+    description=(
+        "Returns the profiles of the most recent profiled requests slower than the threshold, the most recent first. "
+        "Every worker keeps its own profiles."
+    ),
+    tags=["Admin"],
+    dependencies=[Depends(check_admin_token)],
+)
+async def slow_requests() -> list:
+    return [profile.to_dict() for profile in profiling.slow_requests.get_all()]
+
+
+@router.get(
+    "/hot-keys",
+    summary="Most requested keys",
+    description=(
+        "Returns the most frequently requested documents and pages of every index with their estimated recent "
+        "number of requests, the most requested first. Every worker counts its own requests."
+    ),
+    tags=["Admin"],
+    dependencies=[Depends(check_admin_token)],
+)
+async def hot_keys(
+    film_service: SearchableModelService = Depends(get_film_service),
+    genre_service: SearchableModelService = Depends(get_genre_service),
+    person_service: SearchableModelService = Depends(get_person_service),
+) -> dict:
+    services = {"movies": film_service, "genres": genre_service, "persons": person_service}
+    return {
+        index: (
+            [{"key": list(key), "frequency": frequency} for key, frequency in service.frequency.get_top()]
+            if service.frequency
+            else []
+        )
+        for index, service in services.items()
+    }
+
+
+@router.get(
+    "/local-caches",
+    summary="Local caches utilization",
+    description=(
+        "Returns the number of entries, the estimated size, the hits, misses, evictions and admission rejections "
+        "of the local cache of every index, null when it is disabled. Every worker has its own caches."
+    ),
+    tags=["Admin"],
+    dependencies=[Depends(check_admin_token)],
+)
+async def local_caches_stats(
+    film_service: SearchableModelService = Depends(get_film_service),
+    genre_service: SearchableModelService = Depends(get_genre_service),
+    person_service: SearchableModelService = Depends(get_person_service),
+) -> dict:
+    services = {"movies": film_service, "genres": genre_service, "persons": person_service}
+    return {index: service.local_cache.stats() if service.local_cache else None for index, service in services.items()}
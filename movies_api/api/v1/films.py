@@ -1,11 +1,14 @@
 from http import HTTPStatus
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from models.film import Film
 from models.sort import MoviesSortOptions
 from services.film import get_film_service
 
+from .pagination import CURSOR_DESCRIPTION, check_page_window, get_cursor_page
+from .projection import FIELDS_DESCRIPTION, get_projection_fields, get_search_responses
+from .responses import raw_json_response
 from .service_protocol import ModelServiceProtocol
 
 router = APIRouter()
@@ -16,7 +19,8 @@ router = APIRouter()
     summary="Search throw all movies.",
     description="Search throw all movies.",
     tags=["Search"],
-    response_model=List[Film],
+    response_model=None,
+    responses=get_search_responses(Film),
 )
 async def film_details_list(
     search: str = Query(None, description="Searching text"),
@@ -25,25 +29,39 @@ async def film_details_list(
     ),
     page_size: int = Query(50, ge=1, le=100, description="Number of films per page"),
     page_number: int = Query(1, ge=1, description="Page number"),
+    cursor: str = Query(None, description=CURSOR_DESCRIPTION),
+    fields: List[str] = Query(None, description=FIELDS_DESCRIPTION),
     model_service: ModelServiceProtocol[Film] = Depends(get_film_service),
-) -> List[Film]:
-    films = await model_service.get_many_by_parameters(
+) -> Response:
+    projection = get_projection_fields(fields, Film)
+    if cursor is not None:
+        return await get_cursor_page(
+            model_service=model_service,
+            cursor=cursor,
+            page_size=page_size,
+            search=search,
+            sort=sort,
+            fields=projection,
+        )
+    check_page_window(page_number=page_number, page_size=page_size)
+    films = await model_service.get_raw_many_by_parameters(
         search=search,
         page_number=page_number,
         page_size=page_size,
         sort=sort,
+        fields=projection,
     )
-    return films
+    return raw_json_response(films)
 
 
 @router.get(
     "/{film_id}", description="Returns information about movie according uuid.", tags=["Movies"], response_model=Film
 )
-async def film_details(film_id: str, model_service: ModelServiceProtocol[Film] = Depends(get_film_service)) -> Film:
-    film = await model_service.get_by_id(film_id)
+async def film_details(film_id: str, model_service: ModelServiceProtocol[Film] = Depends(get_film_service)) -> Response:
+    film = await model_service.get_raw_by_id(film_id)
     if not film:
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="film not found")
-    return film
+    return raw_json_response(film)
 
 
 @router.get("/", summary="Get movies by IDs", response_model=List[Film])
@@ -1,10 +1,13 @@
 from http import HTTPStatus
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from models.genre import Genre
-from services.genre import get_genre_service
+from services.genre import get_genre_repository
 
+from .pagination import CURSOR_DESCRIPTION, check_page_window, get_cursor_page
+from .projection import FIELDS_DESCRIPTION, get_projection_fields, get_search_responses
+from .responses import raw_json_response
 from .service_protocol import ModelServiceProtocol
 
 router = APIRouter()
@@ -15,21 +18,34 @@ router = APIRouter()
     summary="Search throw genres",
     description="Write genre name to field search to retrieve all genres with this name.",
     tags=["Search"],
-    response_model=List[Genre],
+    response_model=None,
+    responses=get_search_responses(Genre),
 )
 async def genre_details_list(
     search: str = Query(None, description="Searching text"),
     page_size: int = Query(50, ge=1, le=100, description="Number of genres per page"),
     page_number: int = Query(1, ge=1, description="Page number"),
-    model_service: ModelServiceProtocol[Genre] = Depends(get_genre_service),
-) -> List[Genre]:
-    genres = await model_service.get_many_by_parameters(
+    cursor: str = Query(None, description=CURSOR_DESCRIPTION),
+    fields: List[str] = Query(None, description=FIELDS_DESCRIPTION),
+    model_service: ModelServiceProtocol[Genre] = Depends(get_genre_repository),
+) -> Response:
+    projection = get_projection_fields(fields, Genre)
+    if cursor is not None:
+        return await get_cursor_page(
+            model_service=model_service,
+            cursor=cursor,
+            page_size=page_size,
+            search=search,
+            fields=projection,
+        )
+    check_page_window(page_number=page_number, page_size=page_size)
+    genres = await model_service.get_raw_many_by_parameters(
         search=search,
         page_number=page_number,
         page_size=page_size,
+        fields=projection,
     )
-
-    return genres
+    return raw_json_response(genres)
 
 
 @router.get(
@@ -39,10 +55,10 @@ async def genre_details_list(
     response_model=Genre,
 )
 async def genre_details(
-    genre_id: str, model_service: ModelServiceProtocol[Genre] = Depends(get_genre_service)
-) -> Genre:
-    genre = await model_service.get_by_id(genre_id)
+    genre_id: str, model_service: ModelServiceProtocol[Genre] = Depends(get_genre_repository)
+) -> Response:
+    genre = await model_service.get_raw_by_id(genre_id)
     if not genre:
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="genre not found")
 
-    return genre
+    return raw_json_response(genre)
@@ -0,0 +1,55 @@
+from http import HTTPStatus
+from typing import Tuple
+
+import orjson
+from core.config import settings
+from fastapi import HTTPException, Response
+from services.search_service import InvalidCursorError
+
+from .responses import raw_json_response
+from .service_protocol import ModelServiceProtocol
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+CURSOR_DESCRIPTION = (
+    "Cursor of the page to return, an empty value starts from the first page. "
+    f"The cursor of the next page is returned in the {NEXT_CURSOR_HEADER} header. "
+    "Page number is ignored when cursor is passed."
+)
+
+
+def check_page_window(page_number: int, page_size: int) -> None:
+    """Rejects pages lying deeper than Elasticsearch can paginate with from/size."""
+    if page_number * page_size > settings.search_max_result_window:
+        raise HTTPException(
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+            detail=(
+                f"Only first {settings.search_max_result_window} results can be paginated by page number, "
+                "use cursor to get further pages"
+            ),
+        )
+
+
+async def get_cursor_page(
+    model_service: ModelServiceProtocol,
+    cursor: str,
+    page_size: int,
+    search: str | None = None,
+    sort: str | None = None,
+    fields: Tuple[str, ...] | None = None,
+) -> Response:
+    try:
+        items, next_cursor = await model_service.get_many_by_cursor(
+            search=search,
+            page_size=page_size,
+            cursor=cursor,
+            sort=sort,
+            fields=fields,
+        )
+    except InvalidCursorError as error:
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=str(error))
+    # Projected documents are already dicts
+    content = items if fields else [item.model_dump(mode="json") for item in items]
+    response = raw_json_response(orjson.dumps(content))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return response
@@ -1,10 +1,14 @@
 from http import HTTPStatus
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from models.person import Person
-from services.person import get_person_service
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from models.person import Person, PersonFilm
+from services.person import get_person_films_service, get_person_service
+from services.person_films import PersonFilmsService
 
+from .pagination import CURSOR_DESCRIPTION, check_page_window, get_cursor_page
+from .projection import FIELDS_DESCRIPTION, get_projection_fields, get_search_responses
+from .responses import raw_json_response
 from .service_protocol import ModelServiceProtocol
 
 router = APIRouter()
@@ -15,21 +19,34 @@ router = APIRouter()
     summary="Search throw persons according name.",
     description="Write full_name of person to field 'search' to get all persons with such name.",
     tags=["Search"],
-    response_model=List[Person],
+    response_model=None,
+    responses=get_search_responses(Person),
 )
 async def person_details_list(
     search: str = Query(None, description="Searching text"),
     page_size: int = Query(50, ge=1, le=100, description="Number of persons per page"),
     page_number: int = Query(1, ge=1, description="Page number"),
+    cursor: str = Query(None, description=CURSOR_DESCRIPTION),
+    fields: List[str] = Query(None, description=FIELDS_DESCRIPTION),
     model_service: ModelServiceProtocol[Person] = Depends(get_person_service),
-) -> List[Person]:
-    persons = await model_service.get_many_by_parameters(
+) -> Response:
+    projection = get_projection_fields(fields, Person)
+    if cursor is not None:
+        return await get_cursor_page(
+            model_service=model_service,
+            cursor=cursor,
+            page_size=page_size,
+            search=search,
+            fields=projection,
+        )
+    check_page_window(page_number=page_number, page_size=page_size)
+    persons = await model_service.get_raw_many_by_parameters(
         search=search,
         page_number=page_number,
         page_size=page_size,
+        fields=projection,
     )
-
-    return persons
+    return raw_json_response(persons)
 
 
 @router.get(
@@ -41,9 +58,26 @@ async def person_details_list(
 async def person_details(
     person_id: str,
     model_service: ModelServiceProtocol[Person] = Depends(get_person_service),
-) -> Person:
-    person = await model_service.get_by_id(person_id)
+) -> Response:
+    person = await model_service.get_raw_by_id(person_id)
     if not person:
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="person not found")
 
-    return person
+    return raw_json_response(person)
+
+
+@router.get(
+    "/{person_id}/film",
+    tags=["Persons"],
+    description="Returns the films of the person with their titles and ratings.",
+    response_model=List[PersonFilm],
+)
+async def person_films(
+    person_id: str,
+    person_films_service: PersonFilmsService = Depends(get_person_films_service),
+) -> Response:
+    films = await person_films_service.get_raw_films(person_id)
+    if films is None:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="person not found")
+
+    return raw_json_response(films)
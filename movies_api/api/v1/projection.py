@@ -0,0 +1,44 @@
+from http import HTTPStatus
+from typing import Any, Dict, List, Optional, Tuple, Type, Union
+
+from fastapi import HTTPException
+from pydantic import BaseModel, create_model
+
+FIELDS_DESCRIPTION = "Fields to return, comma separated or repeated. All the fields are returned when omitted."
+
+
+def get_projection_fields(fields: List[str] | None, model: Type[BaseModel]) -> Tuple[str, ...] | None:
+    """
+    Validates the requested fields of the model.
+
+    Fields are returned in the order they are declared in the model, so every
+    combination of the same fields maps to the same cache entry.
+    """
+    if not fields:
+        return None
+    requested = {field.strip() for value in fields for field in value.split(",") if field.strip()}
+    unknown = requested - model.model_fields.keys()
+    if unknown:
+        raise HTTPException(
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}",
+        )
+    return tuple(field for field in model.model_fields if field in requested) or None
+
+
+def get_search_responses(model: Type[BaseModel]) -> Dict[int | str, Dict[str, Any]]:
+    """
+    Documents the response of a search route, whose documents hold only the requested fields.
+
+    The routes send the serialized documents as they are, so the schema is not used to validate them.
+    """
+    projection = create_model(
+        f"{model.__name__}Projection",
+        **{name: (Optional[field.annotation], None) for name, field in model.model_fields.items()},
+    )
+    return {
+        HTTPStatus.OK: {
+            "model": Union[List[model], List[projection]],
+            "description": "Documents of the page, with only the requested fields when `fields` are given",
+        }
+    }
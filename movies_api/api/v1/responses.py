@@ -0,0 +1,20 @@
+from typing import Any
+
+from core.profiling import span
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+
+JSON_MEDIA_TYPE = "application/json"
+
+
+class ProfiledORJSONResponse(ORJSONResponse):
+    """Records the encoding of the content as a span of the profiled requests."""
+
+    def render(self, content: Any) -> bytes:
+        with span("response.encode"):
+            return super().render(content)
+
+
+def raw_json_response(content: bytes) -> Response:
+    """Sends already serialized JSON as it is, skipping response model validation and serialization."""
+    return Response(content=content, media_type=JSON_MEDIA_TYPE)
@@ -1,4 +1,4 @@
-from typing import List, Optional, Protocol, TypeVar
+from typing import List, Optional, Protocol, Tuple, TypeVar
 
 from pydantic import BaseModel
 
@@ -14,5 +14,28 @@ class ModelServiceProtocol(Protocol[T]):
     ) -> List[Optional[T]]:
         ...
 
+    async def get_raw_by_id(self, model_id: str) -> Optional[bytes]:
+        ...
+
+    async def get_raw_many_by_parameters(
+        self,
+        search: Optional[str],
+        page_number: int,
+        page_size: int,
+        sort: str = None,
+        fields: Optional[Tuple[str, ...]] = None,
+    ) -> bytes:
+        ...
+
     async def get_many_by_ids(self, ids: List[str]) -> List[Optional[T]]:
         ...
+
+    async def get_many_by_cursor(
+        self,
+        search: Optional[str],
+        page_size: int,
+        cursor: str,
+        sort: str = None,
+        fields: Optional[Tuple[str, ...]] = None,
+    ) -> Tuple[List[T] | List[dict], Optional[str]]:
+        ...
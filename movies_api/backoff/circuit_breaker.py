@@ -0,0 +1,171 @@
+import asyncio
+import functools
+import inspect
+import logging
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class BackendUnavailableError(Exception):
+    """Raised when a backend fails and the request can not be retried any more, or its circuit is open."""
+
+    def __init__(self, backend: str, retry_after: float = 0):
+        super().__init__(f"{backend} is unavailable")
+        self.backend = backend
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Stops calling a backend after it has failed several times in a row.
+
+    Once `failure_threshold` consecutive calls fail the circuit opens and calls fail
+    immediately. After `recovery_time` seconds a single trial call is let through:
+    the circuit closes when it succeeds and opens again when it fails. A trial call
+    ending without a verdict, such as a cancelled one, lets the next call through.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, recovery_time: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_time = recovery_time
+        self.failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    @property
+    def retry_after(self) -> float:
+        if self._opened_at is None:
+            return 0
+        return max(0.0, self._opened_at + self.recovery_time - time.monotonic())
+
+    def allow(self) -> bool:
+        if self._opened_at is None:
+            return True
+        if self._trial_in_flight or self.retry_after > 0:
+            return False
+        self._trial_in_flight = True
+        return True
+
+    def record_success(self) -> None:
+        if self._opened_at is not None:
+            logger.info("%s circuit closed", self.name)
+        self.failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial_in_flight = False
+        if self._opened_at is not None or self.failures >= self.failure_threshold:
+            if self._opened_at is None:
+                logger.warning("%s circuit opened after %s failures", self.name, self.failures)
+            self._opened_at = time.monotonic()
+
+
+class RetryBudget:
+    """Number of retries shared by all the backend calls made while handling one request."""
+
+    def __init__(self, retries: int):
+        self.retries = retries
+
+    def spend(self) -> bool:
+        if self.retries <= 0:
+            return False
+        self.retries -= 1
+        return True
+
+
+retry_budget: ContextVar[Optional[RetryBudget]] = ContextVar("retry_budget", default=None)
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    if name not in _breakers:
+        _breakers[name] = CircuitBreaker(
+            name=name,
+            failure_threshold=settings.circuit_failure_threshold,
+            recovery_time=settings.circuit_recovery_time,
+        )
+    return _breakers[name]
+
+
+def guard_public_methods(
+    breaker: CircuitBreaker,
+    is_failure: Callable[[Exception], bool],
+    fail_open: bool = False,
+    fallbacks: Dict[str, Callable[..., Any]] | None = None,
+):
+    """
+    Decorate all public coroutine methods of a class with a circuit breaker and bounded retries.
+
+    Failed calls are retried with exponential backoff while the retry budget of the current
+    request lasts, calls made outside of a request get `backend_max_retries` retries each.
+    Exceptions for which `is_failure` is false are raised right away and do not count as
+    failures. Once the backend is given up on, BackendUnavailableError is raised or, when
+    `fail_open` is set, the result of the method's fallback (None by default) is returned.
+    """
+    fallbacks = fallbacks or {}
+
+    def decorator(cls):
+        for attr_name, attr_value in list(cls.__dict__.items()):
+            if inspect.iscoroutinefunction(attr_value) and not attr_name.startswith("_"):
+                fallback = fallbacks.get(attr_name, lambda *args, **kwargs: None)
+                setattr(cls, attr_name, _guard(attr_value, breaker, is_failure, fallback if fail_open else None))
+        return cls
+
+    return decorator
+
+
+def _guard(method, breaker: CircuitBreaker, is_failure: Callable[[Exception], bool], fallback: Callable | None):
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        budget = retry_budget.get() or RetryBudget(settings.backend_max_retries)
+        attempt = 0
+        while True:
+            # Calls let through an open circuit are its trial calls
+            is_trial = breaker.is_open
+            if not breaker.allow():
+                return _give_up(breaker, fallback, args, kwargs)
+            try:
+                result = await method(*args, **kwargs)
+            except asyncio.CancelledError:
+                # Cancelled calls tell nothing about the backend, the next call becomes the trial
+                if is_trial:
+                    breaker.release_trial()
+                raise
+            except Exception as error:
+                if not is_failure(error):
+                    # The backend answered, e.g. that the document does not exist
+                    breaker.record_success()
+                    raise
+                breaker.record_failure()
+                if breaker.is_open or not budget.spend():
+                    logger.warning("%s call %s failed: %s", breaker.name, method.__qualname__, error)
+                    return _give_up(breaker, fallback, args, kwargs, error)
+                await asyncio.sleep(min(settings.backend_retry_wait * 2**attempt, settings.backend_retry_max_wait))
+                attempt += 1
+                continue
+            breaker.record_success()
+            return result
+
+    return wrapper
+
+
+def _give_up(breaker: CircuitBreaker, fallback: Callable | None, args, kwargs, error: Exception | None = None):
+    if fallback is not None:
+        return fallback(*args, **kwargs)
+    raise BackendUnavailableError(breaker.name, retry_after=breaker.retry_after) from error
@@ -0,0 +1,286 @@
+"""
+Measures the latency and the throughput of the API routes with in-memory backends.
+
+The application is called in-process, without a network or an HTTP server, while the
+cache storage and the search engine are replaced by fakes delaying every call by the
+configured latency. Every scenario is first run on a cold cache, every request asking
+for documents or a page not requested before, then the same requests are repeated on
+the warm cache.
+
+Run from the movies_api directory:
+
+    python -m benchmarks.api --requests 500 --concurrency 10 --output results.json
+    python -m benchmarks.api --baseline results.json --max-regression 0.2
+"""
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import sys
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Tuple
+
+from benchmarks.fake_backends import (
+    FakeCacheStorage,
+    FakeSearchEngine,
+    SimulatedLatency,
+)
+from cache_storage.instrumented import InstrumentedCacheStorage
+from core.config import settings
+from db import elastic, redis
+from main import app
+from search_engine.instrumented import InstrumentedSearchEngine
+
+# Request path and query string
+Request = Tuple[str, str]
+
+
+@dataclass
+class ScenarioResult:
+    scenario: str
+    cache: str
+    requests: int
+    concurrency: int
+    errors: int
+    throughput: float
+    p50: float
+    p95: float
+    p99: float
+    mean: float
+    max: float
+
+
+def make_documents(films_number: int) -> Dict[str, List[dict]]:
+    genres = [{"id": str(uuid.uuid4()), "name": name, "description": None} for name in ("Action", "Drama", "Comedy")]
+    persons = [{"id": str(uuid.uuid4()), "name": f"Person {i}"} for i in range(100)]
+    films = [
+        {
+            "id": str(uuid.uuid4()),
+            "title": f"Film {i}",
+            "description": f"Description of the film {i}",
+            "imdb_rating": round(1 + i * 9 / films_number, 1),
+            "genre": [genres[i % len(genres)]["name"]],
+            "director": [persons[i % len(persons)]["name"]],
+            "actors": [persons[(i + shift) % len(persons)] for shift in range(1, 6)],
+            "writers": [persons[(i + 7) % len(persons)]],
+            "actors_names": [persons[(i + shift) % len(persons)]["name"] for shift in range(1, 6)],
+            "writers_names": [persons[(i + 7) % len(persons)]["name"]],
+        }
+        for i in range(films_number)
+    ]
+    return {
+        "movies": films,
+        "genres": genres,
+        "persons": [
+            {
+                "id": person["id"],
+                "full_name": person["name"],
+                "films": [
+                    {
+                        "id": films[0]["id"],
+                        "roles": ["actor"],
+                        "title": films[0]["title"],
+                        "imdb_rating": films[0]["imdb_rating"],
+                    }
+                ],
+            }
+            for person in persons
+        ],
+    }
+
+
+def make_scenarios(films: List[dict], requests: int, ids_per_request: int) -> Dict[str, List[Request]]:
+    """Returns the requests of every scenario, no two requests of a scenario ask for the same documents."""
+    ids = [film["id"] for film in films]
+    page_size = 10
+    return {
+        "film_by_id": [(f"/api/v1/films/{ids[i % len(ids)]}", "") for i in range(requests)],
+        "films_by_ids": [
+            (
+                "/api/v1/films/",
+                "&".join(f"id={ids[(i * ids_per_request + j) % len(ids)]}" for j in range(ids_per_request)),
+            )
+            for i in range(requests)
+        ],
+        "films_search": [
+            ("/api/v1/films/search", f"search=film&sort=-imdb_rating&page_size={page_size}&page_number={i + 1}")
+            for i in range(min(requests, settings.search_max_result_window // page_size))
+        ],
+    }
+
+
+async def call_app(app: Callable, path: str, query: str) -> int:
+    """Sends a GET request straight to the ASGI application, returns the status of the response."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(b"host", b"benchmark")],
+        "client": ("127.0.0.1", 0),
+        "server": ("benchmark", 80),
+    }
+    request_sent = False
+    response_sent = asyncio.Event()
+    status = 0
+
+    async def receive() -> dict:
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await response_sent.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body" and not message.get("more_body", False):
+            response_sent.set()
+
+    await app(scope, receive, send)
+    return status
+
+
+async def run_requests(app: Callable, requests: List[Request], concurrency: int) -> Tuple[List[float], int, float]:
+    """Sends the requests from `concurrency` clients, returns the latencies, the number of errors and the duration."""
+    latencies: List[float] = []
+    errors = 0
+    queue: asyncio.Queue[Request] = asyncio.Queue()
+    for request in requests:
+        queue.put_nowait(request)
+
+    async def client() -> None:
+        nonlocal errors
+        while not queue.empty():
+            path, query = queue.get_nowait()
+            started_at = time.perf_counter()
+            status = await call_app(app, path, query)
+            latencies.append(time.perf_counter() - started_at)
+            if status >= 400:
+                errors += 1
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*[client() for _ in range(concurrency)])
+    return latencies, errors, time.perf_counter() - started_at
+
+
+def summarize(scenario: str, cache: str, concurrency: int, latencies: List[float], errors: int, duration: float):
+    percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    return ScenarioResult(
+        scenario=scenario,
+        cache=cache,
+        requests=len(latencies),
+        concurrency=concurrency,
+        errors=errors,
+        throughput=round(len(latencies) / duration, 1),
+        p50=round(percentiles[49] * 1000, 3),
+        p95=round(percentiles[94] * 1000, 3),
+        p99=round(percentiles[98] * 1000, 3),
+        mean=round(statistics.fmean(latencies) * 1000, 3),
+        max=round(max(latencies) * 1000, 3),
+    )
+
+
+async def run_benchmark(args: argparse.Namespace) -> List[ScenarioResult]:
+    documents = make_documents(args.films)
+    scenarios = make_scenarios(documents["movies"], args.requests, args.ids_per_request)
+    results = []
+    for scenario, requests in scenarios.items():
+        if args.scenario and scenario not in args.scenario:
+            continue
+        # New backends for every scenario, so every scenario starts with empty caches and new services
+        redis.redis = FakeCacheStorage(SimulatedLatency(args.redis_latency / 1000, args.redis_jitter / 1000))
+        elastic.es = FakeSearchEngine(documents, SimulatedLatency(args.es_latency / 1000, args.es_jitter / 1000))
+        if settings.metrics_enabled:
+            redis.redis = InstrumentedCacheStorage(redis.redis)
+            elastic.es = InstrumentedSearchEngine(elastic.es)
+        await run_requests(app, requests[: args.warmup], args.concurrency)
+        for cache in ("cold", "warm"):
+            latencies, errors, duration = await run_requests(app, requests[args.warmup :], args.concurrency)
+            results.append(summarize(scenario, cache, args.concurrency, latencies, errors, duration))
+    return results
+
+
+def print_results(results: List[ScenarioResult], baseline: Dict[Tuple[str, str], dict] | None = None) -> None:
+    print(f"{'scenario':<15} {'cache':<6} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for result in results:
+        line = (
+            f"{result.scenario:<15} {result.cache:<6} {result.throughput:>9.1f} "
+            f"{result.p50:>9.3f} {result.p95:>9.3f} {result.p99:>9.3f} {result.errors:>7}"
+        )
+        previous = (baseline or {}).get((result.scenario, result.cache))
+        if previous:
+            line += f"   p95 {get_change(previous['p95'], result.p95):+.1%} vs baseline"
+        print(line)
+
+
+def get_change(previous: float, current: float) -> float:
+    return (current - previous) / previous if previous else 0
+
+
+def find_regressions(
+    results: List[ScenarioResult], baseline: Dict[Tuple[str, str], dict], max_regression: float
+) -> List[str]:
+    regressions = []
+    for result in results:
+        previous = baseline.get((result.scenario, result.cache))
+        if previous and get_change(previous["p95"], result.p95) > max_regression:
+            regressions.append(f"{result.scenario} ({result.cache}): p95 {previous['p95']} ms -> {result.p95} ms")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--films", type=int, default=10000, help="Number of films in the index")
+    parser.add_argument("--requests", type=int, default=500, help="Number of requests per scenario")
+    parser.add_argument("--warmup", type=int, default=20, help="Requests sent before measuring, on top of --requests")
+    parser.add_argument("--concurrency", type=int, default=10, help="Number of concurrent clients")
+    parser.add_argument("--ids-per-request", type=int, default=10, help="Number of ids requested by films_by_ids")
+    parser.add_argument("--redis-latency", type=float, default=0.5, help="Latency of Redis calls, in milliseconds")
+    parser.add_argument("--redis-jitter", type=float, default=0.2, help="Random part of Redis latency, in milliseconds")
+    parser.add_argument("--es-latency", type=float, default=5, help="Latency of Elasticsearch calls, in milliseconds")
+    parser.add_argument("--es-jitter", type=float, default=2, help="Random part of Elasticsearch latency, in ms")
+    parser.add_argument("--scenario", action="append", help="Scenario to run, all of them by default")
+    parser.add_argument("--output", help="File to save the results to as JSON")
+    parser.add_argument("--baseline", help="Results of a previous run to compare with")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed growth of p95 against the baseline")
+    args = parser.parse_args()
+    args.requests += args.warmup
+
+    results = asyncio.run(run_benchmark(args))
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = {(result["scenario"], result["cache"]): result for result in json.load(file)["results"]}
+    print_results(results, baseline)
+
+    if args.output:
+        report = {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "parameters": {name: value for name, value in vars(args).items() if name not in ("output", "baseline")},
+            "results": [asdict(result) for result in results],
+        }
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+    if baseline:
+        regressions = find_regressions(results, baseline, args.max_regression)
+        if regressions:
+            print("Regressions of p95 above {:.0%}:".format(args.max_regression), *regressions, sep="\n  ")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Compares the deserializers of the models with building nested models one element at a time.
+
+Run from the movies_api directory:
+
+    python -m benchmarks.deserialization --cast-size 500
+"""
+import argparse
+import timeit
+
+import orjson
+from models.film import Film
+from models.genre import MovieGenre
+from models.person import MoviePerson, MoviePersonName
+
+
+def make_search_document(cast_size: int) -> dict:
+    return {
+        "_source": {
+            "id": "film",
+            "title": "Film",
+            "description": "Description",
+            "imdb_rating": 7.5,
+            "actors": [{"id": f"actor_{i}", "name": f"Actor {i}"} for i in range(cast_size)],
+            "writers": [{"id": f"writer_{i}", "name": f"Writer {i}"} for i in range(cast_size // 10)],
+            "director": [f"Director {i}" for i in range(3)],
+            "genre": ["Action", "Drama", "Sci-Fi"],
+        }
+    }
+
+
+def deserialize_search_per_element(document: dict) -> Film:
+    source = document["_source"]
+    return Film(
+        id=source["id"],
+        title=source["title"],
+        description=source["description"],
+        imdb_rating=source["imdb_rating"],
+        actors=[MoviePerson(id=person["id"], full_name=person["name"]) for person in source["actors"]],
+        writers=[MoviePerson(id=person["id"], full_name=person["name"]) for person in source["writers"]],
+        directors=[MoviePersonName(full_name=name) for name in source["director"] if name is not None],
+        genres=[MovieGenre(name=name) for name in source["genre"]],
+    )
+
+
+def deserialize_cache_per_element(film: dict | str) -> Film:
+    if not isinstance(film, dict):
+        film = orjson.loads(film)
+    return Film(
+        id=film["id"],
+        title=film["title"],
+        description=film["description"],
+        imdb_rating=film["imdb_rating"],
+        actors=[MoviePerson(id=person["id"], full_name=person["full_name"]) for person in film["actors"]],
+        writers=[MoviePerson(id=person["id"], full_name=person["full_name"]) for person in film["writers"]],
+        directors=[MoviePersonName(full_name=director["full_name"]) for director in film["directors"]],
+        genres=[MovieGenre(name=genre["name"]) for genre in film["genres"]],
+    )
+
+
+def measure(name: str, func, number: int) -> None:
+    seconds = min(timeit.repeat(func, number=number, repeat=5)) / number
+    print(f"{name:<45} {seconds * 1_000_000:>10.1f} us")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cast-size", type=int, default=200, help="Number of actors of the film")
+    parser.add_argument("--number", type=int, default=1000, help="Number of calls per measurement")
+    args = parser.parse_args()
+
+    document = make_search_document(args.cast_size)
+    film = Film.deserialize_search(document)
+    assert deserialize_search_per_element(document) == film
+    cached_film = film.model_dump(mode="json")
+    cached_film_json = film.model_dump_json()
+
+    print(f"Film with {args.cast_size} actors, best of 5 runs of {args.number} calls")
+    measure("search document, per element", lambda: deserialize_search_per_element(document), args.number)
+    measure("search document, Film.deserialize_search", lambda: Film.deserialize_search(document), args.number)
+    measure("cached dict, per element", lambda: deserialize_cache_per_element(cached_film), args.number)
+    measure("cached dict, Film.deserialize_cache", lambda: Film.deserialize_cache(cached_film), args.number)
+    measure("cached JSON, per element", lambda: deserialize_cache_per_element(cached_film_json), args.number)
+    measure("cached JSON, Film.deserialize_cache", lambda: Film.deserialize_cache(cached_film_json), args.number)
+
+
+if __name__ == "__main__":
+    main()
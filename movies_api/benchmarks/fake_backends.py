@@ -0,0 +1,325 @@
+"""In-memory implementations of the cache storage and of the search engine simulating the latency of the network."""
+import asyncio
+import random
+import time
+import uuid
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from elasticsearch import NotFoundError
+
+
+class SimulatedLatency:
+    """Delay of every call: a fixed part and a uniformly distributed random part, both in seconds."""
+
+    def __init__(self, latency: float = 0, jitter: float = 0):
+        self.latency = latency
+        self.jitter = jitter
+
+    async def wait(self) -> None:
+        delay = self.latency + random.uniform(0, self.jitter)
+        # Even without latency the call yields to the event loop, as a call to a real backend does
+        await asyncio.sleep(delay)
+
+
+class FakePipeline:
+    def __init__(self, storage: "FakeCacheStorage"):
+        self.storage = storage
+        self._commands: List[tuple] = []
+
+    async def __aenter__(self) -> "FakePipeline":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self._commands.clear()
+
+    def set(self, key, value, expiration_time=None, nx: bool = False) -> "FakePipeline":
+        self._commands.append((self.storage._set, key, value, expiration_time, nx))
+        return self
+
+    def zincrby(self, name, amount: float, value) -> "FakePipeline":
+        self._commands.append((self.storage._zincrby, name, amount, value))
+        return self
+
+    def zremrangebyrank(self, name, start: int, end: int) -> "FakePipeline":
+        self._commands.append((self.storage._zremrangebyrank, name, start, end))
+        return self
+
+    def zunionstore(self, dest, keys) -> "FakePipeline":
+        self._commands.append((self.storage._zunionstore, dest, keys))
+        return self
+
+    def zrevrange(self, name, start: int, end: int) -> "FakePipeline":
+        self._commands.append((self.storage._zrevrange_members, name, start, end))
+        return self
+
+    def expire(self, name, time: int) -> "FakePipeline":
+        self._commands.append((self.storage._expire, name, time))
+        return self
+
+    def delete(self, *names) -> "FakePipeline":
+        self._commands.append((self.storage._delete, *names))
+        return self
+
+    async def execute(self) -> list:
+        await self.storage.latency.wait()
+        results = [command(*args) for command, *args in self._commands]
+        self._commands.clear()
+        return results
+
+
+class FakePubSub:
+    """Delivers the messages published to the subscribed channels, as `listen` of redis-py does."""
+
+    def __init__(self, storage: "FakeCacheStorage"):
+        self.storage = storage
+        self.channels: List[str] = []
+        self._messages: asyncio.Queue = asyncio.Queue()
+
+    async def subscribe(self, *channels) -> None:
+        await self.storage.latency.wait()
+        self.channels.extend(channels)
+        self.storage._subscribers.append(self)
+
+    async def listen(self) -> AsyncIterator[dict]:
+        while True:
+            yield await self._messages.get()
+
+    async def close(self) -> None:
+        if self in self.storage._subscribers:
+            self.storage._subscribers.remove(self)
+
+
+class FakeCacheStorage:
+    """Keeps the values in a dictionary, supports the commands used by the services and the ETL."""
+
+    def __init__(self, latency: SimulatedLatency | None = None):
+        self.latency = latency or SimulatedLatency()
+        self._values: Dict[str, bytes] = {}
+        self._expires_at: Dict[str, float] = {}
+        self._sorted_sets: Dict[str, Dict[str, float]] = {}
+        self._subscribers: List[FakePubSub] = []
+
+    async def set(self, key, value, expiration_time=None, nx: bool = False) -> Optional[bool]:
+        await self.latency.wait()
+        return self._set(key, value, expiration_time, nx)
+
+    async def get(self, key, default=None) -> Optional[Any]:
+        await self.latency.wait()
+        return self._get(key)
+
+    async def mget(self, keys, *args) -> List[Optional[Any]]:
+        await self.latency.wait()
+        return [self._get(key) for key in [*keys, *args]]
+
+    async def delete(self, *keys) -> int:
+        await self.latency.wait()
+        return sum(self._values.pop(key, None) is not None for key in keys)
+
+    async def eval(self, script: str, numkeys: int, *keys_and_args) -> Any:
+        """Runs the script releasing a lock, the only script sent by the services."""
+        await self.latency.wait()
+        (key,), (token,) = keys_and_args[:numkeys], keys_and_args[numkeys:]
+        if self._get(key) != token.encode():
+            return 0
+        del self._values[key]
+        return 1
+
+    async def zrevrange(self, name, start: int, end: int) -> List[bytes]:
+        await self.latency.wait()
+        return [member.encode() for member in self._zrevrange(name)[start : end + 1 if end >= 0 else None]]
+
+    async def incr(self, name, amount: int = 1) -> int:
+        await self.latency.wait()
+        value = int(self._get(name) or 0) + amount
+        self._values[name] = str(value).encode()
+        return value
+
+    async def publish(self, channel, message) -> int:
+        await self.latency.wait()
+        data = message.encode() if isinstance(message, str) else message
+        receivers = [pubsub for pubsub in self._subscribers if channel in pubsub.channels]
+        for pubsub in receivers:
+            pubsub._messages.put_nowait({"type": "message", "channel": channel.encode(), "data": data})
+        return len(receivers)
+
+    def pubsub(self, ignore_subscribe_messages: bool = False) -> FakePubSub:
+        return FakePubSub(self)
+
+    def pipeline(self, transaction: bool = True, shard_hint: Optional[str] = None) -> FakePipeline:
+        return FakePipeline(self)
+
+    async def close(self, close_connection_pool: Optional[bool] = None) -> None:
+        pass
+
+    def _set(self, key, value, expiration_time, nx: bool) -> Optional[bool]:
+        if nx and self._get(key) is not None:
+            return None
+        self._values[key] = value.encode() if isinstance(value, str) else value
+        if expiration_time:
+            self._expires_at[key] = time.monotonic() + expiration_time
+        return True
+
+    def _zincrby(self, name, amount: float, value) -> float:
+        self._get_sorted_set(name)
+        members = self._sorted_sets.setdefault(name, {})
+        members[value] = members.get(value, 0) + amount
+        return members[value]
+
+    def _zremrangebyrank(self, name, start: int, end: int) -> int:
+        # Ranks are counted from the lowest score
+        ranked = list(reversed(self._zrevrange(name)))
+        removed = ranked[start : end + 1 if end >= 0 else len(ranked) + end + 1]
+        for member in removed:
+            del self._sorted_sets[name][member]
+        return len(removed)
+
+    def _zunionstore(self, dest, keys) -> int:
+        members: Dict[str, float] = {}
+        for key in keys:
+            for member, score in self._get_sorted_set(key).items():
+                members[member] = members.get(member, 0) + score
+        self._sorted_sets[dest] = members
+        return len(members)
+
+    def _zrevrange(self, name) -> List[str]:
+        members = self._get_sorted_set(name)
+        return sorted(members, key=lambda member: members[member], reverse=True)
+
+    def _zrevrange_members(self, name, start: int, end: int) -> List[bytes]:
+        return [member.encode() for member in self._zrevrange(name)[start : end + 1 if end >= 0 else None]]
+
+    def _expire(self, name, time_to_live: int) -> bool:
+        if name not in self._values and name not in self._sorted_sets:
+            return False
+        self._expires_at[name] = time.monotonic() + time_to_live
+        return True
+
+    def _delete(self, *keys) -> int:
+        deleted = 0
+        for key in keys:
+            value, members = self._values.pop(key, None), self._sorted_sets.pop(key, None)
+            deleted += value is not None or members is not None
+            self._expires_at.pop(key, None)
+        return deleted
+
+    def _get_sorted_set(self, name) -> Dict[str, float]:
+        expires_at = self._expires_at.get(name)
+        if expires_at is not None and expires_at < time.monotonic():
+            self._sorted_sets.pop(name, None)
+            self._expires_at.pop(name, None)
+        return self._sorted_sets.get(name, {})
+
+    def _get(self, key) -> Optional[bytes]:
+        expires_at = self._expires_at.get(key)
+        if expires_at is not None and expires_at < time.monotonic():
+            self._values.pop(key, None)
+            self._expires_at.pop(key, None)
+        return self._values.get(key)
+
+
+class FakeSearchEngine:
+    """
+    Serves the documents of every index from memory.
+
+    Every document matches any search, so the cost of a search does not depend on the
+    number of documents: only sorting by fields, from/size and search_after pagination
+    and points in time are supported.
+    """
+
+    def __init__(self, documents: Dict[str, List[dict]], latency: SimulatedLatency | None = None):
+        self.latency = latency or SimulatedLatency()
+        self._documents = {index: {document["id"]: document for document in docs} for index, docs in documents.items()}
+        self._sorted: Dict[tuple, List[dict]] = {}
+        # Indexes of the open points in time by id
+        self.points_in_time: Dict[str, str] = {}
+
+    async def get(self, index, id):
+        await self.latency.wait()
+        document = self._documents.get(index, {}).get(id)
+        if document is None:
+            raise NotFoundError("Document not found", None, {"found": False})
+        return {"_index": index, "_id": id, "found": True, "_source": document}
+
+    async def mget(self, index, ids):
+        await self.latency.wait()
+        documents = self._documents.get(index, {})
+        return {
+            "docs": [
+                (
+                    {"_index": index, "_id": id, "found": True, "_source": documents[id]}
+                    if id in documents
+                    else {"_index": index, "_id": id, "found": False}
+                )
+                for id in ids
+            ]
+        }
+
+    async def index(self, index, id, document):
+        await self.latency.wait()
+        self._documents.setdefault(index, {})[id] = document
+        self._sorted = {key: documents for key, documents in self._sorted.items() if key[0] != index}
+        return {"_index": index, "_id": id, "result": "updated"}
+
+    async def search(self, index, body):
+        await self.latency.wait()
+        return self._search(index, body)
+
+    async def msearch(self, searches):
+        await self.latency.wait()
+        pairs = zip(searches[::2], searches[1::2])
+        return {"took": 1, "responses": [self._search(header.get("index"), body) for header, body in pairs]}
+
+    async def open_point_in_time(self, index, keep_alive):
+        await self.latency.wait()
+        pit_id = uuid.uuid4().hex
+        self.points_in_time[pit_id] = index
+        return {"id": pit_id}
+
+    async def close_point_in_time(self, id):
+        await self.latency.wait()
+        self.points_in_time.pop(id, None)
+
+    async def close(self):
+        pass
+
+    def _search(self, index: str | None, body: dict) -> dict:
+        if index is None:
+            index = self.points_in_time.get(body["pit"]["id"])
+            if index is None:
+                raise NotFoundError("Point in time is not found", None, {"found": False})
+        sort = [next(iter(item.items())) for item in body.get("sort", []) if "_score" not in item]
+        documents = self._get_sorted(index, tuple(sort))
+        start = body.get("from", 0)
+        if "search_after" in body:
+            # Sort values end with the id, so they point to exactly one document
+            sort_values = [list(self._sort_values(document, sort)) for document in documents]
+            start = sort_values.index(body["search_after"]) + 1
+        hits = documents[start : start + body.get("size", 10)]
+        includes = body.get("_source", {}).get("includes")
+        return {
+            "took": 1,
+            "hits": {
+                "total": {"value": len(documents), "relation": "eq"},
+                "hits": [
+                    {
+                        "_index": index,
+                        "_id": document["id"],
+                        "_source": {field: document.get(field) for field in includes} if includes else document,
+                        "sort": list(self._sort_values(document, sort)),
+                    }
+                    for document in hits
+                ],
+            },
+        }
+
+    def _get_sorted(self, index: str, sort: tuple) -> List[dict]:
+        if (index, sort) not in self._sorted:
+            documents = list(self._documents.get(index, {}).values())
+            for field, order in reversed(sort):
+                documents.sort(key=lambda document: document.get(field) or 0, reverse=order == "desc")
+            self._sorted[(index, sort)] = documents
+        return self._sorted[(index, sort)]
+
+    @staticmethod
+    def _sort_values(document: dict, sort: list) -> tuple:
+        return tuple(document.get(field) or 0 for field, _ in sort)
@@ -0,0 +1,70 @@
+import hashlib
+import math
+import time
+from typing import Optional
+
+
+class BloomFilter:
+    """
+    Compact set of strings answering whether a string has possibly been added.
+
+    Strings that were added are always reported, strings that were not are reported
+    with the configured error rate. Once it is older than `expiration_time` or holds
+    more than `capacity` strings the filter is emptied, so neither stale entries nor
+    the error rate grow unbounded.
+
+    Every position holds a counter instead of a bit, so added strings can be removed.
+    Counters saturate at 255 and are never decremented from there. Removing a string
+    reported by mistake may hide the strings sharing its positions.
+    """
+
+    def __init__(self, capacity: int, error_rate: float, expiration_time: Optional[float] = None):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.expiration_time = expiration_time
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._counters = bytearray(self.size)
+        self._count = 0
+        self._created_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, value: str) -> bool:
+        self._expire()
+        return all(self._counters[position] for position in self._positions(value))
+
+    def add(self, value: str) -> None:
+        self._expire()
+        if self._count >= self.capacity:
+            self.clear()
+        for position in self._positions(value):
+            if self._counters[position] < 255:
+                self._counters[position] += 1
+        self._count += 1
+
+    def remove(self, *values: str) -> None:
+        """Removes the strings that were added, the others are skipped."""
+        for value in values:
+            if value not in self:
+                continue
+            for position in self._positions(value):
+                if self._counters[position] < 255:
+                    self._counters[position] -= 1
+            self._count -= 1
+
+    def clear(self) -> None:
+        self._counters = bytearray(self.size)
+        self._count = 0
+        self._created_at = time.monotonic()
+
+    def _expire(self) -> None:
+        if self.expiration_time and time.monotonic() - self._created_at > self.expiration_time:
+            self.clear()
+
+    def _positions(self, value: str):
+        # Double hashing derives all the positions from two independent hashes
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "big"), int.from_bytes(digest[8:], "big") | 1
+        return ((first + i * second) % self.size for i in range(self.hash_count))
@@ -1,4 +1,4 @@
-from typing import Any, Optional, Protocol
+from typing import Any, List, Optional, Protocol
 
 
 class CacheStorageProtocol(Protocol):
@@ -6,14 +6,47 @@ class CacheStorageProtocol(Protocol):
     Storage implementation that uses Redis.
     """
 
-    async def set(self, key, value, expiration_time) -> None:
-        """Save state to the Redis storage."""
+    async def set(self, key, value, expiration_time, nx: bool = False) -> Optional[bool]:
+        """
+        Save state to the Redis storage.
+
+        :param nx: only save the state if the key does not exist yet.
+        """
         ...
 
     async def get(self, k, default=None) -> Optional[Any]:
         """Retrieve state from the Redis storage."""
         ...
 
+    async def delete(self, *keys) -> int:
+        """Remove states from the Redis storage."""
+        ...
+
+    async def mget(self, keys, *args) -> List[Optional[Any]]:
+        """Retrieve several states from the Redis storage in one round trip."""
+        ...
+
+    async def eval(self, script: str, numkeys: int, *keys_and_args) -> Any:
+        """Runs the Lua script atomically, the first `numkeys` arguments are the keys it accesses."""
+        ...
+
+    async def zrevrange(self, name, start: int, end: int) -> List[Any]:
+        """Retrieve members of a sorted set from the highest score to the lowest one."""
+        ...
+
+    def pipeline(self, transaction: bool = True, shard_hint: Optional[str] = None) -> Any:
+        """
+        Returns a pipeline that buffers commands and sends them in one round trip.
+
+        :param transaction: wraps buffered commands into MULTI/EXEC when set.
+        :param shard_hint: name of the shard to send buffered commands to.
+        """
+        ...
+
+    def pubsub(self, **kwargs) -> Any:
+        """Returns a Publish/Subscribe object used to subscribe to channels and listen for messages."""
+        ...
+
     async def close(self, close_connection_pool: Optional[bool] = None) -> None:
         """
         Closes Redis client connection
@@ -0,0 +1,125 @@
+import struct
+from enum import Enum
+from typing import Any, Optional, Tuple
+
+import orjson
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+try:
+    import lz4.frame
+except ImportError:  # pragma: no cover
+    lz4 = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+CODEC_VERSION = 1
+# Version, serializer and compression flags, moment the entry becomes stale (0 when never)
+HEADER = struct.Struct(">BBd")
+
+
+class UnsupportedCodecVersionError(ValueError):
+    """Raised when an entry was encoded by a version of the codec this one does not know."""
+
+
+class Serializer(int, Enum):
+    JSON = 0
+    MSGPACK = 1
+
+
+class Compression(int, Enum):
+    NONE = 0
+    LZ4 = 1
+    ZSTD = 2
+
+
+class CacheCodec:
+    """
+    Encodes values stored in the cache.
+
+    Every entry starts with a header holding the codec version, the serializer and the
+    compression used for the payload and the moment the entry becomes stale. Payloads
+    larger than the threshold are compressed. Entries of unknown codec versions, e.g. written
+    by a newer release during a rolling deploy, are rejected.
+    """
+
+    def __init__(
+        self,
+        serializer: Serializer = Serializer.JSON,
+        compression: Compression = Compression.NONE,
+        compression_threshold: int = 1024,
+    ):
+        if serializer == Serializer.MSGPACK and msgpack is None:
+            raise RuntimeError("msgpack must be installed to use msgpack cache serializer")
+        if compression == Compression.LZ4 and lz4 is None:
+            raise RuntimeError("lz4 must be installed to use lz4 cache compression")
+        if compression == Compression.ZSTD and zstandard is None:
+            raise RuntimeError("zstandard must be installed to use zstd cache compression")
+        self.serializer = serializer
+        self.compression = compression
+        self.compression_threshold = compression_threshold
+
+    def encode(self, value: Any, stale_at: Optional[float] = None) -> bytes:
+        payload = self._serialize(value)
+        compression = Compression.NONE
+        if self.compression != Compression.NONE and len(payload) >= self.compression_threshold:
+            payload = self._compress(payload, self.compression)
+            compression = self.compression
+        flags = self.serializer | compression << 4
+        return HEADER.pack(CODEC_VERSION, flags, stale_at or 0) + payload
+
+    def decode(self, data: bytes) -> Tuple[Any, Optional[float]]:
+        """Returns the stored value and the moment it becomes stale."""
+        flags, stale_at = self._read_header(data)
+        payload = self._decompress(data[HEADER.size :], Compression(flags >> 4))
+        return self._deserialize(payload, Serializer(flags & 0x0F)), stale_at or None
+
+    def decode_json(self, data: bytes) -> Tuple[bytes, Optional[float]]:
+        """
+        Returns the stored value as JSON bytes and the moment it becomes stale.
+
+        JSON payloads are returned as they are stored, without being parsed.
+        """
+        flags, stale_at = self._read_header(data)
+        payload = self._decompress(data[HEADER.size :], Compression(flags >> 4))
+        if Serializer(flags & 0x0F) != Serializer.JSON:
+            payload = orjson.dumps(self._deserialize(payload, Serializer(flags & 0x0F)))
+        return payload, stale_at or None
+
+    def _serialize(self, value: Any) -> bytes:
+        if self.serializer == Serializer.MSGPACK:
+            return msgpack.packb(value, use_bin_type=True)
+        return orjson.dumps(value)
+
+    @staticmethod
+    def _deserialize(payload: bytes, serializer: Serializer) -> Any:
+        if serializer == Serializer.MSGPACK:
+            return msgpack.unpackb(payload, raw=False)
+        return orjson.loads(payload)
+
+    @staticmethod
+    def _compress(payload: bytes, compression: Compression) -> bytes:
+        if compression == Compression.LZ4:
+            return lz4.frame.compress(payload)
+        return zstandard.ZstdCompressor().compress(payload)
+
+    @staticmethod
+    def _decompress(payload: bytes, compression: Compression) -> bytes:
+        if compression == Compression.LZ4:
+            return lz4.frame.decompress(payload)
+        if compression == Compression.ZSTD:
+            return zstandard.ZstdDecompressor().decompress(payload)
+        return payload
+
+    @staticmethod
+    def _read_header(data: bytes) -> Tuple[int, float]:
+        version, flags, stale_at = HEADER.unpack_from(data)
+        if version != CODEC_VERSION:
+            raise UnsupportedCodecVersionError(f"Cache codec version {version} is not supported")
+        return flags, stale_at
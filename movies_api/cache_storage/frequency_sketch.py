@@ -0,0 +1,79 @@
+import hashlib
+from typing import Dict, Hashable, List, Tuple
+
+
+class FrequencySketch:
+    """
+    Count-min sketch estimating how often every key has been accessed recently.
+
+    Estimates never undercount and overcount by a small fraction of the number of
+    accesses, in a fixed amount of memory whatever the number of keys. Once `sample_size`
+    accesses have been counted, all the counters are halved, so keys that are no longer
+    accessed age out. The `top_size` most frequent keys are tracked for reports.
+
+    Keys are hashed from their repr with a stable hash rather than `hash()`, which is
+    salted per process, so every worker counts a key in the same counters.
+    """
+
+    def __init__(self, width: int, depth: int, sample_size: int, top_size: int = 0):
+        self.width = width
+        self.depth = depth
+        self.sample_size = sample_size
+        self.top_size = top_size
+        self._counters = [0] * (width * depth)
+        self._additions = 0
+        self._top: Dict[Hashable, int] = {}
+        self._top_min = 0
+
+    def increment(self, key: Hashable) -> int:
+        """Counts an access to the key, returns the new estimate of its frequency."""
+        indexes = self._indexes(key)
+        frequency = min(self._counters[index] for index in indexes) + 1
+        # Conservative update: only the counters that define the estimate grow, which keeps overcounting low
+        for index in indexes:
+            if self._counters[index] < frequency:
+                self._counters[index] = frequency
+        self._update_top(key, frequency)
+        self._additions += 1
+        if self._additions >= self.sample_size:
+            self._age()
+        return frequency
+
+    def estimate(self, key: Hashable) -> int:
+        return min(self._counters[index] for index in self._indexes(key))
+
+    def get_top(self) -> List[Tuple[Hashable, int]]:
+        """Returns the most frequent keys with their estimated frequencies, the most frequent first."""
+        return sorted(self._top.items(), key=lambda item: item[1], reverse=True)
+
+    def clear(self) -> None:
+        self._counters = [0] * (self.width * self.depth)
+        self._additions = 0
+        self._top.clear()
+        self._top_min = 0
+
+    def _age(self) -> None:
+        self._counters = [counter >> 1 for counter in self._counters]
+        self._additions //= 2
+        self._top = {key: frequency >> 1 for key, frequency in self._top.items() if frequency > 1}
+        self._top_min = min(self._top.values(), default=0)
+
+    def _update_top(self, key: Hashable, frequency: int) -> None:
+        if not self.top_size:
+            return
+        if key not in self._top:
+            if len(self._top) < self.top_size:
+                self._top[key] = frequency
+                self._top_min = min(self._top_min, frequency) if len(self._top) > 1 else frequency
+                return
+            if frequency <= self._top_min:
+                return
+            del self._top[min(self._top, key=self._top.get)]
+        self._top[key] = frequency
+        self._top_min = min(self._top.values())
+
+    def _indexes(self, key: Hashable) -> List[int]:
+        # Double hashing derives the counter of every row from two hashes
+        digest = hashlib.blake2b(repr(key).encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return [row * self.width + (first + row * second) % self.width for row in range(self.depth)]
@@ -0,0 +1,140 @@
+import re
+import time
+from typing import Any, List, Optional
+
+from core.metrics import CACHE_PAYLOAD_SIZE, CACHE_REQUESTS, observe_backend_call
+
+from .cache_storage_protocol import CacheStorageProtocol
+
+# Keys look like `v1:movies_3_<search>_<sort>_<page size>_<page number>`, the generation is left out of the prefix
+KEY_PREFIX = re.compile(r"^(?:v\d+:)?([a-z]+)(?:_\d+)?(_ids|_lock|_generation|_popularity|_films)?")
+
+BACKEND = "redis"
+
+
+def get_key_prefix(key: bytes | str) -> str:
+    if isinstance(key, bytes):
+        key = key.decode(errors="replace")
+    match = KEY_PREFIX.match(key)
+    return "".join(group for group in match.groups() if group) if match and match.group(1) else "other"
+
+
+class InstrumentedCacheStorage:
+    """
+    Records the latency and the errors of the calls to the storage, the size of the stored
+    values and the number of cache hits and misses by key prefix.
+
+    Attributes not related to commands, such as the connection pool, are taken from the storage.
+    """
+
+    def __init__(self, cache_storage: CacheStorageProtocol):
+        self.cache_storage = cache_storage
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.cache_storage, name)
+
+    async def get(self, key, *args, **kwargs) -> Optional[Any]:
+        started_at = time.perf_counter()
+        try:
+            value = await self.cache_storage.get(key, *args, **kwargs)
+        except Exception:
+            observe_backend_call(BACKEND, "get", started_at, failed=True)
+            CACHE_REQUESTS.labels(get_key_prefix(key), "error").inc()
+            raise
+        observe_backend_call(BACKEND, "get", started_at)
+        self._observe_read(key, value)
+        return value
+
+    async def mget(self, keys, *args) -> List[Optional[Any]]:
+        started_at = time.perf_counter()
+        try:
+            values = await self.cache_storage.mget(keys, *args)
+        except Exception:
+            observe_backend_call(BACKEND, "mget", started_at, failed=True)
+            for key in keys:
+                CACHE_REQUESTS.labels(get_key_prefix(key), "error").inc()
+            raise
+        observe_backend_call(BACKEND, "mget", started_at)
+        for key, value in zip(keys, values):
+            self._observe_read(key, value)
+        return values
+
+    async def set(self, key, value, *args, **kwargs) -> Optional[bool]:
+        started_at = time.perf_counter()
+        try:
+            result = await self.cache_storage.set(key, value, *args, **kwargs)
+        except Exception:
+            observe_backend_call(BACKEND, "set", started_at, failed=True)
+            raise
+        observe_backend_call(BACKEND, "set", started_at)
+        _observe_payload(key, value, "write")
+        return result
+
+    async def delete(self, *keys) -> int:
+        started_at = time.perf_counter()
+        try:
+            result = await self.cache_storage.delete(*keys)
+        except Exception:
+            observe_backend_call(BACKEND, "delete", started_at, failed=True)
+            raise
+        observe_backend_call(BACKEND, "delete", started_at)
+        return result
+
+    async def eval(self, script: str, numkeys: int, *keys_and_args) -> Any:
+        started_at = time.perf_counter()
+        try:
+            result = await self.cache_storage.eval(script, numkeys, *keys_and_args)
+        except Exception:
+            observe_backend_call(BACKEND, "eval", started_at, failed=True)
+            raise
+        observe_backend_call(BACKEND, "eval", started_at)
+        return result
+
+    def pipeline(self, *args, **kwargs) -> "InstrumentedPipeline":
+        return InstrumentedPipeline(self.cache_storage.pipeline(*args, **kwargs))
+
+    @staticmethod
+    def _observe_read(key, value) -> None:
+        prefix = get_key_prefix(key)
+        if value is None:
+            CACHE_REQUESTS.labels(prefix, "miss").inc()
+            return
+        CACHE_REQUESTS.labels(prefix, "hit").inc()
+        _observe_payload(key, value, "read")
+
+
+class InstrumentedPipeline:
+    """Records the latency of the round trip sending the buffered commands and the size of the written values."""
+
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.pipeline, name)
+
+    async def __aenter__(self) -> "InstrumentedPipeline":
+        await self.pipeline.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return await self.pipeline.__aexit__(*exc_info)
+
+    def set(self, key, value, *args, **kwargs) -> "InstrumentedPipeline":
+        self.pipeline.set(key, value, *args, **kwargs)
+        _observe_payload(key, value, "write")
+        return self
+
+    async def execute(self, *args, **kwargs) -> list:
+        started_at = time.perf_counter()
+        try:
+            result = await self.pipeline.execute(*args, **kwargs)
+        except Exception:
+            observe_backend_call(BACKEND, "pipeline", started_at, failed=True)
+            raise
+        observe_backend_call(BACKEND, "pipeline", started_at)
+        return result
+
+
+def _observe_payload(key, value, operation: str) -> None:
+    if isinstance(value, (bytes, str)):
+        CACHE_PAYLOAD_SIZE.labels(get_key_prefix(key), operation).observe(len(value))
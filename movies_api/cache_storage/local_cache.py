@@ -0,0 +1,146 @@
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from pydantic import BaseModel
+
+from .frequency_sketch import FrequencySketch
+
+
+class SizeEstimator:
+    """
+    Rough estimation of the memory taken by cached values in bytes.
+
+    Models are measured by the length of their JSON, which costs about as much as
+    serializing them, so only one model of a class in `sample_interval` is measured.
+    The others are estimated with the average size of the measured models of their class.
+    """
+
+    def __init__(self, sample_interval: int = 16):
+        self.sample_interval = sample_interval
+        # Number of models seen, total size and number of the measured ones, by class
+        self._samples: Dict[type, List[int]] = {}
+
+    def __call__(self, value: Any) -> int:
+        if isinstance(value, (bytes, bytearray, memoryview, str)):
+            return len(value)
+        if isinstance(value, BaseModel):
+            return self._estimate_model(value)
+        if isinstance(value, (list, tuple)):
+            return sum(self(item) for item in value)
+        return sys.getsizeof(value)
+
+    def _estimate_model(self, value: BaseModel) -> int:
+        samples = self._samples.get(type(value))
+        if samples is None:
+            samples = self._samples[type(value)] = [0, 0, 0]
+        seen, total_size, measured = samples
+        samples[0] += 1
+        if seen % self.sample_interval:
+            return total_size // measured
+        size = len(value.model_dump_json())
+        samples[1] += size
+        samples[2] += 1
+        return size
+
+
+class LocalCache:
+    """
+    Bounded in-process LRU cache with a time to live for every entry.
+
+    Least recently used entries are evicted as soon as either the number of entries
+    or their estimated total size exceeds the configured limits.
+
+    With a frequency sketch, a new key is only admitted into a full cache when it is
+    accessed more often than the entry it would evict (TinyLFU), so keys requested once
+    do not push the frequently requested ones out. Accesses are counted by the owner
+    of the cache, which also counts lookups of the keys that are not cached.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        max_bytes: int,
+        expiration_time: float,
+        sizeof: Callable[[Any], int] | None = None,
+        sketch: FrequencySketch | None = None,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.expiration_time = expiration_time
+        self._sizeof = sizeof or SizeEstimator()
+        self.sketch = sketch
+        self._entries: OrderedDict[Hashable, tuple[float, int, Any]] = OrderedDict()
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rejections = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        expires_at, _, value = entry
+        if expires_at < time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, expiration_time: Optional[float] = None) -> None:
+        size = self._sizeof(value)
+        if size > self.max_bytes:
+            return
+        if not self._admit(key, size):
+            self.rejections += 1
+            return
+        self._remove(key)
+        expires_at = time.monotonic() + (expiration_time or self.expiration_time)
+        self._entries[key] = (expires_at, size, value)
+        self.size_bytes += size
+        while len(self._entries) > self.max_entries or self.size_bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def delete(self, *keys: Hashable) -> None:
+        for key in keys:
+            self._remove(key)
+
+    def delete_matching(self, predicate: Callable[[Hashable], bool]) -> None:
+        for key in [key for key in self._entries if predicate(key)]:
+            self._remove(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.size_bytes = 0
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "size_bytes": self.size_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "rejections": self.rejections,
+        }
+
+    def _admit(self, key: Hashable, size: int) -> bool:
+        if self.sketch is None or key in self._entries or not self._entries:
+            return True
+        if len(self._entries) < self.max_entries and self.size_bytes + size <= self.max_bytes:
+            return True
+        victim = next(iter(self._entries))
+        return self.sketch.estimate(key) > self.sketch.estimate(victim)
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size_bytes -= entry[1]
@@ -9,16 +9,103 @@ logging_config.dictConfig(LOGGING)
 
 
 class Settings(BaseSettings):
-    project_name: str = Field("movies", env="PROJECT_NAME")
+    project_name: str = Field("movies", validation_alias="PROJECT_NAME")
 
-    cache_expire_time: int = Field(300, env="CACHE_EXPIRE_TIME_IN_SECONDS")
+    cache_expire_time: int = Field(300, validation_alias="CACHE_EXPIRE_TIME_IN_SECONDS")
+    cache_fresh_time: int = Field(240, validation_alias="CACHE_FRESH_TIME_IN_SECONDS")
+    cache_expire_jitter: float = Field(0.1, validation_alias="CACHE_EXPIRE_JITTER")
+    cache_stale_while_revalidate: bool = Field(True, validation_alias="CACHE_STALE_WHILE_REVALIDATE")
+    cache_serializer: str = Field("json", validation_alias="CACHE_SERIALIZER")
+    cache_compression: str = Field("none", validation_alias="CACHE_COMPRESSION")
+    cache_compression_threshold: int = Field(1024, validation_alias="CACHE_COMPRESSION_THRESHOLD_IN_BYTES")
+    cache_key_schema_version: int = Field(1, validation_alias="CACHE_KEY_SCHEMA_VERSION")
+    cache_key_max_length: int = Field(200, validation_alias="CACHE_KEY_MAX_LENGTH")
+    cache_normalized_lists: bool = Field(False, validation_alias="CACHE_NORMALIZED_LISTS")
+    cache_hot_key_min_frequency: int = Field(16, validation_alias="CACHE_HOT_KEY_MIN_FREQUENCY")
+    cache_hot_expire_factor: float = Field(4, validation_alias="CACHE_HOT_EXPIRE_FACTOR")
+    cache_negative_expire_time: int = Field(30, validation_alias="CACHE_NEGATIVE_EXPIRE_TIME_IN_SECONDS")
 
-    redis_host: str = Field("127.0.0.1", env="REDIS_PORT")
-    redis_port: int = Field(6379, env="PROJECT_NAME")
+    cache_invalidation_enabled: bool = Field(True, validation_alias="CACHE_INVALIDATION_ENABLED")
+    cache_invalidation_channel: str = Field("elastic_changes", validation_alias="CACHE_INVALIDATION_CHANNEL")
 
-    elastic_host: str = Field("127.0.0.1", env="ELASTIC_HOST")
-    elastic_port: int = Field(9200, env="ELASTIC_PORT")
-    elastic_schema: str = Field("http", env="ELASTIC_SCHEME")
+    local_cache_enabled: bool = Field(True, validation_alias="LOCAL_CACHE_ENABLED")
+    local_cache_max_entries: int = Field(10000, validation_alias="LOCAL_CACHE_MAX_ENTRIES")
+    local_cache_max_bytes: int = Field(64 * 1024 * 1024, validation_alias="LOCAL_CACHE_MAX_BYTES")
+    local_cache_expire_time: int = Field(30, validation_alias="LOCAL_CACHE_EXPIRE_TIME_IN_SECONDS")
+    frequency_sketch_enabled: bool = Field(True, validation_alias="FREQUENCY_SKETCH_ENABLED")
+    frequency_sketch_width: int = Field(16384, validation_alias="FREQUENCY_SKETCH_WIDTH")
+    frequency_sketch_depth: int = Field(4, validation_alias="FREQUENCY_SKETCH_DEPTH")
+    hot_keys_report_size: int = Field(20, validation_alias="HOT_KEYS_REPORT_SIZE")
+    local_missing_ids_filter_enabled: bool = Field(True, validation_alias="LOCAL_MISSING_IDS_FILTER_ENABLED")
+    local_missing_ids_filter_capacity: int = Field(100000, validation_alias="LOCAL_MISSING_IDS_FILTER_CAPACITY")
+    local_missing_ids_filter_error_rate: float = Field(1e-6, validation_alias="LOCAL_MISSING_IDS_FILTER_ERROR_RATE")
+
+    cache_warm_enabled: bool = Field(True, validation_alias="CACHE_WARM_ENABLED")
+    cache_warm_pages: int = Field(3, validation_alias="CACHE_WARM_PAGES")
+    cache_warm_page_size: int = Field(50, validation_alias="CACHE_WARM_PAGE_SIZE")
+    cache_warm_top_ids: int = Field(1000, validation_alias="CACHE_WARM_TOP_IDS")
+    cache_warm_concurrency: int = Field(4, validation_alias="CACHE_WARM_CONCURRENCY")
+    cache_warm_delay: float = Field(1, validation_alias="CACHE_WARM_DELAY_IN_SECONDS")
+    # Upper bound of a warm up, the lock of a worker dying while warming expires after it
+    cache_warm_lock_expire_time: int = Field(300, validation_alias="CACHE_WARM_LOCK_EXPIRE_TIME_IN_SECONDS")
+    in_memory_catalog_enabled: bool = Field(True, validation_alias="IN_MEMORY_CATALOG_ENABLED")
+    in_memory_catalog_refresh_interval: float = Field(
+        300, validation_alias="IN_MEMORY_CATALOG_REFRESH_INTERVAL_IN_SECONDS"
+    )
+    in_memory_catalog_retry_delay: float = Field(5, validation_alias="IN_MEMORY_CATALOG_RETRY_DELAY_IN_SECONDS")
+    in_memory_catalog_max_documents: int = Field(10000, validation_alias="IN_MEMORY_CATALOG_MAX_DOCUMENTS")
+    in_memory_catalog_batch_size: int = Field(1000, validation_alias="IN_MEMORY_CATALOG_BATCH_SIZE")
+    popularity_log_enabled: bool = Field(True, validation_alias="POPULARITY_LOG_ENABLED")
+    popularity_flush_interval: float = Field(10, validation_alias="POPULARITY_FLUSH_INTERVAL_IN_SECONDS")
+    popularity_log_max_size: int = Field(10000, validation_alias="POPULARITY_LOG_MAX_SIZE")
+    popularity_bucket_interval: float = Field(3600, validation_alias="POPULARITY_BUCKET_INTERVAL_IN_SECONDS")
+    popularity_bucket_count: int = Field(24, validation_alias="POPULARITY_BUCKET_COUNT")
+
+    cache_lock_enabled: bool = Field(False, validation_alias="CACHE_LOCK_ENABLED")
+    cache_lock_expire_time: int = Field(5, validation_alias="CACHE_LOCK_EXPIRE_TIME_IN_SECONDS")
+    cache_lock_wait_time: float = Field(2, validation_alias="CACHE_LOCK_WAIT_TIME_IN_SECONDS")
+    cache_lock_poll_interval: float = Field(0.05, validation_alias="CACHE_LOCK_POLL_INTERVAL_IN_SECONDS")
+
+    circuit_failure_threshold: int = Field(5, validation_alias="CIRCUIT_FAILURE_THRESHOLD")
+    circuit_recovery_time: float = Field(5, validation_alias="CIRCUIT_RECOVERY_TIME_IN_SECONDS")
+    request_retry_budget: int = Field(3, validation_alias="REQUEST_RETRY_BUDGET")
+    backend_max_retries: int = Field(3, validation_alias="BACKEND_MAX_RETRIES")
+    backend_retry_wait: float = Field(0.05, validation_alias="BACKEND_RETRY_WAIT_IN_SECONDS")
+    backend_retry_max_wait: float = Field(0.5, validation_alias="BACKEND_RETRY_MAX_WAIT_IN_SECONDS")
+
+    metrics_enabled: bool = Field(True, validation_alias="METRICS_ENABLED")
+    admin_token: str | None = Field(None, validation_alias="ADMIN_TOKEN")
+    profiling_token: str | None = Field(None, validation_alias="PROFILING_TOKEN")
+    profiling_sample_rate: float = Field(0, validation_alias="PROFILING_SAMPLE_RATE")
+    profiling_slow_threshold: float = Field(0.5, validation_alias="PROFILING_SLOW_THRESHOLD_IN_SECONDS")
+    profiling_slow_log_size: int = Field(100, validation_alias="PROFILING_SLOW_LOG_SIZE")
+
+    redis_host: str = Field("127.0.0.1", validation_alias="REDIS_HOST")
+    redis_port: int = Field(6379, validation_alias="REDIS_PORT")
+    redis_max_connections: int = Field(100, validation_alias="REDIS_MAX_CONNECTIONS")
+    redis_pool_timeout: float = Field(5, validation_alias="REDIS_POOL_TIMEOUT_IN_SECONDS")
+    redis_socket_timeout: float = Field(5, validation_alias="REDIS_SOCKET_TIMEOUT_IN_SECONDS")
+    redis_socket_connect_timeout: float = Field(2, validation_alias="REDIS_SOCKET_CONNECT_TIMEOUT_IN_SECONDS")
+    redis_socket_keepalive: bool = Field(True, validation_alias="REDIS_SOCKET_KEEPALIVE")
+    redis_health_check_interval: int = Field(30, validation_alias="REDIS_HEALTH_CHECK_INTERVAL_IN_SECONDS")
+    redis_warm_connections: int = Field(10, validation_alias="REDIS_WARM_CONNECTIONS")
+
+    search_max_result_window: int = Field(10000, validation_alias="SEARCH_MAX_RESULT_WINDOW")
+    search_cursor_use_pit: bool = Field(False, validation_alias="SEARCH_CURSOR_USE_PIT")
+    search_cursor_keep_alive: str = Field("1m", validation_alias="SEARCH_CURSOR_KEEP_ALIVE")
+    search_batching_enabled: bool = Field(False, validation_alias="SEARCH_BATCHING_ENABLED")
+    search_batch_window: float = Field(0.002, validation_alias="SEARCH_BATCH_WINDOW_IN_SECONDS")
+    search_batch_max_size: int = Field(32, validation_alias="SEARCH_BATCH_MAX_SIZE")
+    get_batching_enabled: bool = Field(True, validation_alias="GET_BATCHING_ENABLED")
+    get_batch_max_size: int = Field(100, validation_alias="GET_BATCH_MAX_SIZE")
+
+    elastic_host: str = Field("127.0.0.1", validation_alias="ELASTIC_HOST")
+    elastic_port: int = Field(9200, validation_alias="ELASTIC_PORT")
+    elastic_schema: str = Field("http", validation_alias="ELASTIC_SCHEME")
+    elastic_connections_per_node: int = Field(25, validation_alias="ELASTIC_CONNECTIONS_PER_NODE")
+    elastic_request_timeout: float = Field(10, validation_alias="ELASTIC_REQUEST_TIMEOUT_IN_SECONDS")
+    elastic_http_compress: bool = Field(False, validation_alias="ELASTIC_HTTP_COMPRESS")
+    elastic_warm_connections: int = Field(10, validation_alias="ELASTIC_WARM_CONNECTIONS")
 
     @property
     def elastic_url(
@@ -0,0 +1,108 @@
+import os
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# Buckets cover sub-millisecond cache hits as well as slow searches
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = tuple(2**power for power in range(6, 24, 2))
+
+REQUEST_LATENCY = Histogram(
+    "movies_api_request_duration_seconds",
+    "Time spent handling HTTP requests.",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUEST_LAYER_LATENCY = Histogram(
+    "movies_api_request_layer_duration_seconds",
+    "Time spent by HTTP requests in every layer: Redis, Elasticsearch and the application itself.",
+    ["route", "layer"],
+    buckets=LATENCY_BUCKETS,
+)
+RESPONSE_SIZE = Histogram(
+    "movies_api_response_size_bytes",
+    "Size of HTTP response bodies.",
+    ["route"],
+    buckets=SIZE_BUCKETS,
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "movies_api_requests_in_flight",
+    "Number of HTTP requests being handled.",
+    multiprocess_mode="livesum",
+)
+
+CACHE_REQUESTS = Counter(
+    "movies_api_cache_requests_total",
+    "Keys looked up in the cache by key prefix and result: hit, miss or error.",
+    ["prefix", "result"],
+)
+CACHE_PAYLOAD_SIZE = Histogram(
+    "movies_api_cache_payload_size_bytes",
+    "Size of values read from and written to the cache.",
+    ["prefix", "operation"],
+    buckets=SIZE_BUCKETS,
+)
+BACKEND_LATENCY = Histogram(
+    "movies_api_backend_call_duration_seconds",
+    "Time spent in calls to Redis and Elasticsearch.",
+    ["backend", "operation"],
+    buckets=LATENCY_BUCKETS,
+)
+BACKEND_ERRORS = Counter(
+    "movies_api_backend_call_errors_total",
+    "Failed calls to Redis and Elasticsearch.",
+    ["backend", "operation"],
+)
+
+# Time spent in every backend while handling the current request
+_layer_time: ContextVar[Optional[Dict[str, float]]] = ContextVar("layer_time", default=None)
+
+
+def start_request_timing() -> Tuple[Dict[str, float], object]:
+    layer_time: Dict[str, float] = {}
+    return layer_time, _layer_time.set(layer_time)
+
+
+def stop_request_timing(token) -> None:
+    _layer_time.reset(token)
+
+
+def observe_backend_call(backend: str, operation: str, started_at: float, failed: bool = False) -> None:
+    elapsed = time.perf_counter() - started_at
+    BACKEND_LATENCY.labels(backend, operation).observe(elapsed)
+    if failed:
+        BACKEND_ERRORS.labels(backend, operation).inc()
+    layer_time = _layer_time.get()
+    if layer_time is not None:
+        layer_time[backend] = layer_time.get(backend, 0) + elapsed
+
+
+def generate_metrics() -> Tuple[bytes, str]:
+    """
+    Returns the metrics in the Prometheus text format and their content type.
+
+    When PROMETHEUS_MULTIPROC_DIR is set every worker writes its metrics to that directory,
+    and the metrics of all the workers are aggregated, whichever worker serves the scrape.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_worker_dead() -> None:
+    """Drops the live gauges of the current worker, so they are not aggregated after it exits."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(os.getpid())
@@ -0,0 +1,179 @@
+import asyncio
+import functools
+import inspect
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Deque, Dict, List, Optional
+
+from core.config import settings
+
+
+@dataclass
+class Span:
+    """
+    Time spent in one step of the request, summed over all its occurrences.
+
+    Spans are not exclusive: the span of a cache read includes the deserialization
+    of the value it returns. CPU time of a span awaiting a backend includes the work
+    done meanwhile for the other requests handled by the worker.
+    """
+
+    name: str
+    count: int = 0
+    wall: float = 0
+    cpu: float = 0
+
+
+@dataclass
+class RequestProfile:
+    method: str
+    path: str
+    query: str
+    started_at: float = field(default_factory=time.time)
+    status: Optional[int] = None
+    wall: float = 0
+    cpu: float = 0
+    # Delay before the event loop ran a callback scheduled when the request came in
+    event_loop_lag: Optional[float] = None
+    spans: Dict[str, Span] = field(default_factory=dict)
+    values: Dict[str, float] = field(default_factory=dict)
+    finished: bool = False
+
+    def add_span(self, name: str, wall: float, cpu: float) -> None:
+        # Background tasks started by the request inherit its profile and may outlive it
+        if self.finished:
+            return
+        span = self.spans.get(name)
+        if span is None:
+            span = self.spans[name] = Span(name)
+        span.count += 1
+        span.wall += wall
+        span.cpu += cpu
+
+    def add_value(self, name: str, value: float) -> None:
+        if not self.finished:
+            self.values[name] = self.values.get(name, 0) + value
+
+    def server_timing(self) -> str:
+        """Returns the spans in the format of the Server-Timing header, durations in milliseconds."""
+        metrics = [f"{span.name};dur={span.wall * 1000:.2f}" for span in self.spans.values()]
+        return ", ".join([*metrics, f"total;dur={self.wall * 1000:.2f}", f"cpu;dur={self.cpu * 1000:.2f}"])
+
+    def to_dict(self) -> dict:
+        profile = asdict(self)
+        profile["spans"] = sorted(profile["spans"].values(), key=lambda span: span["wall"], reverse=True)
+        del profile["finished"]
+        return profile
+
+
+class SlowRequestLog:
+    """Ring buffer keeping the profiles of the most recent slow requests."""
+
+    def __init__(self, threshold: float, max_size: int):
+        self.threshold = threshold
+        self._profiles: Deque[RequestProfile] = deque(maxlen=max_size)
+
+    def add(self, profile: RequestProfile) -> None:
+        if profile.wall >= self.threshold:
+            self._profiles.append(profile)
+
+    def get_all(self) -> List[RequestProfile]:
+        """Returns the profiles, the most recent first."""
+        return list(reversed(self._profiles))
+
+
+_profile: ContextVar[Optional[RequestProfile]] = ContextVar("profile", default=None)
+
+
+class RequestProfiler:
+    """Profiles the request handled in the current context."""
+
+    def __init__(self, method: str, path: str, query: str):
+        self.profile = RequestProfile(method=method, path=path, query=query)
+        self._token = None
+        self._wall_started = 0.0
+        self._cpu_started = 0.0
+
+    def __enter__(self) -> RequestProfile:
+        self._token = _profile.set(self.profile)
+        self._wall_started = time.perf_counter()
+        self._cpu_started = time.thread_time()
+        asyncio.get_running_loop().call_soon(self._record_event_loop_lag, self._wall_started)
+        return self.profile
+
+    def __exit__(self, *exc_info) -> None:
+        self.finish()
+        _profile.reset(self._token)
+
+    def finish(self) -> None:
+        """Ends the profile before the context is left, e.g. once the response starts."""
+        if self.profile.finished:
+            return
+        self.profile.wall = time.perf_counter() - self._wall_started
+        self.profile.cpu = time.thread_time() - self._cpu_started
+        self.profile.finished = True
+
+    def _record_event_loop_lag(self, scheduled_at: float) -> None:
+        self.profile.event_loop_lag = time.perf_counter() - scheduled_at
+
+
+@contextmanager
+def span(name: str):
+    profile = _profile.get()
+    if profile is None:
+        yield
+        return
+    wall_started, cpu_started = time.perf_counter(), time.thread_time()
+    try:
+        yield
+    finally:
+        profile.add_span(name, time.perf_counter() - wall_started, time.thread_time() - cpu_started)
+
+
+def add_value(name: str, value: float) -> None:
+    """Adds the value reported by a backend, such as the time a search took, to the current profile."""
+    profile = _profile.get()
+    if profile is not None:
+        profile.add_value(name, value)
+
+
+def profiled(name: str, func: Callable) -> Callable:
+    """Wraps a synchronous function, so its calls are recorded as spans of the profiled requests."""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _profile.get() is None:
+            return func(*args, **kwargs)
+        with span(name):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def profile_public_methods(prefix: str):
+    """Decorate all public coroutine methods of a class, so their calls are recorded as spans of profiled requests."""
+
+    def decorator(cls):
+        for attr_name, attr_value in list(cls.__dict__.items()):
+            if inspect.iscoroutinefunction(attr_value) and not attr_name.startswith("_"):
+                setattr(cls, attr_name, _profile_coroutine(f"{prefix}.{attr_name}", attr_value))
+        return cls
+
+    return decorator
+
+
+def _profile_coroutine(name: str, method):
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        if _profile.get() is None:
+            return await method(*args, **kwargs)
+        with span(name):
+            return await method(*args, **kwargs)
+
+    return wrapper
+
+
+slow_requests = SlowRequestLog(threshold=settings.profiling_slow_threshold, max_size=settings.profiling_slow_log_size)
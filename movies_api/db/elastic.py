@@ -1,8 +1,56 @@
+import asyncio
+import logging
+
+from core.config import settings
+from elasticsearch import AsyncElasticsearch
 from search_engine.search_engine_protocol import SearchEngineProtocol
 
+logger = logging.getLogger(__name__)
+
 es: SearchEngineProtocol | None = None
 
 
 # Функция понадобится при внедрении зависимостей
 async def get_elastic() -> SearchEngineProtocol:
     return es
+
+
+def create_elastic() -> AsyncElasticsearch:
+    return AsyncElasticsearch(
+        hosts=[settings.elastic_url],
+        connections_per_node=settings.elastic_connections_per_node,
+        request_timeout=settings.elastic_request_timeout,
+        # Failed requests are retried by the circuit breaker within the retry budget of the request
+        max_retries=0,
+        retry_on_timeout=False,
+        http_compress=settings.elastic_http_compress,
+    )
+
+
+async def warm_up_elastic(client: AsyncElasticsearch, connections: int) -> None:
+    """Opens the connections in advance by sending concurrent pings, so the first requests do not wait for them."""
+    pings = await asyncio.gather(
+        *[client.ping() for _ in range(min(connections, settings.elastic_connections_per_node))]
+    )
+    if not all(pings):
+        logger.warning("Elasticsearch did not answer %s of %s pings", pings.count(False), len(pings))
+
+
+def get_elastic_pool_stats(client: AsyncElasticsearch) -> list:
+    transport = getattr(client, "transport", None)
+    if transport is None:
+        return []
+    stats = []
+    for node in transport.node_pool.all():
+        session = getattr(node, "session", None)
+        connector = session.connector if session is not None else None
+        idle = sum(len(connections) for connections in getattr(connector, "_conns", {}).values())
+        stats.append(
+            {
+                "node": str(node.config.host),
+                "max_connections": settings.elastic_connections_per_node,
+                "in_use": len(getattr(connector, "_acquired", ())),
+                "idle": idle,
+            }
+        )
+    return stats
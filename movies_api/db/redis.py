@@ -1,4 +1,11 @@
+import asyncio
+import logging
+
 from cache_storage.cache_storage_protocol import CacheStorageProtocol
+from core.config import settings
+from redis.asyncio import BlockingConnectionPool, Redis
+
+logger = logging.getLogger(__name__)
 
 redis: CacheStorageProtocol | None = None
 
@@ -6,3 +13,52 @@ redis: CacheStorageProtocol | None = None
 # Функция понадобится при внедрении зависимостей
 async def get_redis() -> CacheStorageProtocol:
     return redis
+
+
+def create_redis() -> Redis:
+    """Creates the client, requests wait for a free connection once the pool limit is reached."""
+    pool = BlockingConnectionPool(
+        host=settings.redis_host,
+        port=settings.redis_port,
+        max_connections=settings.redis_max_connections,
+        timeout=settings.redis_pool_timeout,
+        socket_timeout=settings.redis_socket_timeout,
+        socket_connect_timeout=settings.redis_socket_connect_timeout,
+        socket_keepalive=settings.redis_socket_keepalive,
+        # Failed commands are retried by the circuit breaker within the retry budget of the request
+        retry_on_timeout=False,
+        health_check_interval=settings.redis_health_check_interval,
+    )
+    return Redis(connection_pool=pool)
+
+
+async def warm_up_redis(client: Redis, connections: int) -> None:
+    """Opens the connections in advance, so the first requests do not wait for them."""
+    pool = client.connection_pool
+    acquired = await asyncio.gather(
+        *[pool.get_connection("PING") for _ in range(min(connections, pool.max_connections))],
+        return_exceptions=True,
+    )
+    errors = [connection for connection in acquired if isinstance(connection, Exception)]
+    for connection in acquired:
+        if not isinstance(connection, Exception):
+            await pool.release(connection)
+    if errors:
+        logger.warning(
+            "Failed to open %s of %s Redis connections in advance: %s", len(errors), len(acquired), errors[0]
+        )
+
+
+def get_redis_pool_stats(client: Redis) -> dict | None:
+    """Returns the utilization of the connection pool, None when the client has no pool, as the fakes of benchmarks."""
+    pool = getattr(client, "connection_pool", None)
+    if pool is None:
+        return None
+    created = len(getattr(pool, "_connections", []))
+    idle = sum(1 for connection in getattr(pool, "pool", asyncio.Queue())._queue if connection is not None)
+    return {
+        "max_connections": pool.max_connections,
+        "created": created,
+        "in_use": created - idle,
+        "idle": idle,
+    }
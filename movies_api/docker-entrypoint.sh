@@ -16,4 +16,7 @@ wait_for_service() {
 wait_for_service elasticsearch 9200
 wait_for_service redis 6379
 
+# Metrics of the workers of the previous run must not be aggregated with the new ones
+rm -rf "$PROMETHEUS_MULTIPROC_DIR" && mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
 uvicorn main:app --host 0.0.0.0 --port 8000 --workers $UVICORN_WORKERS_NUM
\ No newline at end of file
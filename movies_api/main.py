@@ -1,10 +1,23 @@
-from api.v1 import films, genres, persons
+import asyncio
+from http import HTTPStatus
+
+from api import metrics
+from api.middleware import RequestMiddleware
+from api.v1 import admin, films, genres, persons
+from api.v1.responses import ProfiledORJSONResponse
+from backoff.circuit_breaker import BackendUnavailableError
+from cache_storage.instrumented import InstrumentedCacheStorage
+from core import metrics as app_metrics
 from core.config import settings
 from db import elastic, redis
-from elasticsearch import AsyncElasticsearch
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.responses import ORJSONResponse
-from redis.asyncio import Redis
+from models.sort import MoviesSortOptions
+from search_engine.instrumented import InstrumentedSearchEngine
+from services import cache_invalidation, cache_warming, in_memory_catalog
+from services.film import get_film_service
+from services.genre import get_genre_repository, get_genre_service
+from services.person import get_person_service
 
 app = FastAPI(
     title=f"Read-only API for {settings.project_name}",
@@ -12,23 +25,81 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/api/openapi",
     openapi_url="/api/openapi.json",
-    default_response_class=ORJSONResponse,
+    default_response_class=ProfiledORJSONResponse,
 )
 
+app.add_middleware(RequestMiddleware)
+
+
+@app.exception_handler(BackendUnavailableError)
+async def backend_unavailable_handler(request: Request, error: BackendUnavailableError) -> ORJSONResponse:
+    return ORJSONResponse(
+        status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+        content={"detail": str(error)},
+        headers={"Retry-After": str(max(1, round(error.retry_after)))},
+    )
+
 
 @app.on_event("startup")
 async def startup():
-    redis.redis = Redis(
-        host=settings.redis_host,
-        port=settings.redis_port,
+    redis_client = redis.create_redis()
+    elastic_client = elastic.create_elastic()
+    await asyncio.gather(
+        redis.warm_up_redis(redis_client, settings.redis_warm_connections),
+        elastic.warm_up_elastic(elastic_client, settings.elastic_warm_connections),
     )
-    elastic.es = AsyncElasticsearch(hosts=[settings.elastic_url])
+    if settings.metrics_enabled:
+        redis.redis = InstrumentedCacheStorage(redis_client)
+        elastic.es = InstrumentedSearchEngine(elastic_client)
+    else:
+        redis.redis = redis_client
+        elastic.es = elastic_client
+
+    # Keyword arguments hit the same lru_cache entries as the ones resolved by Depends
+    services = {
+        "movies": get_film_service(redis=redis.redis, elastic=elastic.es),
+        "genres": get_genre_service(redis=redis.redis, elastic=elastic.es),
+        "persons": get_person_service(redis=redis.redis, elastic=elastic.es),
+    }
+    genre_repository = get_genre_repository(redis=redis.redis, elastic=elastic.es)
+    if isinstance(genre_repository, in_memory_catalog.InMemoryCatalog):
+        in_memory_catalog.catalogs["genres"] = genre_repository
+        genre_repository.start()
+    if settings.cache_warm_enabled:
+        cache_warming.warmer = cache_warming.CacheWarmer(
+            services=services,
+            sorts={"movies": [None, *MoviesSortOptions]},
+            full_lists={"genres"},
+            pages=settings.cache_warm_pages,
+            page_size=settings.cache_warm_page_size,
+            top_ids=settings.cache_warm_top_ids,
+            concurrency=settings.cache_warm_concurrency,
+            delay=settings.cache_warm_delay,
+        )
+        cache_warming.warmer.schedule()
+
+    if settings.cache_invalidation_enabled:
+        cache_invalidation.listener = cache_invalidation.CacheInvalidationListener(
+            cache_storage=redis.redis,
+            channel=settings.cache_invalidation_channel,
+            # Catalogs invalidate the cache of their service too
+            services={**services, **in_memory_catalog.catalogs},
+            warmer=cache_warming.warmer,
+        )
+        cache_invalidation.listener.start()
 
 
 @app.on_event("shutdown")
 async def shutdown():
-    await redis.redis.close()
+    if cache_invalidation.listener is not None:
+        await cache_invalidation.listener.stop()
+    if cache_warming.warmer is not None:
+        await cache_warming.warmer.stop()
+    for catalog in in_memory_catalog.catalogs.values():
+        await catalog.stop()
+    await redis.redis.close(close_connection_pool=True)
     await elastic.es.close()
+    app_metrics.mark_worker_dead()
 
 
 # Подключаем роутер к серверу, указав префикс /v1/films
@@ -44,3 +115,9 @@ app.include_router(
     persons.router,
     prefix="/api/v1/persons",
 )
+app.include_router(
+    admin.router,
+    prefix="/api/v1/admin",
+)
+if settings.metrics_enabled:
+    app.include_router(metrics.router)
@@ -6,10 +6,31 @@ class PersonFilms(BaseModel):
     Attributes:
         - id (str):
         - roles (List[str | None]):
+        - title (Optional[str]): The title of the film (if indexed with the person).
+        - imdb_rating (Optional[float]): The rating of the film (if available).
     """
 
     id: str
     roles: list[str | None] = []
+    title: str | None = None
+    imdb_rating: float | None = None
+
+
+class PersonFilm(BaseModel):
+    """
+    Represents a film in the filmography of a person.
+
+    Attributes:
+    - id (str): Unique identifier of the film.
+    - title (str): The title of the film.
+    - imdb_rating (Optional[float]): The rating of the film (if available).
+    - roles (List[str]): Roles of the person in the film.
+    """
+
+    id: str
+    title: str
+    imdb_rating: float | None
+    roles: list[str | None] = []
 
 
 class MoviePerson(BaseModel):
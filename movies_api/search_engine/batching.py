@@ -0,0 +1,134 @@
+import asyncio
+import dataclasses
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Generic, List, Optional, Set, Tuple, TypeVar
+
+from elasticsearch import ApiError, NotFoundError
+from elasticsearch.exceptions import HTTP_EXCEPTIONS
+
+from .search_engine_protocol import SearchEngineProtocol
+
+R = TypeVar("R")
+
+
+@dataclasses.dataclass
+class _Batch:
+    requests: List[Tuple[Any, asyncio.Future]] = dataclasses.field(default_factory=list)
+    flush_handle: asyncio.TimerHandle | asyncio.Handle | None = None
+
+
+class MicroBatcher(ABC, Generic[R]):
+    """
+    Collects the requests issued within a short window and sends them to the search engine at once.
+
+    A batch is sent as soon as it holds `max_size` requests or once `window` seconds have passed
+    since its first request, a zero window sends the requests issued within the same loop iteration.
+    Every event loop collects its own batches.
+    """
+
+    def __init__(self, search_engine: SearchEngineProtocol, window: float, max_size: int):
+        self.search_engine = search_engine
+        self.window = window
+        self.max_size = max_size
+        self._batches: Dict[asyncio.AbstractEventLoop, _Batch] = {}
+        self._dispatches: Set[asyncio.Task] = set()
+
+    async def _submit(self, request) -> R:
+        loop = asyncio.get_running_loop()
+        batch = self._batches.setdefault(loop, _Batch())
+        future = loop.create_future()
+        batch.requests.append((request, future))
+        if len(batch.requests) >= self.max_size:
+            self._flush(loop)
+        elif batch.flush_handle is None:
+            if self.window:
+                batch.flush_handle = loop.call_later(self.window, self._flush, loop)
+            else:
+                batch.flush_handle = loop.call_soon(self._flush, loop)
+        return await future
+
+    def _flush(self, loop: asyncio.AbstractEventLoop) -> None:
+        batch = self._batches.pop(loop, None)
+        if batch is None:
+            return
+        if batch.flush_handle is not None:
+            batch.flush_handle.cancel()
+        task = loop.create_task(self._dispatch_batch(batch.requests))
+        self._dispatches.add(task)
+        task.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch_batch(self, requests: List[Tuple[Any, asyncio.Future]]) -> None:
+        try:
+            results = await self._dispatch([request for request, _ in requests])
+        except Exception as error:
+            results = [error] * len(requests)
+        for (_, future), result in zip(requests, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+        for _, future in requests[len(results) :]:
+            if not future.done():
+                future.set_exception(RuntimeError("Search engine returned no result for the batched request"))
+
+    @abstractmethod
+    async def _dispatch(self, requests: List[Any]) -> List[R | Exception]:
+        """Sends the batch, returns a result or an exception for every request in the same order."""
+        raise NotImplementedError
+
+
+class MultiSearchBatcher(MicroBatcher[dict]):
+    """Coalesces concurrent searches into multi search requests."""
+
+    async def search(self, index: Optional[str], body: dict) -> dict:
+        return await self._submit((index, body))
+
+    async def _dispatch(self, requests: List[Tuple[Optional[str], dict]]) -> List[dict | Exception]:
+        searches = []
+        for index, body in requests:
+            # Searches against a point in time must not name the index
+            searches.extend(({"index": index} if index else {}, body))
+        response = await self.search_engine.msearch(searches=searches)
+        return [_get_item_error(response, item) if "error" in item else item for item in response["responses"]]
+
+
+class MultiGetBatcher(MicroBatcher[Optional[dict]]):
+    """Resolves concurrent lookups by id with one multi get request per index, fetching repeated ids once."""
+
+    async def get(self, index: str, id: str) -> Optional[dict]:
+        """Returns the document, None when it is not found."""
+        return await self._submit((index, id))
+
+    async def _dispatch(self, requests: List[Tuple[str, str]]) -> List[Optional[dict] | Exception]:
+        ids_by_index: Dict[str, Dict[str, None]] = {}
+        for index, document_id in requests:
+            ids_by_index.setdefault(index, {})[document_id] = None
+        responses = await asyncio.gather(
+            *[self._get_many(index, list(ids)) for index, ids in ids_by_index.items()], return_exceptions=True
+        )
+        documents_by_index = dict(zip(ids_by_index, responses))
+        results = []
+        for index, document_id in requests:
+            documents = documents_by_index[index]
+            results.append(documents if isinstance(documents, Exception) else documents.get(document_id))
+        return results
+
+    async def _get_many(self, index: str, ids: List[str]) -> Dict[str, dict]:
+        try:
+            response = await self.search_engine.mget(index=index, ids=ids)
+        except NotFoundError:
+            return {}
+        return {document["_id"]: document for document in response["docs"] if document.get("found")}
+
+
+def _get_item_error(response, item: dict) -> ApiError:
+    """Builds the exception the search engine client raises for the failed item when it is sent alone."""
+    meta = getattr(response, "meta", None)
+    status = item.get("status")
+    if meta is not None and status is not None:
+        meta = dataclasses.replace(meta, status=status)
+    error = item["error"]
+    message = error.get("type", str(error)) if isinstance(error, dict) else str(error)
+    return HTTP_EXCEPTIONS.get(status, ApiError)(message=message, meta=meta, body=item)
@@ -0,0 +1,55 @@
+import time
+from typing import Any
+
+from core.metrics import observe_backend_call
+from elasticsearch import NotFoundError
+
+from .search_engine_protocol import SearchEngineProtocol
+
+BACKEND = "elasticsearch"
+
+
+class InstrumentedSearchEngine:
+    """
+    Records the latency and the errors of the calls to the search engine.
+
+    Documents that are not found are not counted as errors. Attributes not related
+    to the calls, such as the transport, are taken from the search engine.
+    """
+
+    def __init__(self, search_engine: SearchEngineProtocol):
+        self.search_engine = search_engine
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.search_engine, name)
+
+    async def get(self, **kwargs):
+        return await self._call("get", **kwargs)
+
+    async def mget(self, **kwargs):
+        return await self._call("mget", **kwargs)
+
+    async def search(self, **kwargs):
+        return await self._call("search", **kwargs)
+
+    async def msearch(self, **kwargs):
+        return await self._call("msearch", **kwargs)
+
+    async def open_point_in_time(self, **kwargs):
+        return await self._call("open_point_in_time", **kwargs)
+
+    async def close_point_in_time(self, **kwargs):
+        return await self._call("close_point_in_time", **kwargs)
+
+    async def _call(self, operation: str, **kwargs):
+        started_at = time.perf_counter()
+        try:
+            result = await getattr(self.search_engine, operation)(**kwargs)
+        except NotFoundError:
+            observe_backend_call(BACKEND, operation, started_at)
+            raise
+        except Exception:
+            observe_backend_call(BACKEND, operation, started_at, failed=True)
+            raise
+        observe_backend_call(BACKEND, operation, started_at)
+        return result
@@ -0,0 +1,86 @@
+import asyncio
+import logging
+from typing import Dict
+
+import orjson
+from cache_storage.cache_storage_protocol import CacheStorageProtocol
+
+from .cache_warming import CacheWarmer
+from .searchable_model_service import SearchableModelService
+
+logger = logging.getLogger(__name__)
+
+
+class CacheInvalidationListener:
+    """
+    Evicts cached copies of the documents reindexed by the ETL.
+
+    The ETL publishes the index name, the ids of the changed documents and the new
+    generation of the index lists to a Redis channel after every loaded batch. When
+    a warmer is given, the caches of the changed index are warmed up again.
+    """
+
+    def __init__(
+        self,
+        cache_storage: CacheStorageProtocol,
+        channel: str,
+        services: Dict[str, SearchableModelService],
+        reconnect_delay: float = 1,
+        warmer: CacheWarmer | None = None,
+    ):
+        self.cache_storage = cache_storage
+        self.channel = channel
+        self.services = services
+        self.reconnect_delay = reconnect_delay
+        self.warmer = warmer
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._listen_forever())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def handle_changes(self, message: bytes | str) -> None:
+        changes = orjson.loads(message)
+        service = self.services.get(changes["index"])
+        if service is None:
+            return
+        await service.invalidate(changes["ids"], changes.get("generation"))
+        if self.warmer is not None:
+            self.warmer.schedule(changes["index"])
+
+    async def _listen_forever(self) -> None:
+        while True:
+            try:
+                await self._listen()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Cache invalidation listener failed, reconnecting")
+                await asyncio.sleep(self.reconnect_delay)
+
+    async def _listen(self) -> None:
+        pubsub = self.cache_storage.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(self.channel)
+            # Changes published while the listener was not subscribed are lost, lists are reloaded at least
+            for service in self.services.values():
+                await service.invalidate([])
+            async for message in pubsub.listen():
+                try:
+                    await self.handle_changes(message["data"])
+                except (orjson.JSONDecodeError, KeyError, TypeError):
+                    logger.error("Malformed cache invalidation message: %s", message["data"])
+        finally:
+            await pubsub.close()
+
+
+listener: CacheInvalidationListener | None = None
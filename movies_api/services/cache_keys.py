@@ -0,0 +1,81 @@
+import hashlib
+import re
+import unicodedata
+from typing import Tuple
+
+WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_search(search: str | None) -> str | None:
+    """
+    Returns the canonical form of the search text, used only to build cache keys.
+
+    Texts differing only by case, spacing or unicode representation of the same
+    characters are cached as the same text. The search engine gets the text as
+    typed, since case matters to the keyword fields it is matched against.
+    """
+    if search is None:
+        return None
+    normalized = WHITESPACE.sub(" ", unicodedata.normalize("NFKC", search).casefold()).strip()
+    return normalized or None
+
+
+class CacheKeyBuilder:
+    """
+    Builds the keys of the cache entries of one index.
+
+    Keys start with the schema version, so a new key format can be rolled out
+    without flushing the cache: entries in the previous format simply expire.
+    Keys longer than `max_length` have their variable part replaced by its hash.
+    Search texts are normalized, so their variants share the same entries.
+    """
+
+    def __init__(self, prefix_plural: str, prefix_single: str, schema_version: int, max_length: int):
+        self.prefix_plural = prefix_plural
+        self.prefix_single = prefix_single
+        self.schema_version = schema_version
+        self.max_length = max_length
+
+    def instance(self, instance_id: str) -> str:
+        return self._build(self.prefix_single, instance_id)
+
+    def list(
+        self,
+        generation: int,
+        page_size: int,
+        page_number: int,
+        search: str | None = None,
+        sort: str | None = None,
+        fields: Tuple[str, ...] | None = None,
+    ) -> str:
+        body = f"{normalize_search(search) or ''}_{sort or ''}_{page_size}_{page_number}"
+        if fields:
+            body = f"{body}_{','.join(fields)}"
+        return self._build(f"{self.prefix_plural}_{generation}", body)
+
+    def id_page(
+        self, generation: int, page_size: int, page_number: int, search: str | None = None, sort: str | None = None
+    ) -> str:
+        body = f"{normalize_search(search) or ''}_{sort or ''}_{page_size}_{page_number}"
+        return self._build(f"{self.prefix_plural}_{generation}_ids", body)
+
+    def relation(self, instance_id: str, relation: str) -> str:
+        return self._build(f"{self.prefix_single}_{relation}", instance_id)
+
+    def lock(self, name: str) -> str:
+        return self._build(f"{self.prefix_plural}_lock", name)
+
+    def popularity(self) -> str:
+        # Counts of requests survive key format changes, as they are stored by document ids
+        return f"{self.prefix_plural}_popularity"
+
+    def generation(self) -> str:
+        # Shared with the ETL, which switches the generation after every loaded batch
+        return f"{self.prefix_plural}_generation"
+
+    def _build(self, prefix: str, body: str) -> str:
+        key = f"v{self.schema_version}:{prefix}_{body}"
+        if len(key) <= self.max_length:
+            return key
+        digest = hashlib.blake2b(body.encode(), digest_size=16).hexdigest()
+        return f"v{self.schema_version}:{prefix}_#{digest}"
@@ -0,0 +1,119 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+from core.config import settings
+
+from .searchable_model_service import SearchableModelService
+
+logger = logging.getLogger(__name__)
+
+
+class CacheWarmer:
+    """
+    Loads the most requested documents and pages into the cache before they are requested.
+
+    For every index it loads the first `pages` pages for each of its `sorts`, every page of
+    the indexes in `full_lists` and the `top_ids` most requested documents according to
+    the popularity log of the service. Pages and chunks of documents are loaded by at most
+    `concurrency` requests at a time, so warming does not starve live traffic. Loads are
+    not counted as requests, so they do not make the loaded entries look popular.
+
+    Only one worker warms an index at a time: the other workers skip it, as the entries
+    loaded by that worker are read from the shared cache.
+    """
+
+    def __init__(
+        self,
+        services: Dict[str, SearchableModelService],
+        sorts: Dict[str, List[Optional[str]]],
+        full_lists: Set[str],
+        pages: int,
+        page_size: int,
+        top_ids: int,
+        concurrency: int,
+        delay: float,
+    ):
+        self.services = services
+        self.sorts = sorts
+        self.full_lists = full_lists
+        self.pages = pages
+        self.page_size = page_size
+        self.top_ids = top_ids
+        self.delay = delay
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._pending: Set[str] = set()
+        self._task: asyncio.Task | None = None
+
+    def schedule(self, *indexes: str) -> None:
+        """
+        Warms the indexes, every index by default, once `delay` is over.
+
+        Indexes scheduled while waiting are warmed together, so the batches the ETL loads
+        one after another trigger a single warm up.
+        """
+        self._pending.update(indexes or self.services)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._warm_up_pending())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def warm_up(self, index: str) -> None:
+        service = self.services[index]
+        token = await service.cache.acquire_lock("warm_up", settings.cache_warm_lock_expire_time)
+        if token is None:
+            return
+        try:
+            loads = [self._load_top_ids(service)]
+            if index in self.full_lists:
+                loads.append(self._load_all_pages(service))
+            for sort in self.sorts.get(index, []):
+                loads.extend(self._load_page(service, page_number, sort) for page_number in range(1, self.pages + 1))
+            await asyncio.gather(*loads)
+        finally:
+            await service.cache.release_lock("warm_up", token)
+
+    async def _warm_up_pending(self) -> None:
+        while self._pending:
+            await asyncio.sleep(self.delay)
+            indexes, self._pending = self._pending, set()
+            for index in indexes:
+                try:
+                    await self.warm_up(index)
+                except Exception:
+                    logger.exception("Failed to warm up the cache of %s", index)
+
+    async def _load_page(self, service: SearchableModelService, page_number: int, sort: str | None = None) -> int:
+        """Loads the page into the cache, returns the number of documents on it."""
+        return await self._limited(
+            lambda: service.preload_page(page_number=page_number, page_size=self.page_size, sort=sort)
+        )
+
+    async def _load_all_pages(self, service: SearchableModelService) -> None:
+        page_number = 1
+        while await self._load_page(service, page_number) == self.page_size:
+            page_number += 1
+            if page_number * self.page_size > settings.search_max_result_window:
+                return
+
+    async def _load_top_ids(self, service: SearchableModelService) -> None:
+        if service.popularity is None or not self.top_ids:
+            return
+        instance_ids = await service.popularity.get_top(self.top_ids)
+        chunks = [instance_ids[start : start + self.page_size] for start in range(0, len(instance_ids), self.page_size)]
+        await asyncio.gather(*[self._limited(lambda chunk=chunk: service.preload(chunk)) for chunk in chunks])
+
+    async def _limited(self, load: Callable[[], Awaitable]):
+        async with self._semaphore:
+            return await load()
+
+
+warmer: CacheWarmer | None = None
@@ -1,13 +1,78 @@
+import asyncio
+import logging
+import random
+import time
+import uuid
 from abc import ABC, abstractmethod
-from typing import Callable, Generic, List, Optional, Type, TypeVar
+from dataclasses import asdict, dataclass
+from typing import Callable, Collection, Generic, List, Optional, Tuple, Type, TypeVar
 
 import orjson
-from backoff.backoff import backoff_public_methods
+from backoff.circuit_breaker import get_circuit_breaker, guard_public_methods
+from cache_storage.bloom_filter import BloomFilter
 from cache_storage.cache_storage_protocol import CacheStorageProtocol
+from cache_storage.codec import (
+    CacheCodec,
+    Compression,
+    Serializer,
+    UnsupportedCodecVersionError,
+)
+from cache_storage.frequency_sketch import FrequencySketch
+from cache_storage.local_cache import LocalCache
 from core.config import settings
+from core.profiling import profile_public_methods, profiled
 from pydantic import BaseModel
+from redis.exceptions import ConnectionError as RedisConnectionError
+from redis.exceptions import TimeoutError as RedisTimeoutError
+
+from .cache_keys import CacheKeyBuilder
 
 T = TypeVar("T", bound=BaseModel)
+V = TypeVar("V")
+
+logger = logging.getLogger(__name__)
+
+# Value cached for the documents that do not exist
+MISSING_JSON = b"null"
+# Deletes the lock only while it still holds the token, in one step so the lock of another worker is never deleted
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+@dataclass
+class CacheEntry(Generic[V]):
+    """
+    Value read from the cache.
+
+    Stale entries are past their soft expiry: they can still be served,
+    but should be refreshed from the search engine.
+    """
+
+    value: V
+    is_stale: bool = False
+
+    @property
+    def is_missing(self) -> bool:
+        """Whether the entry records that the document does not exist."""
+        return self.value is None
+
+
+@dataclass
+class CachedIdPage:
+    """
+    Page of search results stored by ids of the documents.
+
+    Attributes:
+    - ids (List[str]): Ids of the documents of the page in their order.
+    - total (int): Number of documents matching the search.
+    """
+
+    ids: List[str]
+    total: int
 
 
 class AbsractCacheService(ABC, Generic[T]):
@@ -17,14 +82,30 @@ class AbsractCacheService(ABC, Generic[T]):
         prefix_plural: str,
         prefix_single: str,
         deserialize: Callable[[dict | str], T],
+        codec: CacheCodec | None = None,
+        relations: Tuple[str, ...] = (),
     ):
         self.cache_storage = cache_storage
+        # Data built from the documents and other indexes, cached under the documents and dropped together with them
+        self.relations = relations
         self.key_prefix_plural = prefix_plural
         self.key_prefix_single = prefix_single
-        self._deserialize = deserialize
+        self.keys = CacheKeyBuilder(
+            prefix_plural=prefix_plural,
+            prefix_single=prefix_single,
+            schema_version=settings.cache_key_schema_version,
+            max_length=settings.cache_key_max_length,
+        )
+        self._deserialize = profiled("cache.deserialize", deserialize)
+        self.codec = codec or create_cache_codec()
+        self._list_generation: Optional[int] = None
+
+    @abstractmethod
+    async def get_instance_from_cache(self, instance_id: str) -> Optional[CacheEntry[T]]:
+        raise NotImplementedError
 
     @abstractmethod
-    async def get_instance_from_cache(self, instance_id: str) -> Optional[T]:
+    async def get_many_instances_from_cache(self, instance_ids: List[str]) -> List[Optional[CacheEntry[T]]]:
         raise NotImplementedError
 
     @abstractmethod
@@ -34,11 +115,52 @@ class AbsractCacheService(ABC, Generic[T]):
         page_number: int,
         search: str | None = None,
         sort: str | None = None,
-    ) -> List[T]:
+    ) -> Optional[CacheEntry[List[T]]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_raw_instance_from_cache(self, instance_id: str) -> Optional[CacheEntry[bytes]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_raw_list_from_cache(
+        self,
+        page_size: int,
+        page_number: int,
+        search: str | None = None,
+        sort: str | None = None,
+        fields: Tuple[str, ...] | None = None,
+    ) -> Optional[CacheEntry[bytes]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_many_raw_instances_from_cache(self, instance_ids: List[str]) -> List[Optional[CacheEntry[bytes]]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_raw_relation_from_cache(self, instance_id: str, relation: str) -> Optional[CacheEntry[bytes]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_id_page_from_cache(
+        self,
+        page_size: int,
+        page_number: int,
+        search: str | None = None,
+        sort: str | None = None,
+    ) -> Optional[CacheEntry[CachedIdPage]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def put_instance_to_cache(self, instance: T, hot: bool = False):
         raise NotImplementedError
 
     @abstractmethod
-    async def put_instance_to_cache(self, instance: T):
+    async def put_many_instances_to_cache(self, instances: List[T], hot_ids: Collection[str] = ()):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def put_missing_instances_to_cache(self, instance_ids: List[str]):
         raise NotImplementedError
 
     @abstractmethod
@@ -49,18 +171,101 @@ class AbsractCacheService(ABC, Generic[T]):
         page_number: int,
         instances: List[T],
         search: str | None = None,
+        hot: bool = False,
+    ):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def put_projection_list_to_cache(
+        self,
+        sort: str,
+        page_size: int,
+        page_number: int,
+        fields: Tuple[str, ...],
+        items: List[dict],
+        search: str | None = None,
+        hot: bool = False,
     ):
         raise NotImplementedError
 
+    @abstractmethod
+    async def put_id_page_to_cache(
+        self,
+        sort: str,
+        page_size: int,
+        page_number: int,
+        id_page: CachedIdPage,
+        search: str | None = None,
+        hot: bool = False,
+    ):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def put_relation_to_cache(self, instance_id: str, relation: str, items: List[dict]):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def invalidate_instances(self, instance_ids: List[str]):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def invalidate_lists(self, generation: Optional[int] = None):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def acquire_lock(self, name: str, expire_time: int | None = None) -> Optional[str]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def release_lock(self, name: str, token: str):
+        raise NotImplementedError
+
+
+def _is_cache_storage_failure(error: Exception) -> bool:
+    return isinstance(error, (RedisConnectionError, RedisTimeoutError, OSError, asyncio.TimeoutError))
+
+
+def _no_entries(self, instance_ids: List[str]) -> list:
+    return [None] * len(instance_ids)
+
+
+def _unshared_lock(self, name: str, expire_time: int | None = None) -> str:
+    return uuid.uuid4().hex
+
+
+# While Redis is unavailable the cache behaves as an empty one, so requests are served from the search engine
+CACHE_STORAGE_UNAVAILABLE_RESULTS = {
+    "get_many_instances_from_cache": _no_entries,
+    "get_many_raw_instances_from_cache": _no_entries,
+    "acquire_lock": _unshared_lock,
+}
+
 
-@backoff_public_methods()        
+@profile_public_methods("cache")
+@guard_public_methods(
+    breaker=get_circuit_breaker("Redis"),
+    is_failure=_is_cache_storage_failure,
+    fail_open=True,
+    fallbacks=CACHE_STORAGE_UNAVAILABLE_RESULTS,
+)
 class RedisCacheService(AbsractCacheService):
-    async def get_instance_from_cache(self, instance_id: str) -> Optional[T]:
-        cache_key = f"{self.key_prefix_single}_{instance_id}"
-        data = await self.cache_storage.get(cache_key)
-        if not data:
+    async def get_instance_from_cache(self, instance_id: str) -> Optional[CacheEntry[T]]:
+        data = await self.cache_storage.get(self.keys.instance(instance_id))
+        decoded = self._decode(data)
+        if decoded is None:
             return None
-        return self._deserialize(data)
+        return self._get_entry(*decoded)
+
+    async def get_many_instances_from_cache(self, instance_ids: List[str]) -> List[Optional[CacheEntry[T]]]:
+        if not instance_ids:
+            return []
+        cache_keys = [self.keys.instance(instance_id) for instance_id in instance_ids]
+        data = await self.cache_storage.mget(cache_keys)
+        entries = []
+        for item in data:
+            decoded = self._decode(item)
+            entries.append(self._get_entry(*decoded) if decoded else None)
+        return entries
 
     async def get_list_from_cache(
         self,
@@ -68,35 +273,306 @@ class RedisCacheService(AbsractCacheService):
         page_number: int,
         search: str | None = None,
         sort: str | None = None,
-    ) -> List[T] | None:
-        cache_key = f"{self.key_prefix_plural}_{search or ''}_{sort or ''}_{page_size}_{page_number}"
+    ) -> Optional[CacheEntry[List[T]]]:
+        cache_key = await self._get_list_key(page_size, page_number, search, sort)
         data = await self.cache_storage.get(cache_key)
-        if not data:
+        decoded = self._decode(data)
+        if decoded is None:
+            return None
+        items, stale_at = decoded
+        return CacheEntry([self._deserialize(item) for item in items], _is_stale(stale_at))
+
+    async def get_raw_instance_from_cache(self, instance_id: str) -> Optional[CacheEntry[bytes]]:
+        data = await self.cache_storage.get(self.keys.instance(instance_id))
+        return self._get_raw_entry(data)
+
+    async def get_raw_list_from_cache(
+        self,
+        page_size: int,
+        page_number: int,
+        search: str | None = None,
+        sort: str | None = None,
+        fields: Tuple[str, ...] | None = None,
+    ) -> Optional[CacheEntry[bytes]]:
+        cache_key = await self._get_list_key(page_size, page_number, search, sort, fields)
+        data = await self.cache_storage.get(cache_key)
+        return self._get_raw_entry(data)
+
+    async def get_many_raw_instances_from_cache(self, instance_ids: List[str]) -> List[Optional[CacheEntry[bytes]]]:
+        if not instance_ids:
+            return []
+        cache_keys = [self.keys.instance(instance_id) for instance_id in instance_ids]
+        data = await self.cache_storage.mget(cache_keys)
+        return [self._get_raw_entry(item) for item in data]
+
+    async def get_raw_relation_from_cache(self, instance_id: str, relation: str) -> Optional[CacheEntry[bytes]]:
+        data = await self.cache_storage.get(self.keys.relation(instance_id, relation))
+        return self._get_raw_entry(data)
+
+    async def get_id_page_from_cache(
+        self,
+        page_size: int,
+        page_number: int,
+        search: str | None = None,
+        sort: str | None = None,
+    ) -> Optional[CacheEntry[CachedIdPage]]:
+        cache_key = await self._get_id_page_key(page_size, page_number, search, sort)
+        data = await self.cache_storage.get(cache_key)
+        decoded = self._decode(data)
+        if decoded is None:
             return None
-        items = orjson.loads(data)
-        return [self._deserialize(item) for item in items]
+        id_page, stale_at = decoded
+        return CacheEntry(CachedIdPage(**id_page), _is_stale(stale_at))
 
-    async def put_instance_to_cache(self, instance: T):
-        cache_key = f"{self.key_prefix_single}_{instance.id}"
+    async def put_instance_to_cache(self, instance: T, hot: bool = False):
+        cache_key = self.keys.instance(instance.id)
+        stale_at, expire_time = _get_expire_times(hot)
         await self.cache_storage.set(
             cache_key,
-            instance.model_dump_json(),
-            settings.cache_expire_time,
+            self.codec.encode(instance.model_dump(mode="json"), stale_at),
+            expire_time,
         )
 
+    async def put_many_instances_to_cache(self, instances: List[T], hot_ids: Collection[str] = ()):
+        if not instances:
+            return
+        async with self.cache_storage.pipeline(transaction=False) as pipe:
+            for instance in instances:
+                stale_at, expire_time = _get_expire_times(instance.id in hot_ids)
+                pipe.set(
+                    self.keys.instance(instance.id),
+                    self.codec.encode(instance.model_dump(mode="json"), stale_at),
+                    expire_time,
+                )
+            await pipe.execute()
+
+    async def put_missing_instances_to_cache(self, instance_ids: List[str]):
+        """
+        Records that the documents do not exist for a short time.
+
+        The records are stored under the keys of the documents, so they are dropped
+        together with the cached documents once the documents are created.
+        """
+        if not instance_ids or not settings.cache_negative_expire_time:
+            return
+        missing = self.codec.encode(None)
+        async with self.cache_storage.pipeline(transaction=False) as pipe:
+            for instance_id in instance_ids:
+                pipe.set(self.keys.instance(instance_id), missing, settings.cache_negative_expire_time)
+            await pipe.execute()
+
     async def put_list_to_cache(
-        self, sort: str, page_size: int, page_number: int, instances: List[T], search: str | None = None
+        self,
+        sort: str,
+        page_size: int,
+        page_number: int,
+        instances: List[T],
+        search: str | None = None,
+        hot: bool = False,
     ):
-        cache_key = f"{self.key_prefix_plural}_{search or ''}_{sort or ''}_{page_size}_{page_number}"
-        instances_json_list = [instance.model_dump_json() for instance in instances]
-        instances_json_str = orjson.dumps(instances_json_list)
+        cache_key = await self._get_list_key(page_size, page_number, search, sort)
+        stale_at, expire_time = _get_expire_times(hot)
+        instances_data = [instance.model_dump(mode="json") for instance in instances]
         await self.cache_storage.set(
             cache_key,
-            instances_json_str,
-            settings.cache_expire_time,
+            self.codec.encode(instances_data, stale_at),
+            expire_time,
         )
 
+    async def put_projection_list_to_cache(
+        self,
+        sort: str,
+        page_size: int,
+        page_number: int,
+        fields: Tuple[str, ...],
+        items: List[dict],
+        search: str | None = None,
+        hot: bool = False,
+    ):
+        cache_key = await self._get_list_key(page_size, page_number, search, sort, fields)
+        stale_at, expire_time = _get_expire_times(hot)
+        await self.cache_storage.set(
+            cache_key,
+            self.codec.encode(items, stale_at),
+            expire_time,
+        )
 
-def automatic_cache_deserializer(model: Type[T], data: str) -> T:
-    data_dict = orjson.loads(data)
+    async def put_id_page_to_cache(
+        self,
+        sort: str,
+        page_size: int,
+        page_number: int,
+        id_page: CachedIdPage,
+        search: str | None = None,
+        hot: bool = False,
+    ):
+        cache_key = await self._get_id_page_key(page_size, page_number, search, sort)
+        stale_at, expire_time = _get_expire_times(hot)
+        await self.cache_storage.set(
+            cache_key,
+            self.codec.encode(asdict(id_page), stale_at),
+            expire_time,
+        )
+
+    async def put_relation_to_cache(self, instance_id: str, relation: str, items: List[dict]):
+        stale_at, expire_time = _get_expire_times()
+        await self.cache_storage.set(
+            self.keys.relation(instance_id, relation),
+            self.codec.encode(items, stale_at),
+            expire_time,
+        )
+
+    async def invalidate_instances(self, instance_ids: List[str]):
+        if instance_ids:
+            await self.cache_storage.delete(
+                *[self.keys.instance(instance_id) for instance_id in instance_ids],
+                *[
+                    self.keys.relation(instance_id, relation)
+                    for instance_id in instance_ids
+                    for relation in self.relations
+                ],
+            )
+
+    async def invalidate_lists(self, generation: Optional[int] = None):
+        """
+        Makes every cached list unreachable by switching to a new generation of list keys.
+
+        When no generation is given, the current one is read from the storage on the next access.
+        """
+        if generation is None or self._list_generation is None:
+            self._list_generation = generation
+            return
+        self._list_generation = max(self._list_generation, generation)
+
+    async def acquire_lock(self, name: str, expire_time: int | None = None) -> Optional[str]:
+        """
+        Take the lock shared by all the workers, returns the lock token on success.
+
+        The lock expires after `expire_time` seconds, `cache_lock_expire_time` by default.
+        """
+        token = uuid.uuid4().hex
+        acquired = await self.cache_storage.set(
+            self.keys.lock(name),
+            token,
+            expire_time or settings.cache_lock_expire_time,
+            nx=True,
+        )
+        return token if acquired else None
+
+    async def release_lock(self, name: str, token: str):
+        """Releases the lock unless it has expired and has been taken by another worker since."""
+        await self.cache_storage.eval(RELEASE_LOCK_SCRIPT, 1, self.keys.lock(name), token)
+
+    def _get_entry(self, value, stale_at: Optional[float]) -> CacheEntry[Optional[T]]:
+        if value is None:
+            return CacheEntry(None)
+        return CacheEntry(self._deserialize(value), _is_stale(stale_at))
+
+    def _decode(
+        self, data: bytes | None, decode: Callable[[bytes], Tuple[V, Optional[float]]] | None = None
+    ) -> Optional[Tuple[V, Optional[float]]]:
+        """Returns the value and the moment it becomes stale, None for a miss or an entry this codec can not read."""
+        if not data:
+            return None
+        try:
+            return (decode or self.codec.decode)(data)
+        except UnsupportedCodecVersionError as error:
+            # Written by another release, e.g. during a rolling deploy: it is loaded again and overwritten
+            logger.warning("Cache entry is treated as a miss: %s", error)
+            return None
+
+    def _get_raw_entry(self, data: bytes | None) -> Optional[CacheEntry[Optional[bytes]]]:
+        decoded = self._decode(data, self.codec.decode_json)
+        if decoded is None:
+            return None
+        payload, stale_at = decoded
+        if payload == MISSING_JSON:
+            return CacheEntry(None)
+        return CacheEntry(payload, _is_stale(stale_at))
+
+    async def _get_list_generation(self) -> int:
+        if self._list_generation is None:
+            generation = await self.cache_storage.get(self.keys.generation())
+            self._list_generation = int(generation) if generation else 0
+        return self._list_generation
+
+    async def _get_list_key(
+        self,
+        page_size: int,
+        page_number: int,
+        search: str | None,
+        sort: str | None,
+        fields: Tuple[str, ...] | None = None,
+    ) -> str:
+        generation = await self._get_list_generation()
+        return self.keys.list(generation, page_size, page_number, search, sort, fields)
+
+    async def _get_id_page_key(self, page_size: int, page_number: int, search: str | None, sort: str | None) -> str:
+        generation = await self._get_list_generation()
+        return self.keys.id_page(generation, page_size, page_number, search, sort)
+
+
+def _get_expire_times(hot: bool = False) -> Tuple[Optional[float], int]:
+    """
+    Returns the moment a new cache entry becomes stale and its randomized time to live.
+
+    The jitter spreads the expiration of the keys written in the same burst. Entries of
+    hot keys live longer but become stale as early as the others, so they stay in the
+    cache and are refreshed in the background instead of expiring.
+    """
+    jitter = 1 + random.uniform(-settings.cache_expire_jitter, settings.cache_expire_jitter)
+    expire_time = settings.cache_expire_time * (settings.cache_hot_expire_factor if hot else 1)
+    expire_time = max(1, round(expire_time * jitter))
+    if not settings.cache_stale_while_revalidate:
+        return None, expire_time
+    return time.time() + min(settings.cache_fresh_time * jitter, expire_time), expire_time
+
+
+def _is_stale(stale_at: Optional[float]) -> bool:
+    return stale_at is not None and stale_at < time.time()
+
+
+def automatic_cache_deserializer(model: Type[T], data: dict | str) -> T:
+    data_dict = data if isinstance(data, dict) else orjson.loads(data)
     return model.model_validate(data_dict)
+
+
+def create_local_cache(sketch: FrequencySketch | None = None) -> LocalCache | None:
+    if not settings.local_cache_enabled:
+        return None
+    return LocalCache(
+        max_entries=settings.local_cache_max_entries,
+        max_bytes=settings.local_cache_max_bytes,
+        expiration_time=settings.local_cache_expire_time,
+        sketch=sketch,
+    )
+
+
+def create_frequency_sketch() -> FrequencySketch | None:
+    if not settings.frequency_sketch_enabled:
+        return None
+    return FrequencySketch(
+        width=settings.frequency_sketch_width,
+        depth=settings.frequency_sketch_depth,
+        # Counters are halved after ten accesses per counter of a row, the sample size recommended by TinyLFU
+        sample_size=settings.frequency_sketch_width * 10,
+        top_size=settings.hot_keys_report_size,
+    )
+
+
+def create_missing_ids_filter() -> BloomFilter | None:
+    if not settings.local_missing_ids_filter_enabled or not settings.cache_negative_expire_time:
+        return None
+    return BloomFilter(
+        capacity=settings.local_missing_ids_filter_capacity,
+        error_rate=settings.local_missing_ids_filter_error_rate,
+        expiration_time=settings.cache_negative_expire_time,
+    )
+
+
+def create_cache_codec() -> CacheCodec:
+    return CacheCodec(
+        serializer=Serializer[settings.cache_serializer.upper()],
+        compression=Compression[settings.cache_compression.upper()],
+        compression_threshold=settings.cache_compression_threshold,
+    )
@@ -4,11 +4,21 @@ from cache_storage.cache_storage_protocol import CacheStorageProtocol
 from db.elastic import get_elastic
 from db.redis import get_redis
 from fastapi import Depends
-from models.film import Film
+from models.film import FILM_SOURCE_FIELDS, Film
 from search_engine.search_engine_protocol import SearchEngineProtocol
 
-from .caching_service import RedisCacheService
-from .search_service import ElasticSearchService
+from .caching_service import (
+    RedisCacheService,
+    create_frequency_sketch,
+    create_local_cache,
+    create_missing_ids_filter,
+)
+from .popularity import create_popularity_log
+from .search_service import (
+    ElasticSearchService,
+    create_get_batcher,
+    create_search_batcher,
+)
 from .searchable_model_service import SearchableModelService
 
 
@@ -19,5 +29,21 @@ def get_film_service(
     cache_service = RedisCacheService(
         cache_storage=redis, prefix_plural="movies", prefix_single="movie", deserialize=Film.deserialize_cache
     )
-    search_service = ElasticSearchService(search_engine=elastic, index="movies", deserialize=Film.deserialize_search)
-    return SearchableModelService[Film](caching_service=cache_service, search_service=search_service)
+    search_service = ElasticSearchService(
+        search_engine=elastic,
+        index="movies",
+        deserialize=Film.deserialize_search,
+        project=Film.project_search,
+        source_fields=FILM_SOURCE_FIELDS,
+        search_batcher=create_search_batcher(elastic),
+        get_batcher=create_get_batcher(elastic),
+    )
+    frequency_sketch = create_frequency_sketch()
+    return SearchableModelService[Film](
+        caching_service=cache_service,
+        search_service=search_service,
+        local_cache=create_local_cache(frequency_sketch),
+        missing_ids_filter=create_missing_ids_filter(),
+        popularity_log=create_popularity_log(redis, cache_service.keys.popularity()),
+        frequency_sketch=frequency_sketch,
+    )
@@ -7,8 +7,21 @@ from fastapi import Depends
 from models.genre import Genre
 from search_engine.search_engine_protocol import SearchEngineProtocol
 
-from .caching_service import RedisCacheService, automatic_cache_deserializer
-from .search_service import ElasticSearchService, automatic_search_deserializer
+from .caching_service import (
+    RedisCacheService,
+    automatic_cache_deserializer,
+    create_frequency_sketch,
+    create_local_cache,
+    create_missing_ids_filter,
+)
+from .in_memory_catalog import InMemoryCatalog, create_in_memory_catalog
+from .popularity import create_popularity_log
+from .search_service import (
+    ElasticSearchService,
+    automatic_search_deserializer,
+    create_get_batcher,
+    create_search_batcher,
+)
 from .searchable_model_service import SearchableModelService
 
 
@@ -24,5 +37,28 @@ def get_genre_service(
         prefix_plural="genres",
         deserialize=cache_deserializer,
     )
-    search_service = ElasticSearchService(search_engine=elastic, index="genres", deserialize=search_deserializer)
-    return SearchableModelService[Genre](caching_service=cache_service, search_service=search_service)
+    search_service = ElasticSearchService(
+        search_engine=elastic,
+        index="genres",
+        deserialize=search_deserializer,
+        search_batcher=create_search_batcher(elastic),
+        get_batcher=create_get_batcher(elastic),
+    )
+    frequency_sketch = create_frequency_sketch()
+    return SearchableModelService[Genre](
+        caching_service=cache_service,
+        search_service=search_service,
+        local_cache=create_local_cache(frequency_sketch),
+        missing_ids_filter=create_missing_ids_filter(),
+        popularity_log=create_popularity_log(redis, cache_service.keys.popularity()),
+        frequency_sketch=frequency_sketch,
+    )
+
+
+@lru_cache()
+def get_genre_repository(
+    redis: CacheStorageProtocol = Depends(get_redis), elastic: SearchEngineProtocol = Depends(get_elastic)
+) -> InMemoryCatalog | SearchableModelService:
+    """Returns the catalog serving the genres from memory, the genre service when the catalog is disabled."""
+    service = get_genre_service(redis=redis, elastic=elastic)
+    return create_in_memory_catalog(service, search_fields=("name", "description")) or service
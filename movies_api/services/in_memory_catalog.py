@@ -0,0 +1,289 @@
+import asyncio
+import logging
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Generic, List, Optional, Set, Tuple, TypeVar
+
+import orjson
+from core import profiling
+from core.config import settings
+from pydantic import BaseModel
+
+from .cache_keys import normalize_search
+from .search_service import SearchCursor
+from .searchable_model_service import SearchableModelService
+
+T = TypeVar("T", bound=BaseModel)
+
+logger = logging.getLogger(__name__)
+
+TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text: str | None) -> List[str]:
+    """Splits the text into its normalized words: casefolded, with their unicode representation unified."""
+    return TOKEN.findall(normalize_search(text) or "")
+
+
+@dataclass
+class CatalogSnapshot(Generic[T]):
+    """
+    Documents of the index with everything precomputed to answer requests without serializing.
+
+    Attributes:
+    - items (Dict): Documents by id, in the order they are listed.
+    - raw_items (Dict): Documents serialized to JSON by id.
+    - dumped_items (Dict): Documents dumped to JSON compatible dicts by id, used for projections.
+    - tokens (Dict): Ids of the documents by the words of their searchable fields.
+    """
+
+    items: Dict[str, T]
+    raw_items: Dict[str, bytes] = field(default_factory=dict)
+    dumped_items: Dict[str, dict] = field(default_factory=dict)
+    tokens: Dict[str, Set[str]] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, items: Dict[str, T], search_fields: Tuple[str, ...]) -> "CatalogSnapshot[T]":
+        snapshot = cls(items=items)
+        tokens: Dict[str, Set[str]] = defaultdict(set)
+        for instance_id, item in items.items():
+            snapshot.dumped_items[instance_id] = item.model_dump(mode="json")
+            snapshot.raw_items[instance_id] = orjson.dumps(snapshot.dumped_items[instance_id])
+            for search_field in search_fields:
+                for token in tokenize(getattr(item, search_field)):
+                    tokens[token].add(instance_id)
+        snapshot.tokens = dict(tokens)
+        return snapshot
+
+    def search(self, search: str) -> List[str]:
+        """
+        Returns the ids of the documents containing any word of the search text, the best matches first.
+
+        Documents containing more distinct words of the search come first, ties are broken
+        by id so every worker returns the same order.
+        """
+        scores: Dict[str, int] = defaultdict(int)
+        for token in set(tokenize(search)):
+            for instance_id in self.tokens.get(token, ()):
+                scores[instance_id] += 1
+        return sorted(scores, key=lambda instance_id: (-scores[instance_id], instance_id))
+
+
+@profiling.profile_public_methods("catalog")
+class InMemoryCatalog(Generic[T]):
+    """
+    Serves a small index from the memory of the worker, without requests to the cache or the search engine.
+
+    Every document of the index is loaded at start up and reloaded every `refresh_interval`,
+    the documents changed by the ETL are reloaded as soon as the change is published. The
+    normalized words of the `search_fields` are indexed when the documents are loaded, so
+    searches are answered without any request. Words are matched exactly: unlike the
+    analyzer of the index, the catalog neither stems the words, nor removes stopwords,
+    nor tolerates typos.
+
+    Until the index is loaded, and when it holds more than `max_documents`, requests are
+    passed to the `service` of the index. Cursor pages are always read from the service,
+    as the cursors are issued by the search engine.
+    """
+
+    def __init__(
+        self,
+        service: SearchableModelService[T],
+        search_fields: Tuple[str, ...],
+        refresh_interval: float,
+        retry_delay: float,
+        max_documents: int,
+        batch_size: int,
+    ):
+        self.service = service
+        self.search_fields = search_fields
+        self.refresh_interval = refresh_interval
+        self.retry_delay = retry_delay
+        self.max_documents = max_documents
+        self.batch_size = batch_size
+        self.snapshot: CatalogSnapshot[T] | None = None
+        self._changed_ids: Set[str] = set()
+        self._reload_all = True
+        self._changed = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._refresh_forever())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def get_by_id(self, model_id: str) -> Optional[T]:
+        if self.snapshot is None:
+            return await self.service.get_by_id(model_id)
+        return self.snapshot.items.get(model_id)
+
+    async def get_raw_by_id(self, model_id: str) -> Optional[bytes]:
+        if self.snapshot is None:
+            return await self.service.get_raw_by_id(model_id)
+        return self.snapshot.raw_items.get(model_id)
+
+    async def get_many_by_ids(self, ids: List[str]) -> List[Optional[T]]:
+        if self.snapshot is None:
+            return await self.service.get_many_by_ids(ids)
+        return [self.snapshot.items.get(model_id) for model_id in ids]
+
+    async def get_many_by_parameters(
+        self, page_number: int, page_size: int, search: str | None = None, sort: str | None = None
+    ) -> List[Optional[T]]:
+        snapshot = self.snapshot
+        if snapshot is None:
+            return await self.service.get_many_by_parameters(
+                page_number=page_number, page_size=page_size, search=search, sort=sort
+            )
+        ids = self._get_page(snapshot, page_number, page_size, search, sort)
+        return [snapshot.items[model_id] for model_id in ids]
+
+    async def get_raw_many_by_parameters(
+        self,
+        page_number: int,
+        page_size: int,
+        search: str | None = None,
+        sort: str | None = None,
+        fields: Tuple[str, ...] | None = None,
+    ) -> bytes:
+        snapshot = self.snapshot
+        if snapshot is None:
+            return await self.service.get_raw_many_by_parameters(
+                page_number=page_number, page_size=page_size, search=search, sort=sort, fields=fields
+            )
+        ids = self._get_page(snapshot, page_number, page_size, search, sort)
+        if fields:
+            return orjson.dumps(
+                [{field: snapshot.dumped_items[model_id].get(field) for field in fields} for model_id in ids]
+            )
+        return b"[" + b",".join(snapshot.raw_items[model_id] for model_id in ids) + b"]"
+
+    async def get_many_by_cursor(
+        self,
+        page_size: int,
+        cursor: str,
+        search: str | None = None,
+        sort: str | None = None,
+        fields: Tuple[str, ...] | None = None,
+    ) -> Tuple[List[T] | List[dict], Optional[str]]:
+        return await self.service.get_many_by_cursor(
+            page_size=page_size, cursor=cursor, search=search, sort=sort, fields=fields
+        )
+
+    async def invalidate(self, ids: List[str], generation: Optional[int] = None):
+        """Reloads the changed documents, every document when no ids are given."""
+        await self.service.invalidate(ids, generation)
+        if ids:
+            self._changed_ids.update(ids)
+        else:
+            self._reload_all = True
+        self._changed.set()
+
+    async def reload(self) -> None:
+        """
+        Loads every document of the index, the documents are served from memory once they all are loaded.
+
+        An index that does not exist, e.g. before the ETL creates it, is not loaded: requests are passed
+        to the service until a later attempt loads it. An index that exists and is empty is served empty.
+        """
+        items: Dict[str, T] = {}
+        cursor: SearchCursor | None = None
+        while True:
+            page = await self.service.search.get_by_cursor(page_size=self.batch_size, cursor=cursor)
+            if page is None:
+                logger.warning("Index %s is not found, it is loaded into memory once it is", self.service.search.index)
+                self._reload_all = True
+                return
+            batch, cursor = page
+            items.update((item.id, item) for item in batch)
+            if len(items) > self.max_documents:
+                logger.warning(
+                    "Index %s holds more than %s documents, it is not served from memory",
+                    self.service.search.index,
+                    self.max_documents,
+                )
+                self.snapshot = None
+                return
+            if cursor is None:
+                break
+        self.snapshot = CatalogSnapshot.build(items, self.search_fields)
+
+    async def reload_changed(self, ids: List[str]) -> None:
+        """Reloads the documents changed since the last load, the deleted ones are removed."""
+        if self.snapshot is None:
+            await self.reload()
+            return
+        changed = {item.id: item for item in await self.service.search.get_many_by_ids(ids) if item}
+        removed = set(ids)
+        items = {model_id: item for model_id, item in self.snapshot.items.items() if model_id not in removed}
+        items.update(changed)
+        self.snapshot = CatalogSnapshot.build(items, self.search_fields)
+
+    async def _refresh_forever(self) -> None:
+        while True:
+            # Changes published from now on are loaded on the next iteration
+            self._changed.clear()
+            try:
+                if self._reload_all or self.snapshot is None:
+                    self._reload_all = False
+                    self._changed_ids.clear()
+                    await self.reload()
+                elif self._changed_ids:
+                    ids, self._changed_ids = list(self._changed_ids), set()
+                    await self.reload_changed(ids)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Failed to load index %s into memory", self.service.search.index)
+                self._reload_all = True
+            # Failed loads are retried sooner than the refresh of a loaded index
+            failed = self._reload_all or self.snapshot is None
+            try:
+                await asyncio.wait_for(self._changed.wait(), self.retry_delay if failed else self.refresh_interval)
+            except asyncio.TimeoutError:
+                self._reload_all = True
+
+    def _get_page(
+        self, snapshot: CatalogSnapshot[T], page_number: int, page_size: int, search: str | None, sort: str | None
+    ) -> List[str]:
+        if normalize_search(search):
+            ids = snapshot.search(search)
+        else:
+            ids = list(snapshot.items)
+        if sort:
+            sort_field, reverse = (sort[1:], True) if sort.startswith("-") else (sort, False)
+            # Documents without the value come last in both orders, as in Elasticsearch
+            present = [model_id for model_id in ids if snapshot.dumped_items[model_id].get(sort_field) is not None]
+            absent = [model_id for model_id in ids if snapshot.dumped_items[model_id].get(sort_field) is None]
+            present.sort(key=lambda model_id: snapshot.dumped_items[model_id][sort_field], reverse=reverse)
+            ids = present + absent
+        start = (page_number - 1) * page_size
+        return ids[start : start + page_size]
+
+
+def create_in_memory_catalog(
+    service: SearchableModelService[T], search_fields: Tuple[str, ...]
+) -> InMemoryCatalog[T] | None:
+    if not settings.in_memory_catalog_enabled:
+        return None
+    return InMemoryCatalog(
+        service=service,
+        search_fields=search_fields,
+        refresh_interval=settings.in_memory_catalog_refresh_interval,
+        retry_delay=settings.in_memory_catalog_retry_delay,
+        max_documents=settings.in_memory_catalog_max_documents,
+        batch_size=settings.in_memory_catalog_batch_size,
+    )
+
+
+# Catalogs of the indexes served from memory, by index
+catalogs: Dict[str, InMemoryCatalog] = {}
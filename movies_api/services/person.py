@@ -7,8 +7,22 @@ from fastapi import Depends
 from models.person import Person
 from search_engine.search_engine_protocol import SearchEngineProtocol
 
-from .caching_service import RedisCacheService, automatic_cache_deserializer
-from .search_service import ElasticSearchService, automatic_search_deserializer
+from .caching_service import (
+    RedisCacheService,
+    automatic_cache_deserializer,
+    create_frequency_sketch,
+    create_local_cache,
+    create_missing_ids_filter,
+)
+from .film import get_film_service
+from .person_films import FILMS_RELATION, PersonFilmsService
+from .popularity import create_popularity_log
+from .search_service import (
+    ElasticSearchService,
+    automatic_search_deserializer,
+    create_get_batcher,
+    create_search_batcher,
+)
 from .searchable_model_service import SearchableModelService
 
 
@@ -23,6 +37,31 @@ def get_person_service(
         prefix_plural="persons",
         prefix_single="person",
         deserialize=cache_deserializer,
+        relations=(FILMS_RELATION,),
+    )
+    search_service = ElasticSearchService(
+        search_engine=elastic,
+        index="persons",
+        deserialize=search_deserializer,
+        search_batcher=create_search_batcher(elastic),
+        get_batcher=create_get_batcher(elastic),
+    )
+    frequency_sketch = create_frequency_sketch()
+    return SearchableModelService[Person](
+        caching_service=cache_service,
+        search_service=search_service,
+        local_cache=create_local_cache(frequency_sketch),
+        missing_ids_filter=create_missing_ids_filter(),
+        popularity_log=create_popularity_log(redis, cache_service.keys.popularity()),
+        frequency_sketch=frequency_sketch,
+    )
+
+
+@lru_cache()
+def get_person_films_service(
+    redis: CacheStorageProtocol = Depends(get_redis), elastic: SearchEngineProtocol = Depends(get_elastic)
+) -> PersonFilmsService:
+    return PersonFilmsService(
+        person_service=get_person_service(redis=redis, elastic=elastic),
+        film_service=get_film_service(redis=redis, elastic=elastic),
     )
-    search_service = ElasticSearchService(search_engine=elastic, index="persons", deserialize=search_deserializer)
-    return SearchableModelService[Person](caching_service=cache_service, search_service=search_service)
@@ -0,0 +1,84 @@
+import asyncio
+import logging
+from typing import List, Optional, Set
+
+import orjson
+from core import profiling
+from models.film import Film
+from models.person import Person, PersonFilm
+
+from .searchable_model_service import SearchableModelService
+from .single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Name the filmographies are cached under in the cache of the persons
+FILMS_RELATION = "films"
+
+
+@profiling.profile_public_methods("filmography")
+class PersonFilmsService:
+    """
+    Builds the filmographies of persons: their films with the title and the rating.
+
+    Titles and ratings are read from the person document, where the ETL indexes them. The
+    films of persons indexed before that are read with one batched lookup of the film
+    service. The filmography is cached as a whole under the person, so it is dropped
+    together with the cached person once the ETL reindexes it, which it also does when
+    the title or the rating of one of the films changes.
+    """
+
+    def __init__(self, person_service: SearchableModelService[Person], film_service: SearchableModelService[Film]):
+        self.persons = person_service
+        self.films = film_service
+        self._single_flight = SingleFlight()
+        self._background_tasks: Set[asyncio.Task] = set()
+
+    async def get_raw_films(self, person_id: str) -> Optional[bytes]:
+        """Returns the filmography serialized to JSON, None when the person does not exist."""
+        entry = await self.persons.cache.get_raw_relation_from_cache(person_id, FILMS_RELATION)
+        if entry and entry.value is not None:
+            if entry.is_stale:
+                self._revalidate(person_id)
+            return entry.value
+        return await self._single_flight.do(person_id, lambda: self._load(person_id))
+
+    async def get_films(self, person_id: str) -> Optional[List[PersonFilm]]:
+        person = await self.persons.get_by_id(person_id)
+        if person is None:
+            return None
+        person_films = person.films or []
+        # Persons indexed with the film titles need no lookup, only the ones indexed before are joined
+        lookup_ids = [person_film.id for person_film in person_films if person_film.title is None]
+        films = {film.id: film for film in await self.films.get_many_by_ids(lookup_ids) if film}
+        filmography = []
+        for person_film in person_films:
+            if person_film.title is not None:
+                filmography.append(PersonFilm(**person_film.model_dump()))
+            elif person_film.id in films:
+                film = films[person_film.id]
+                filmography.append(
+                    PersonFilm(id=film.id, title=film.title, imdb_rating=film.imdb_rating, roles=person_film.roles)
+                )
+        return filmography
+
+    async def _load(self, person_id: str) -> Optional[bytes]:
+        films = await self.get_films(person_id)
+        if films is None:
+            return None
+        items = [film.model_dump(mode="json") for film in films]
+        await self.persons.cache.put_relation_to_cache(person_id, FILMS_RELATION, items)
+        return orjson.dumps(items)
+
+    def _revalidate(self, person_id: str) -> None:
+        """Rebuilds a stale filmography in the background while the stale one is being served."""
+        if person_id in self._single_flight:
+            return
+        task = asyncio.ensure_future(self._single_flight.do(person_id, lambda: self._load(person_id)))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._on_refreshed)
+
+    def _on_refreshed(self, task: asyncio.Task) -> None:
+        self._background_tasks.discard(task)
+        if not task.cancelled() and task.exception():
+            logger.error("Failed to refresh stale filmography: %s", task.exception())
@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import math
+import time
+from collections import Counter
+from typing import List, Set
+
+from cache_storage.cache_storage_protocol import CacheStorageProtocol
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PopularityLog:
+    """
+    Counts the requests of every document and persists the counts in Redis sorted sets.
+
+    Requests are counted in memory and added to the sorted sets shared by all the workers
+    at most once per `flush_interval`, so counting costs no round trip per request. Every
+    `bucket_interval` the counts go to a new sorted set, which expires once `bucket_count`
+    intervals have passed: the most requested documents are the ones requested during the
+    last intervals, not since the counting started. Only the `max_size` most requested
+    documents are kept in every set.
+    """
+
+    def __init__(
+        self,
+        cache_storage: CacheStorageProtocol,
+        key: str,
+        flush_interval: float,
+        max_size: int,
+        bucket_interval: float,
+        bucket_count: int,
+    ):
+        self.cache_storage = cache_storage
+        self.key = key
+        self.flush_interval = flush_interval
+        self.max_size = max_size
+        self.bucket_interval = bucket_interval
+        self.bucket_count = bucket_count
+        self._counts: Counter[str] = Counter()
+        self._flushed_at = time.monotonic()
+        self._flush_tasks: Set[asyncio.Task] = set()
+
+    def record(self, *instance_ids: str) -> None:
+        self._counts.update(instance_ids)
+        if time.monotonic() - self._flushed_at >= self.flush_interval:
+            self._flushed_at = time.monotonic()
+            task = asyncio.ensure_future(self.flush())
+            self._flush_tasks.add(task)
+            task.add_done_callback(self._flush_tasks.discard)
+
+    async def flush(self) -> None:
+        counts, self._counts = self._counts, Counter()
+        if not counts:
+            return
+        bucket_key = self._get_bucket_key(self._get_bucket())
+        try:
+            async with self.cache_storage.pipeline(transaction=False) as pipe:
+                for instance_id, count in counts.items():
+                    pipe.zincrby(bucket_key, count, instance_id)
+                pipe.zremrangebyrank(bucket_key, 0, -self.max_size - 1)
+                pipe.expire(bucket_key, math.ceil(self.bucket_interval * self.bucket_count))
+                await pipe.execute()
+        except Exception as error:
+            # Counts are only used to warm the cache, losing some of them is harmless
+            logger.warning("Failed to save the popularity of %s documents: %s", len(counts), error)
+
+    async def get_top(self, number: int) -> List[str]:
+        """Returns the ids of the documents most requested during the last intervals, the most requested first."""
+        if number <= 0:
+            return []
+        bucket = self._get_bucket()
+        bucket_keys = [self._get_bucket_key(bucket - age) for age in range(self.bucket_count)]
+        # Sums the counts of the intervals into a temporary set, within one transaction as its key is shared
+        top_key = f"{self.key}_top"
+        async with self.cache_storage.pipeline(transaction=True) as pipe:
+            pipe.zunionstore(top_key, bucket_keys)
+            pipe.zrevrange(top_key, 0, number - 1)
+            pipe.delete(top_key)
+            _, instance_ids, _ = await pipe.execute()
+        return [instance_id.decode() if isinstance(instance_id, bytes) else instance_id for instance_id in instance_ids]
+
+    def _get_bucket(self) -> int:
+        # Wall clock time, so all the workers count into the same set
+        return int(time.time() // self.bucket_interval)
+
+    def _get_bucket_key(self, bucket: int) -> str:
+        return f"{self.key}_{bucket}"
+
+
+def create_popularity_log(cache_storage: CacheStorageProtocol, key: str) -> PopularityLog | None:
+    if not settings.popularity_log_enabled:
+        return None
+    return PopularityLog(
+        cache_storage=cache_storage,
+        key=key,
+        flush_interval=settings.popularity_flush_interval,
+        max_size=settings.popularity_log_max_size,
+        bucket_interval=settings.popularity_bucket_interval,
+        bucket_count=settings.popularity_bucket_count,
+    )
@@ -1,43 +1,263 @@
+import asyncio
+import base64
 from abc import ABC, abstractmethod
-from typing import Callable, Generic, List, Optional, Type, TypeVar
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import Callable, Dict, Generic, List, Optional, Tuple, Type, TypeVar
 
-from backoff.backoff import backoff_public_methods
-from elasticsearch import NotFoundError
+import orjson
+from backoff.circuit_breaker import get_circuit_breaker, guard_public_methods
+from core import profiling
+from core.config import settings
+from elastic_transport import TransportError
+from elasticsearch import ApiError, NotFoundError
 from pydantic import BaseModel
+from search_engine.batching import MultiGetBatcher, MultiSearchBatcher
 from search_engine.search_engine_protocol import SearchEngineProtocol
 
 T = TypeVar("T", bound=BaseModel)
 
 
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor is malformed, expired or issued for another query."""
+
+
+@dataclass
+class SearchCursor:
+    """
+    Opaque position right after the last document of a page.
+
+    Attributes:
+    - search_after (list): Sort values of the last document of the page.
+    - query (str): Search text and sort order the cursor was issued for.
+    - pit_id (Optional[str]): Point in time the pages are read from (if enabled).
+    """
+
+    search_after: list
+    query: str
+    pit_id: str | None = None
+
+    @staticmethod
+    def get_query(search: str | None = None, sort: str | None = None) -> str:
+        return f"{search or ''}_{sort or ''}"
+
+    def encode(self) -> str:
+        return base64.urlsafe_b64encode(orjson.dumps(asdict(self))).decode()
+
+    @classmethod
+    def decode(cls, value: str) -> "SearchCursor":
+        try:
+            return cls(**orjson.loads(base64.urlsafe_b64decode(value.encode())))
+        except (ValueError, TypeError) as error:
+            raise InvalidCursorError("Malformed cursor") from error
+
+
+@dataclass
+class SearchPage(Generic[T]):
+    """
+    Page of search results.
+
+    Attributes:
+    - items (List): Documents of the page.
+    - total (int): Number of documents matching the search.
+    """
+
+    items: List[T]
+    total: int
+
+
 class AbstractSearchService(ABC, Generic[T]):
-    def __init__(self, search_engine: SearchEngineProtocol, index: str, deserialize: Callable[[dict], T]):
+    def __init__(
+        self,
+        search_engine: SearchEngineProtocol,
+        index: str,
+        deserialize: Callable[[dict], T],
+        project: Callable[[dict, Tuple[str, ...]], dict] | None = None,
+        source_fields: Dict[str, str] | None = None,
+        search_batcher: MultiSearchBatcher | None = None,
+        get_batcher: MultiGetBatcher | None = None,
+    ):
         self.search_engine = search_engine
         self.index = index
-        self._deserialize = deserialize
+        self._deserialize = profiling.profiled("search.deserialize", deserialize)
+        self._project = profiling.profiled("search.project", project or automatic_search_projection)
+        self.source_fields = source_fields
+        self.search_batcher = search_batcher
+        self.get_batcher = get_batcher
 
     @abstractmethod
     async def get_by_id(self, instance_id: str) -> Optional[T]:
         raise NotImplementedError("Subclasses must implement this method")
 
+    @abstractmethod
+    async def get_many_by_ids(self, instance_ids: List[str]) -> List[Optional[T]]:
+        raise NotImplementedError("Subclasses must implement this method")
+
     @abstractmethod
     async def get_by_parameters(
         self, page_number: int, page_size: int, search: str | None = None, sort: str | None = None
     ) -> Optional[List[T]]:
         raise NotImplementedError("Subclasses must implement this method")
 
+    @abstractmethod
+    async def get_page_by_parameters(
+        self, page_number: int, page_size: int, search: str | None = None, sort: str | None = None
+    ) -> Optional[SearchPage[T]]:
+        raise NotImplementedError("Subclasses must implement this method")
+
+    @abstractmethod
+    async def get_projection_by_parameters(
+        self,
+        page_number: int,
+        page_size: int,
+        fields: Tuple[str, ...],
+        search: str | None = None,
+        sort: str | None = None,
+    ) -> Optional[List[dict]]:
+        raise NotImplementedError("Subclasses must implement this method")
+
+    @abstractmethod
+    async def get_by_cursor(
+        self,
+        page_size: int,
+        cursor: SearchCursor | None = None,
+        search: str | None = None,
+        sort: str | None = None,
+        fields: Tuple[str, ...] | None = None,
+    ) -> Optional[Tuple[List[T] | List[dict], Optional[SearchCursor]]]:
+        raise NotImplementedError("Subclasses must implement this method")
+
+
+def _is_search_engine_failure(error: Exception) -> bool:
+    if isinstance(error, (TransportError, OSError, asyncio.TimeoutError)):
+        return True
+    # Overloaded or failing cluster, unlike errors of the request itself
+    status = getattr(getattr(error, "meta", None), "status", None)
+    return isinstance(error, ApiError) and status is not None and (status >= 500 or status == 429)
 
-@backoff_public_methods()
+
+@profiling.profile_public_methods("search")
+@guard_public_methods(breaker=get_circuit_breaker("Elasticsearch"), is_failure=_is_search_engine_failure)
 class ElasticSearchService(AbstractSearchService[T]):
     async def get_by_id(self, instance_id: str) -> Optional[T]:
+        if self.get_batcher is not None:
+            doc = await self.get_batcher.get(index=self.index, id=instance_id)
+            return self._deserialize(doc) if doc else None
         try:
             doc = await self.search_engine.get(index=self.index, id=instance_id)
             return self._deserialize(doc)
         except NotFoundError:
             return None
 
+    async def get_many_by_ids(self, instance_ids: List[str]) -> List[Optional[T]]:
+        if not instance_ids:
+            return []
+        try:
+            response = await self.search_engine.mget(index=self.index, ids=instance_ids)
+        except NotFoundError:
+            return [None] * len(instance_ids)
+        return [self._deserialize(doc) if doc.get("found") else None for doc in response["docs"]]
+
     async def get_by_parameters(
         self, page_number: int, page_size: int, search: str | None = None, sort: str | None = None
     ) -> Optional[List[T]]:
+        page = await self._get_page(page_number=page_number, page_size=page_size, search=search, sort=sort)
+        return page.items if page else None
+
+    async def get_page_by_parameters(
+        self, page_number: int, page_size: int, search: str | None = None, sort: str | None = None
+    ) -> Optional[SearchPage[T]]:
+        return await self._get_page(page_number=page_number, page_size=page_size, search=search, sort=sort)
+
+    async def get_projection_by_parameters(
+        self,
+        page_number: int,
+        page_size: int,
+        fields: Tuple[str, ...],
+        search: str | None = None,
+        sort: str | None = None,
+    ) -> Optional[List[dict]]:
+        """Returns only the requested fields of the documents, reading only their sources from the index."""
+        query = {
+            "query": self._get_query_match(search=search),
+            "size": page_size,
+            "from": (page_number - 1) * page_size,
+            "_source": {"includes": [self._get_source_field(field) for field in fields]},
+        }
+
+        if sort:
+            query["sort"] = self._get_sort_params(sort=sort)
+
+        try:
+            doc = await self._search(
+                index=self.index,
+                body=query,
+            )
+        except NotFoundError:
+            return None
+        documents = doc["hits"]["hits"]
+        return [self._project(doc, fields) for doc in documents]
+
+    async def get_by_cursor(
+        self,
+        page_size: int,
+        cursor: SearchCursor | None = None,
+        search: str | None = None,
+        sort: str | None = None,
+        fields: Tuple[str, ...] | None = None,
+    ) -> Optional[Tuple[List[T] | List[dict], Optional[SearchCursor]]]:
+        """
+        Returns the page following the cursor together with the cursor of the next page.
+
+        Unlike from/size pagination every page costs the same, as Elasticsearch only
+        has to collect `page_size` hits after the sort values stored in the cursor.
+        When `fields` are given, only these fields of the documents are read from the
+        index and the documents are returned as dicts.
+        """
+        query = {
+            "query": self._get_query_match(search=search),
+            "size": page_size,
+            "sort": self._get_cursor_sort_params(sort=sort),
+        }
+        if fields:
+            query["_source"] = {"includes": [self._get_source_field(field) for field in fields]}
+        if cursor:
+            query["search_after"] = cursor.search_after
+        pit_id = cursor.pit_id if cursor else None
+        try:
+            if pit_id is None and cursor is None and settings.search_cursor_use_pit:
+                point_in_time = await self.search_engine.open_point_in_time(
+                    index=self.index, keep_alive=settings.search_cursor_keep_alive
+                )
+                pit_id = point_in_time["id"]
+            if pit_id:
+                query["pit"] = {"id": pit_id, "keep_alive": settings.search_cursor_keep_alive}
+            doc = await self._search(
+                index=None if pit_id else self.index,
+                body=query,
+            )
+        except NotFoundError:
+            return None
+        documents = doc["hits"]["hits"]
+        if fields:
+            items = [self._project(document, fields) for document in documents]
+        else:
+            items = [self._deserialize(document) for document in documents]
+        pit_id = doc.get("pit_id", pit_id)
+        if len(documents) < page_size:
+            if pit_id:
+                await self.search_engine.close_point_in_time(id=pit_id)
+            return items, None
+        next_cursor = SearchCursor(
+            search_after=documents[-1]["sort"],
+            query=SearchCursor.get_query(search=search, sort=sort),
+            pit_id=pit_id,
+        )
+        return items, next_cursor
+
+    async def _get_page(
+        self, page_number: int, page_size: int, search: str | None = None, sort: str | None = None
+    ) -> Optional[SearchPage[T]]:
         query = {
             "query": self._get_query_match(search=search),
             "size": page_size,
@@ -48,14 +268,34 @@ class ElasticSearchService(AbstractSearchService[T]):
             query["sort"] = self._get_sort_params(sort=sort)
 
         try:
-            doc = await self.search_engine.search(
+            doc = await self._search(
                 index=self.index,
                 body=query,
             )
         except NotFoundError:
             return None
         documents = doc["hits"]["hits"]
-        return [self._deserialize(doc) for doc in documents]
+        return SearchPage(items=[self._deserialize(doc) for doc in documents], total=doc["hits"]["total"]["value"])
+
+    async def _search(self, index: str | None, body: dict) -> dict:
+        if self.search_batcher is None:
+            response = await self.search_engine.search(index=index, body=body)
+        else:
+            response = await self.search_batcher.search(index=index, body=body)
+        # Time spent by Elasticsearch itself, the rest of the span goes to the network and the event loop
+        profiling.add_value("elasticsearch_took_ms", response.get("took", 0))
+        return response
+
+    def _get_source_field(self, field: str) -> str:
+        if self.source_fields is None:
+            return field
+        return self.source_fields[field]
+
+    @classmethod
+    def _get_cursor_sort_params(cls, sort):
+        # Ties are broken by id, so the position between two pages is never ambiguous
+        sort_params = cls._get_sort_params(sort=sort) if sort else [{"_score": "desc"}]
+        return [*sort_params, {"id": "asc"}]
 
     @staticmethod
     def _get_sort_params(sort):
@@ -77,5 +317,30 @@ class ElasticSearchService(AbstractSearchService[T]):
         return {"match_all": {}}
 
 
+@lru_cache()
+def create_search_batcher(search_engine: SearchEngineProtocol) -> MultiSearchBatcher | None:
+    """Returns the batcher shared by the services of every index, None when batching is disabled."""
+    if not settings.search_batching_enabled:
+        return None
+    return MultiSearchBatcher(
+        search_engine=search_engine,
+        window=settings.search_batch_window,
+        max_size=settings.search_batch_max_size,
+    )
+
+
+@lru_cache()
+def create_get_batcher(search_engine: SearchEngineProtocol) -> MultiGetBatcher | None:
+    """Returns the batcher of lookups by id shared by the services of every index, None when batching is disabled."""
+    if not settings.get_batching_enabled:
+        return None
+    # Lookups issued within the same event loop iteration are batched, so no latency is added
+    return MultiGetBatcher(search_engine=search_engine, window=0, max_size=settings.get_batch_max_size)
+
+
 def automatic_search_deserializer(model: Type[BaseModel], data: dict):
     return model.model_validate(data["_source"])
+
+
+def automatic_search_projection(data: dict, fields: Tuple[str, ...]) -> dict:
+    return {field: data["_source"].get(field) for field in fields}
@@ -1,53 +1,626 @@
-from typing import Generic, List, Optional, TypeVar
+import asyncio
+import logging
+import time
+from typing import (
+    Awaitable,
+    Callable,
+    Generic,
+    Hashable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+)
 
+import orjson
+from cache_storage.bloom_filter import BloomFilter
+from cache_storage.frequency_sketch import FrequencySketch
+from cache_storage.local_cache import LocalCache
+from core.config import settings
 from pydantic import BaseModel
 
-from .caching_service import AbsractCacheService
-from .search_service import AbstractSearchService
+from .cache_keys import normalize_search
+from .caching_service import AbsractCacheService, CachedIdPage, CacheEntry
+from .popularity import PopularityLog
+from .search_service import AbstractSearchService, InvalidCursorError, SearchCursor
+from .single_flight import SingleFlight
 
 T = TypeVar("T", bound=BaseModel)
 
+logger = logging.getLogger(__name__)
+
 
 class SearchableModelService(Generic[T]):
-    def __init__(self, caching_service: AbsractCacheService, search_service: AbstractSearchService):
+    def __init__(
+        self,
+        caching_service: AbsractCacheService,
+        search_service: AbstractSearchService,
+        local_cache: LocalCache | None = None,
+        missing_ids_filter: BloomFilter | None = None,
+        popularity_log: PopularityLog | None = None,
+        frequency_sketch: FrequencySketch | None = None,
+    ):
         self.cache = caching_service
         self.search = search_service
+        self.local_cache = local_cache
+        self.missing_ids = missing_ids_filter
+        self.popularity = popularity_log
+        # Counts every request by the local cache key it is served from, whether the local cache is enabled or not
+        self.frequency = frequency_sketch
+        self._single_flight = SingleFlight()
+        self._background_tasks: Set[asyncio.Task] = set()
 
     async def get_by_id(self, film_id: str) -> Optional[T]:
-        item = await self.cache.get_instance_from_cache(film_id)
-        if not item:
-            item = await self.search.get_by_id(film_id)
-            if not item:
+        self._record_requests(film_id)
+        self._count_request(("instance", film_id))
+        return await self._get_by_id(film_id)
+
+    async def _get_by_id(self, film_id: str) -> Optional[T]:
+        local_key = ("instance", film_id)
+        item = self._get_local(local_key)
+        if item:
+            return item
+        if self._is_known_missing(film_id):
+            return None
+        lock_name = f"instance_{film_id}"
+        entry = await self.cache.get_instance_from_cache(film_id)
+        if entry:
+            if entry.is_missing:
+                self._add_missing(film_id)
                 return None
-            await self.cache.put_instance_to_cache(item)
-        return item
+            if entry.is_stale:
+                self._revalidate(local_key, lock_name, lambda: self._load_instance(film_id))
+            self._put_local(local_key, entry.value)
+            return entry.value
+        return await self._single_flight.do(
+            local_key,
+            lambda: self._load_with_lock(
+                lock_name=lock_name,
+                read_cache=lambda: self.cache.get_instance_from_cache(film_id),
+                load=lambda: self._load_instance(film_id),
+            ),
+        )
 
     async def get_many_by_parameters(
         self, page_number: int, page_size: int, search: str | None = None, sort: str | None = None
     ) -> List[Optional[T]]:
-        items = await self.cache.get_list_from_cache(
+        # Blank texts list every document, other texts are sent to the search engine as they are typed
+        search = search if normalize_search(search) else None
+        self._count_request(self._list_key("list", search, sort, page_size, page_number))
+        return await self._get_many_by_parameters(
+            page_number=page_number, page_size=page_size, search=search, sort=sort
+        )
+
+    async def _get_many_by_parameters(
+        self, page_number: int, page_size: int, search: str | None = None, sort: str | None = None
+    ) -> List[Optional[T]]:
+        local_key = self._list_key("list", search, sort, page_size, page_number)
+        items = self._get_local(local_key)
+        if items:
+            return items
+        if settings.cache_normalized_lists:
+            return await self._get_normalized_list(
+                search=search, page_number=page_number, page_size=page_size, sort=sort
+            )
+        lock_name = self._list_lock_name(search, sort, page_size, page_number)
+
+        def load():
+            return self._load_list(search=search, page_number=page_number, page_size=page_size, sort=sort)
+
+        entry = await self.cache.get_list_from_cache(
             search=search, page_size=page_size, page_number=page_number, sort=sort
         )
-        if not items:
-            items = await self.search.get_by_parameters(
+        if entry and entry.value:
+            if entry.is_stale:
+                self._revalidate(local_key, lock_name, load)
+            self._put_local(local_key, entry.value)
+            return entry.value
+        items = await self._single_flight.do(
+            local_key,
+            lambda: self._load_with_lock(
+                lock_name=lock_name,
+                read_cache=lambda: self.cache.get_list_from_cache(
+                    search=search, page_size=page_size, page_number=page_number, sort=sort
+                ),
+                load=load,
+            ),
+        )
+        return items or []
+
+    async def get_raw_by_id(self, instance_id: str) -> Optional[bytes]:
+        """
+        Returns the document serialized to JSON, ready to be sent as a response body.
+
+        Cache hits are served from the stored bytes without building model objects.
+        """
+        self._record_requests(instance_id)
+        local_key = ("raw_instance", instance_id)
+        self._count_request(local_key)
+        data = self._get_local(local_key)
+        if data:
+            return data
+        if self._is_known_missing(instance_id):
+            return None
+        entry = await self.cache.get_raw_instance_from_cache(instance_id)
+        if entry:
+            if entry.is_missing:
+                self._add_missing(instance_id)
+                return None
+            if entry.is_stale:
+                self._revalidate(
+                    ("instance", instance_id), f"instance_{instance_id}", lambda: self._load_instance(instance_id)
+                )
+            data = entry.value
+        else:
+            item = await self._get_by_id(instance_id)
+            if not item:
+                return None
+            data = item.model_dump_json().encode()
+        self._put_local(local_key, data)
+        return data
+
+    async def get_raw_many_by_parameters(
+        self,
+        page_number: int,
+        page_size: int,
+        search: str | None = None,
+        sort: str | None = None,
+        fields: Tuple[str, ...] | None = None,
+    ) -> bytes:
+        """
+        Returns the page of documents serialized to JSON, ready to be sent as a response body.
+
+        Cache hits are served from the stored bytes without building model objects. When
+        `fields` are given, only these fields of the documents are read from the index,
+        cached and returned.
+        """
+        # Blank texts list every document, other texts are sent to the search engine as they are typed
+        search = search if normalize_search(search) else None
+        if fields:
+            self._count_request(self._list_key("raw_list", search, sort, page_size, page_number, fields))
+            return await self._get_raw_projection(
+                search=search, page_number=page_number, page_size=page_size, sort=sort, fields=fields
+            )
+        local_key = self._list_key("raw_list", search, sort, page_size, page_number)
+        self._count_request(local_key)
+        data = self._get_local(local_key)
+        if data:
+            return data
+        if settings.cache_normalized_lists:
+            data = await self._get_raw_normalized_list(
                 search=search, page_number=page_number, page_size=page_size, sort=sort
             )
-            if not items:
-                return []
-            await self.cache.put_list_to_cache(
-                search=search, page_number=page_number, page_size=page_size, sort=sort, instances=items
+            self._put_local(local_key, data)
+            return data
+        entry = await self.cache.get_raw_list_from_cache(
+            search=search, page_size=page_size, page_number=page_number, sort=sort
+        )
+        if entry:
+            if entry.is_stale:
+                self._revalidate(
+                    self._list_key("list", search, sort, page_size, page_number),
+                    self._list_lock_name(search, sort, page_size, page_number),
+                    lambda: self._load_list(search=search, page_number=page_number, page_size=page_size, sort=sort),
+                )
+            data = entry.value
+        else:
+            items = await self._get_many_by_parameters(
+                search=search, page_number=page_number, page_size=page_size, sort=sort
             )
-        return items
+            data = orjson.dumps([item.model_dump(mode="json") for item in items])
+        self._put_local(local_key, data)
+        return data
+
+    async def get_many_by_cursor(
+        self,
+        page_size: int,
+        cursor: str,
+        search: str | None = None,
+        sort: str | None = None,
+        fields: Tuple[str, ...] | None = None,
+    ) -> Tuple[List[T] | List[dict], Optional[str]]:
+        """
+        Returns the page following the cursor and the cursor of the next page.
+
+        An empty cursor starts from the first page. Cursor pages are not cached,
+        since each walk through the results produces its own cursors. When `fields`
+        are given, only these fields of the documents are read and returned as dicts.
+        """
+        # Blank texts list every document, other texts are sent to the search engine as they are typed
+        search = search if normalize_search(search) else None
+        search_cursor = SearchCursor.decode(cursor) if cursor else None
+        if search_cursor and search_cursor.query != SearchCursor.get_query(search=search, sort=sort):
+            raise InvalidCursorError("Cursor was issued for another search or sort order")
+        page = await self.search.get_by_cursor(
+            page_size=page_size, cursor=search_cursor, search=search, sort=sort, fields=fields
+        )
+        if page is None:
+            if search_cursor and search_cursor.pit_id:
+                raise InvalidCursorError("Cursor has expired")
+            return [], None
+        items, next_cursor = page
+        return items, next_cursor.encode() if next_cursor else None
 
     async def get_many_by_ids(self, ids: List[str]) -> List[Optional[T]]:
-        items = [await self.cache.get_instance_from_cache(entity_id) for entity_id in ids]
-        missing_ids = [entity_id for entity_id, item in zip(ids, items) if item is None]
+        if not ids:
+            return []
+        self._record_requests(*ids)
+        for entity_id in ids:
+            self._count_request(("instance", entity_id))
+        return await self._get_many_by_ids(ids)
+
+    async def _get_many_by_ids(self, ids: List[str]) -> List[Optional[T]]:
+        items = [self._get_local(("instance", entity_id)) for entity_id in ids]
+        cache_ids = list(
+            dict.fromkeys(
+                entity_id
+                for entity_id, item in zip(ids, items)
+                if item is None and not self._is_known_missing(entity_id)
+            )
+        )
+
+        if cache_ids:
+            entries = await self.cache.get_many_instances_from_cache(cache_ids)
+            # Ids cached as missing map to None, so they are not looked up in the search engine
+            found_by_id = {entity_id: entry.value for entity_id, entry in zip(cache_ids, entries) if entry}
+            for entity_id, entry in zip(cache_ids, entries):
+                if entry and entry.is_missing:
+                    self._add_missing(entity_id)
+            stale_ids = [entity_id for entity_id, entry in zip(cache_ids, entries) if entry and entry.is_stale]
+            if stale_ids:
+                self._revalidate(("instances", *stale_ids), None, lambda: self._load_many_instances(stale_ids))
+            for entity_id, item in found_by_id.items():
+                if item is not None:
+                    self._put_local(("instance", entity_id), item)
+            missing_ids = [entity_id for entity_id in cache_ids if entity_id not in found_by_id]
+            if missing_ids:
+                found_by_id.update((item.id, item) for item in await self._load_many_instances(missing_ids))
+            items = [item or found_by_id.get(entity_id) for entity_id, item in zip(ids, items)]
+
+        return items
 
+    async def preload(self, ids: List[str]) -> None:
+        """Loads the documents missing from the cache, unlike lookups it does not count them as requested."""
+        entries = await self.cache.get_many_instances_from_cache(ids)
+        for entity_id, entry in zip(ids, entries):
+            if entry and not entry.is_missing:
+                self._put_local(("instance", entity_id), entry.value)
+        missing_ids = [entity_id for entity_id, entry in zip(ids, entries) if not entry or entry.is_stale]
         if missing_ids:
-            for missing_id in missing_ids:
-                item = await self.search.get_by_id(missing_id)
-                if item:
-                    await self.cache.put_instance_to_cache(item)
-                    items[ids.index(missing_id)] = item
+            await self._load_many_instances(missing_ids)
 
+    async def preload_page(self, page_number: int, page_size: int, sort: str | None = None) -> int:
+        """
+        Loads the page of all the documents missing from the cache, without counting it as requested.
+
+        Returns the number of documents on the page.
+        """
+        if settings.cache_normalized_lists:
+            entry = await self.cache.get_id_page_from_cache(
+                search=None, page_size=page_size, page_number=page_number, sort=sort
+            )
+            if entry and not entry.is_stale:
+                await self.preload(entry.value.ids)
+                return len(entry.value.ids)
+            items = await self._load_normalized_list(page_number=page_number, page_size=page_size, sort=sort)
+        else:
+            raw_entry = await self.cache.get_raw_list_from_cache(
+                search=None, page_size=page_size, page_number=page_number, sort=sort
+            )
+            if raw_entry and not raw_entry.is_stale:
+                return len(orjson.loads(raw_entry.value))
+            items = await self._load_list(page_number=page_number, page_size=page_size, sort=sort)
+        return len(items or [])
+
+    async def invalidate(self, ids: List[str], generation: Optional[int] = None):
+        """Drops cached copies of the changed documents together with every cached list."""
+        await self.cache.invalidate_instances(ids)
+        await self.cache.invalidate_lists(generation)
+        if self.missing_ids is not None:
+            # Created documents may be among the ids known to be missing
+            if ids:
+                self.missing_ids.remove(*ids)
+            else:
+                self.missing_ids.clear()
+        if self.local_cache is not None:
+            self.local_cache.delete(*[("instance", entity_id) for entity_id in ids])
+            self.local_cache.delete(*[("raw_instance", entity_id) for entity_id in ids])
+            self.local_cache.delete_matching(lambda key: key[0] in ("list", "raw_list"))
+
+    async def _load_instance(self, instance_id: str) -> Optional[T]:
+        item = await self.search.get_by_id(instance_id)
+        if item:
+            await self.cache.put_instance_to_cache(item, hot=self._is_hot(("instance", instance_id)))
+            self._put_local(("instance", instance_id), item)
+            self._delete_local(("raw_instance", instance_id))
+        else:
+            await self.cache.put_missing_instances_to_cache([instance_id])
+            self._add_missing(instance_id)
+        return item
+
+    async def _load_many_instances(self, instance_ids: List[str]) -> List[T]:
+        items = [item for item in await self.search.get_many_by_ids(instance_ids) if item]
+        if items:
+            await self.cache.put_many_instances_to_cache(items, hot_ids=self._get_hot_ids(items))
+        found_ids = {item.id for item in items}
+        missing_ids = [instance_id for instance_id in instance_ids if instance_id not in found_ids]
+        if missing_ids:
+            await self.cache.put_missing_instances_to_cache(missing_ids)
+        for instance_id in missing_ids:
+            self._add_missing(instance_id)
+        for item in items:
+            self._put_local(("instance", item.id), item)
+            self._delete_local(("raw_instance", item.id))
         return items
+
+    async def _load_list(
+        self, page_number: int, page_size: int, search: str | None = None, sort: str | None = None
+    ) -> Optional[List[T]]:
+        items = await self.search.get_by_parameters(
+            search=search, page_number=page_number, page_size=page_size, sort=sort
+        )
+        if items:
+            await self.cache.put_list_to_cache(
+                search=search,
+                page_number=page_number,
+                page_size=page_size,
+                sort=sort,
+                instances=items,
+                hot=self._is_hot(self._list_key("list", search, sort, page_size, page_number)),
+            )
+            self._put_local(self._list_key("list", search, sort, page_size, page_number), items)
+            self._delete_local(self._list_key("raw_list", search, sort, page_size, page_number))
+        return items
+
+    async def _get_normalized_list(
+        self, page_number: int, page_size: int, search: str | None = None, sort: str | None = None
+    ) -> List[T]:
+        """
+        Returns the page cached as the ids of its documents, the documents are read from the instance cache.
+
+        Every document is cached once, however many pages it appears on, and a page
+        reflects the changes of its documents as soon as their instances are invalidated.
+        """
+        local_key = self._list_key("list", search, sort, page_size, page_number)
+        lock_name = self._list_lock_name(search, sort, page_size, page_number)
+
+        def load():
+            return self._load_normalized_list(search=search, page_number=page_number, page_size=page_size, sort=sort)
+
+        async def read_cache() -> Optional[CacheEntry[List[T]]]:
+            entry = await self.cache.get_id_page_from_cache(
+                search=search, page_size=page_size, page_number=page_number, sort=sort
+            )
+            if entry is None:
+                return None
+            # Documents deleted since the page was cached are skipped, the page read is not a request of each of them
+            items = [item for item in await self._get_many_by_ids(entry.value.ids) if item]
+            return CacheEntry(items, entry.is_stale)
+
+        entry = await read_cache()
+        if entry and entry.value:
+            if entry.is_stale:
+                self._revalidate(local_key, lock_name, load)
+            self._put_local(local_key, entry.value)
+            return entry.value
+        items = await self._single_flight.do(
+            local_key, lambda: self._load_with_lock(lock_name=lock_name, read_cache=read_cache, load=load)
+        )
+        return items or []
+
+    async def _get_raw_normalized_list(
+        self, page_number: int, page_size: int, search: str | None = None, sort: str | None = None
+    ) -> bytes:
+        entry = await self.cache.get_id_page_from_cache(
+            search=search, page_size=page_size, page_number=page_number, sort=sort
+        )
+        if entry:
+            instance_entries = await self.cache.get_many_raw_instances_from_cache(entry.value.ids)
+            if entry.value.ids and all(instance and not instance.is_missing for instance in instance_entries):
+                if entry.is_stale:
+                    self._revalidate(
+                        self._list_key("list", search, sort, page_size, page_number),
+                        self._list_lock_name(search, sort, page_size, page_number),
+                        lambda: self._load_normalized_list(
+                            search=search, page_number=page_number, page_size=page_size, sort=sort
+                        ),
+                    )
+                stale_ids = [
+                    entity_id for entity_id, instance in zip(entry.value.ids, instance_entries) if instance.is_stale
+                ]
+                if stale_ids:
+                    self._revalidate(("instances", *stale_ids), None, lambda: self._load_many_instances(stale_ids))
+                return b"[" + b",".join(instance.value for instance in instance_entries) + b"]"
+        items = await self._get_normalized_list(search=search, page_number=page_number, page_size=page_size, sort=sort)
+        return orjson.dumps([item.model_dump(mode="json") for item in items])
+
+    async def _get_raw_projection(
+        self,
+        page_number: int,
+        page_size: int,
+        fields: Tuple[str, ...],
+        search: str | None = None,
+        sort: str | None = None,
+    ) -> bytes:
+        local_key = self._list_key("raw_list", search, sort, page_size, page_number, fields)
+        data = self._get_local(local_key)
+        if data:
+            return data
+        lock_name = self._list_lock_name(search, sort, page_size, page_number, fields)
+
+        def load():
+            return self._load_projection(
+                search=search, page_number=page_number, page_size=page_size, sort=sort, fields=fields
+            )
+
+        def read_cache():
+            return self.cache.get_raw_list_from_cache(
+                search=search, page_size=page_size, page_number=page_number, sort=sort, fields=fields
+            )
+
+        entry = await read_cache()
+        if entry:
+            if entry.is_stale:
+                self._revalidate(local_key, lock_name, load)
+            data = entry.value
+        else:
+            data = await self._single_flight.do(
+                local_key, lambda: self._load_with_lock(lock_name=lock_name, read_cache=read_cache, load=load)
+            )
+        self._put_local(local_key, data)
+        return data
+
+    async def _load_normalized_list(
+        self, page_number: int, page_size: int, search: str | None = None, sort: str | None = None
+    ) -> Optional[List[T]]:
+        page = await self.search.get_page_by_parameters(
+            search=search, page_number=page_number, page_size=page_size, sort=sort
+        )
+        if not page or not page.items:
+            return page.items if page else None
+        await self.cache.put_many_instances_to_cache(page.items, hot_ids=self._get_hot_ids(page.items))
+        await self.cache.put_id_page_to_cache(
+            search=search,
+            page_number=page_number,
+            page_size=page_size,
+            sort=sort,
+            id_page=CachedIdPage(ids=[item.id for item in page.items], total=page.total),
+            hot=self._is_hot(self._list_key("list", search, sort, page_size, page_number)),
+        )
+        for item in page.items:
+            self._put_local(("instance", item.id), item)
+            self._delete_local(("raw_instance", item.id))
+        self._put_local(self._list_key("list", search, sort, page_size, page_number), page.items)
+        self._delete_local(self._list_key("raw_list", search, sort, page_size, page_number))
+        return page.items
+
+    async def _load_projection(
+        self,
+        page_number: int,
+        page_size: int,
+        fields: Tuple[str, ...],
+        search: str | None = None,
+        sort: str | None = None,
+    ) -> bytes:
+        items = await self.search.get_projection_by_parameters(
+            search=search, page_number=page_number, page_size=page_size, sort=sort, fields=fields
+        )
+        if items:
+            await self.cache.put_projection_list_to_cache(
+                search=search,
+                page_number=page_number,
+                page_size=page_size,
+                sort=sort,
+                fields=fields,
+                items=items,
+                hot=self._is_hot(self._list_key("list", search, sort, page_size, page_number, fields)),
+            )
+            self._delete_local(self._list_key("raw_list", search, sort, page_size, page_number, fields))
+        return orjson.dumps(items or [])
+
+    async def _load_with_lock(
+        self,
+        lock_name: str,
+        read_cache: Callable[[], Awaitable],
+        load: Callable[[], Awaitable],
+    ):
+        """
+        Runs `load` unless another worker is already rebuilding the same cache entry.
+
+        The worker that fails to take the lock polls the cache for the entry rebuilt by the
+        lock owner and only queries the search engine itself once the wait time is over.
+        """
+        if not settings.cache_lock_enabled:
+            return await load()
+        token = await self.cache.acquire_lock(lock_name)
+        if token is None:
+            deadline = time.monotonic() + settings.cache_lock_wait_time
+            while time.monotonic() < deadline:
+                await asyncio.sleep(settings.cache_lock_poll_interval)
+                entry = await read_cache()
+                if entry and (entry.value or entry.is_missing):
+                    return entry.value
+            return await load()
+        try:
+            return await load()
+        finally:
+            await self.cache.release_lock(lock_name, token)
+
+    def _revalidate(self, key: Hashable, lock_name: str | None, load: Callable[[], Awaitable]) -> None:
+        """Refreshes a stale cache entry in the background while the stale value is being served."""
+        refresh_key = ("revalidate", key)
+        if refresh_key in self._single_flight:
+            return
+        task = asyncio.ensure_future(self._single_flight.do(refresh_key, lambda: self._refresh(lock_name, load)))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._on_refreshed)
+
+    async def _refresh(self, lock_name: str | None, load: Callable[[], Awaitable]):
+        if not settings.cache_lock_enabled or lock_name is None:
+            return await load()
+        token = await self.cache.acquire_lock(lock_name)
+        if token is None:
+            # Another worker is already refreshing the entry
+            return None
+        try:
+            return await load()
+        finally:
+            await self.cache.release_lock(lock_name, token)
+
+    def _on_refreshed(self, task: asyncio.Task) -> None:
+        self._background_tasks.discard(task)
+        if not task.cancelled() and task.exception():
+            logger.error("Failed to refresh stale cache entry: %s", task.exception())
+
+    @staticmethod
+    def _list_key(kind: str, search: str | None, sort: str | None, page_size: int, page_number: int, *fields) -> tuple:
+        # Texts differing only by case, spacing or unicode representation share the cached page
+        return (kind, normalize_search(search), sort, page_size, page_number, *fields)
+
+    @staticmethod
+    def _list_lock_name(
+        search: str | None, sort: str | None, page_size: int, page_number: int, fields: Tuple[str, ...] = ()
+    ) -> str:
+        name = f"list_{normalize_search(search) or ''}_{sort or ''}_{page_size}_{page_number}"
+        return f"{name}_{','.join(fields)}" if fields else name
+
+    def _record_requests(self, *instance_ids: str) -> None:
+        if self.popularity is not None:
+            self.popularity.record(*instance_ids)
+
+    def _is_known_missing(self, instance_id: str) -> bool:
+        return self.missing_ids is not None and instance_id in self.missing_ids
+
+    def _add_missing(self, instance_id: str) -> None:
+        if self.missing_ids is not None:
+            self.missing_ids.add(instance_id)
+
+    def _is_hot(self, key: tuple) -> bool:
+        """Whether the document or the page is among the frequently requested ones, in any of its forms."""
+        if self.frequency is None:
+            return False
+        raw_key = (f"raw_{key[0]}", *key[1:])
+        frequency = self.frequency.estimate(key) + self.frequency.estimate(raw_key)
+        return frequency >= settings.cache_hot_key_min_frequency
+
+    def _get_hot_ids(self, items: List[T]) -> Set[str]:
+        return {item.id for item in items if self._is_hot(("instance", item.id))}
+
+    def _count_request(self, key: tuple) -> None:
+        """Counts a request once, at the public method serving it, however many local lookups it makes."""
+        if self.frequency is not None:
+            self.frequency.increment(key)
+
+    def _get_local(self, key: tuple):
+        if self.local_cache is None:
+            return None
+        return self.local_cache.get(key)
+
+    def _put_local(self, key: tuple, value) -> None:
+        if self.local_cache is not None:
+            self.local_cache.set(key, value)
+
+    def _delete_local(self, key: tuple) -> None:
+        if self.local_cache is not None:
+            self.local_cache.delete(key)
@@ -0,0 +1,165 @@
+import asyncio
+from typing import Dict, Tuple
+
+import orjson
+from benchmarks.fake_backends import (
+    FakeCacheStorage,
+    FakeSearchEngine,
+    SimulatedLatency,
+)
+from cache_storage.frequency_sketch import FrequencySketch
+from cache_storage.instrumented import InstrumentedCacheStorage
+from cache_storage.local_cache import LocalCache
+from core import profiling
+from core.config import settings
+from main import app
+from prometheus_client.parser import text_string_to_metric_families
+from search_engine.instrumented import InstrumentedSearchEngine
+from services.film import get_film_service
+from services.genre import get_genre_repository, get_genre_service
+from services.person import get_person_service
+
+TOKEN = "secret"
+
+
+def call_app(path: str, headers: Dict[str, str] | None = None, query: str = "") -> Tuple[int, bytes]:
+    """
+    Sends a GET request straight to the ASGI application, returns the status and the body of the response.
+
+    The application is not started: the backends of the routes are given by the dependency overrides.
+    """
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(b"host", b"test")]
+        + [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()],
+        "client": ("127.0.0.1", 0),
+        "server": ("test", 80),
+    }
+    response = {"status": 0, "body": b""}
+
+    async def receive() -> dict:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: dict) -> None:
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            response["body"] += message.get("body", b"")
+
+    asyncio.run(app(scope, receive, send))
+    return response["status"], response["body"]
+
+
+def test_local_caches_report_the_stats_of_every_index(monkeypatch):
+    monkeypatch.setattr(settings, "admin_token", TOKEN)
+    storage, engine = FakeCacheStorage(), FakeSearchEngine({})
+    services = {
+        get_service: get_service.__wrapped__(redis=storage, elastic=engine)
+        for get_service in (get_film_service, get_genre_service, get_person_service)
+    }
+    sketch = FrequencySketch(width=1024, depth=4, sample_size=10000)
+    local_cache = LocalCache(max_entries=1, max_bytes=1000, expiration_time=30, sizeof=len, sketch=sketch)
+    services[get_film_service].local_cache = local_cache
+    services[get_genre_service].local_cache = local_cache
+    services[get_person_service].local_cache = None
+    overrides = {get_service: (lambda service=service: service) for get_service, service in services.items()}
+    monkeypatch.setattr(app, "dependency_overrides", overrides)
+    sketch.increment("first")
+    local_cache.set("first", b"1")
+    local_cache.set("second", b"2")
+    local_cache.get("first")
+    local_cache.get("second")
+
+    status, body = call_app("/api/v1/admin/local-caches", {"X-Admin-Token": TOKEN})
+
+    assert status == 200
+    stats = {"entries": 1, "size_bytes": 1, "hits": 1, "misses": 1, "evictions": 0, "rejections": 1}
+    assert orjson.loads(body) == {"movies": stats, "genres": stats, "persons": None}
+
+
+def test_genre_routes_send_the_json_of_the_models(monkeypatch):
+    genres = [{"id": str(i), "name": f"Genre {i}", "description": "Описание"} for i in range(3)]
+    service = get_genre_service.__wrapped__(redis=FakeCacheStorage(), elastic=FakeSearchEngine({"genres": genres}))
+    monkeypatch.setattr(app, "dependency_overrides", {get_genre_repository: lambda: service})
+
+    async def get_models():
+        return await service.get_by_id("1"), await service.get_many_by_parameters(page_number=1, page_size=2)
+
+    genre, page = asyncio.run(get_models())
+    # The models are cached, so the routes are served from the cache
+    for _ in range(2):
+        status, body = call_app("/api/v1/genres/1")
+        assert status == 200
+        assert orjson.loads(body) == genre.model_dump(mode="json")
+        status, body = call_app("/api/v1/genres/search", query="page_number=1&page_size=2")
+        assert status == 200
+        assert orjson.loads(body) == [item.model_dump(mode="json") for item in page]
+    assert call_app("/api/v1/genres/unknown")[0] == 404
+
+
+def test_metrics_report_the_time_requests_spend_in_every_layer(monkeypatch):
+    genres = [{"id": "1", "name": "Drama", "description": None}]
+    service = get_genre_service.__wrapped__(
+        redis=InstrumentedCacheStorage(FakeCacheStorage()),
+        elastic=InstrumentedSearchEngine(FakeSearchEngine({"genres": genres})),
+    )
+    service.local_cache = None
+    monkeypatch.setattr(app, "dependency_overrides", {get_genre_repository: lambda: service})
+
+    assert call_app("/api/v1/genres/1")[0] == 200
+    status, body = call_app("/metrics")
+
+    assert status == 200
+    layers = {
+        sample.labels["layer"]
+        for family in text_string_to_metric_families(body.decode())
+        if family.name == "movies_api_request_layer_duration_seconds"
+        for sample in family.samples
+        if sample.name.endswith("_count") and sample.labels["route"] == "/api/v1/genres/{genre_id}"
+    }
+    assert layers == {"redis", "elasticsearch", "application"}
+
+
+def test_slow_profiled_requests_are_kept_with_their_spans(monkeypatch):
+    monkeypatch.setattr(settings, "admin_token", TOKEN)
+    monkeypatch.setattr(settings, "profiling_token", "profile")
+    monkeypatch.setattr(profiling, "slow_requests", profiling.SlowRequestLog(threshold=0.04, max_size=10))
+    genres = [{"id": str(i), "name": "Drama", "description": None} for i in range(2)]
+    engine = FakeSearchEngine({"genres": genres}, latency=SimulatedLatency(0.05))
+    service = get_genre_service.__wrapped__(redis=FakeCacheStorage(), elastic=engine)
+    service.local_cache = LocalCache(max_entries=10, max_bytes=1000, expiration_time=30)
+    monkeypatch.setattr(app, "dependency_overrides", {get_genre_repository: lambda: service})
+
+    # The first request waits for the search engine, the second one is served from the local cache
+    for _ in range(2):
+        assert call_app("/api/v1/genres/1", {"X-Profile-Token": "profile"})[0] == 200
+    # Slow requests sent without the profiling token are not profiled
+    assert call_app("/api/v1/genres/0")[0] == 200
+    status, body = call_app("/api/v1/admin/slow-requests", {"X-Admin-Token": TOKEN})
+
+    assert status == 200
+    (profile,) = orjson.loads(body)
+    assert (profile["method"], profile["path"], profile["status"]) == ("GET", "/api/v1/genres/1", 200)
+    assert profile["wall"] >= 0.04
+    spans = {span["name"]: span for span in profile["spans"]}
+    assert spans["search.get_by_id"]["count"] == 1
+    assert spans["search.get_by_id"]["wall"] >= 0.04
+    assert "cache.get_raw_instance_from_cache" in spans
+
+
+def test_admin_routes_are_hidden_without_the_configured_token(monkeypatch):
+    monkeypatch.setattr(settings, "admin_token", None)
+    assert call_app("/api/v1/admin/slow-requests", {"X-Admin-Token": TOKEN})[0] == 404
+
+    monkeypatch.setattr(settings, "admin_token", TOKEN)
+    assert call_app("/api/v1/admin/slow-requests")[0] == 403
+    assert call_app("/api/v1/admin/slow-requests", {"X-Admin-Token": "wrong"})[0] == 403
+    assert call_app("/api/v1/admin/slow-requests", {"X-Admin-Token": TOKEN})[0] == 200
@@ -0,0 +1,155 @@
+import asyncio
+
+from elastic_transport import (
+    ApiResponseMeta,
+    HttpHeaders,
+    NodeConfig,
+    ObjectApiResponse,
+)
+from elasticsearch import ConnectionError, NotFoundError
+from search_engine.batching import MultiGetBatcher, MultiSearchBatcher
+
+META = ApiResponseMeta(
+    status=200, http_version="1.1", headers=HttpHeaders(), duration=0, node=NodeConfig("http", "localhost", 9200)
+)
+
+
+class FakeSearchEngine:
+    def __init__(self, documents=None, error=None):
+        self.documents = documents or {}
+        self.error = error
+        self.calls = []
+
+    async def msearch(self, searches):
+        self.calls.append(("msearch", searches))
+        if self.error:
+            raise self.error
+        responses = []
+        for header, body in zip(searches[::2], searches[1::2]):
+            if header.get("index") == "missing":
+                responses.append({"status": 404, "error": {"type": "index_not_found_exception"}})
+            else:
+                responses.append({"status": 200, "hits": {"hits": [], "total": {"value": 0}}, "query": body})
+        return ObjectApiResponse(body={"responses": responses}, meta=META)
+
+    async def mget(self, index, ids):
+        self.calls.append(("mget", index, ids))
+        if self.error:
+            raise self.error
+        if index == "broken":
+            raise ConnectionError("Connection refused")
+        if index == "missing":
+            raise NotFoundError(message="index_not_found_exception", meta=META, body={})
+        return {
+            "docs": [
+                {"_id": document_id, "found": True, "_source": self.documents[index][document_id]}
+                if document_id in self.documents.get(index, {})
+                else {"_id": document_id, "found": False}
+                for document_id in ids
+            ]
+        }
+
+
+def test_concurrent_searches_are_sent_in_one_multi_search():
+    async def scenario():
+        search_engine = FakeSearchEngine()
+        batcher = MultiSearchBatcher(search_engine=search_engine, window=0.01, max_size=10)
+
+        responses = await asyncio.gather(
+            batcher.search(index="movies", body={"query": 1}),
+            batcher.search(index=None, body={"query": 2}),
+        )
+
+        assert [response["query"] for response in responses] == [{"query": 1}, {"query": 2}]
+        assert search_engine.calls == [("msearch", [{"index": "movies"}, {"query": 1}, {}, {"query": 2}])]
+
+    asyncio.run(scenario())
+
+
+def test_full_batch_is_sent_without_waiting_for_the_window():
+    async def scenario():
+        search_engine = FakeSearchEngine()
+        batcher = MultiSearchBatcher(search_engine=search_engine, window=60, max_size=2)
+
+        await asyncio.wait_for(
+            asyncio.gather(*[batcher.search(index="movies", body={"query": i}) for i in range(4)]), timeout=1
+        )
+
+        assert len(search_engine.calls) == 2
+
+    asyncio.run(scenario())
+
+
+def test_failed_search_fails_only_its_own_request():
+    async def scenario():
+        batcher = MultiSearchBatcher(search_engine=FakeSearchEngine(), window=0.01, max_size=10)
+
+        found, missing = await asyncio.gather(
+            batcher.search(index="movies", body={}),
+            batcher.search(index="missing", body={}),
+            return_exceptions=True,
+        )
+
+        assert found["status"] == 200
+        assert isinstance(missing, NotFoundError)
+        assert missing.meta.status == 404
+
+    asyncio.run(scenario())
+
+
+def test_failed_batch_fails_every_request():
+    async def scenario():
+        error = ConnectionError("Connection refused")
+        batcher = MultiSearchBatcher(search_engine=FakeSearchEngine(error=error), window=0.01, max_size=10)
+
+        results = await asyncio.gather(
+            batcher.search(index="movies", body={}), batcher.search(index="genres", body={}), return_exceptions=True
+        )
+
+        assert results == [error, error]
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_lookups_are_sent_in_one_multi_get_per_index():
+    async def scenario():
+        search_engine = FakeSearchEngine(documents={"movies": {"1": {"id": "1"}, "2": {"id": "2"}}, "genres": {}})
+        batcher = MultiGetBatcher(search_engine=search_engine, window=0, max_size=10)
+
+        documents = await asyncio.gather(
+            batcher.get(index="movies", id="1"),
+            batcher.get(index="movies", id="1"),
+            batcher.get(index="movies", id="2"),
+            batcher.get(index="movies", id="unknown"),
+            batcher.get(index="genres", id="1"),
+        )
+
+        assert [document and document["_source"] for document in documents] == [
+            {"id": "1"},
+            {"id": "1"},
+            {"id": "2"},
+            None,
+            None,
+        ]
+        assert sorted(search_engine.calls) == [("mget", "genres", ["1"]), ("mget", "movies", ["1", "2", "unknown"])]
+
+    asyncio.run(scenario())
+
+
+def test_failed_multi_get_fails_only_the_lookups_of_its_index():
+    async def scenario():
+        search_engine = FakeSearchEngine(documents={"movies": {"1": {"id": "1"}}})
+        batcher = MultiGetBatcher(search_engine=search_engine, window=0, max_size=10)
+
+        found, missing_index, broken_index = await asyncio.gather(
+            batcher.get(index="movies", id="1"),
+            batcher.get(index="missing", id="1"),
+            batcher.get(index="broken", id="1"),
+            return_exceptions=True,
+        )
+
+        assert found["_source"] == {"id": "1"}
+        assert missing_index is None
+        assert isinstance(broken_index, ConnectionError)
+
+    asyncio.run(scenario())
@@ -0,0 +1,60 @@
+from cache_storage.bloom_filter import BloomFilter
+
+
+def test_added_strings_are_contained():
+    bloom_filter = BloomFilter(capacity=1000, error_rate=0.01)
+    for i in range(500):
+        bloom_filter.add(f"id-{i}")
+
+    assert all(f"id-{i}" in bloom_filter for i in range(500))
+    assert len(bloom_filter) == 500
+
+
+def test_strings_not_added_are_reported_at_about_the_error_rate():
+    bloom_filter = BloomFilter(capacity=1000, error_rate=0.01)
+    for i in range(1000):
+        bloom_filter.add(f"id-{i}")
+
+    false_positives = sum(f"other-{i}" in bloom_filter for i in range(10000))
+
+    assert false_positives < 300
+
+
+def test_removed_strings_are_no_longer_contained():
+    bloom_filter = BloomFilter(capacity=1000, error_rate=0.01)
+    bloom_filter.add("removed")
+    bloom_filter.add("kept")
+
+    bloom_filter.remove("removed", "never added")
+
+    assert "removed" not in bloom_filter
+    assert "kept" in bloom_filter
+    assert len(bloom_filter) == 1
+
+
+def test_string_added_twice_is_contained_until_removed_twice():
+    bloom_filter = BloomFilter(capacity=1000, error_rate=0.01)
+    bloom_filter.add("id")
+    bloom_filter.add("id")
+
+    bloom_filter.remove("id")
+    assert "id" in bloom_filter
+    bloom_filter.remove("id")
+    assert "id" not in bloom_filter
+
+
+def test_filter_is_emptied_when_full_or_expired(monkeypatch):
+    bloom_filter = BloomFilter(capacity=2, error_rate=0.01)
+    bloom_filter.add("first")
+    bloom_filter.add("second")
+    bloom_filter.add("third")
+
+    assert "first" not in bloom_filter
+    assert "third" in bloom_filter
+
+    expiring = BloomFilter(capacity=10, error_rate=0.01, expiration_time=60)
+    expiring.add("id")
+    monkeypatch.setattr(expiring, "_created_at", expiring._created_at - 61)
+
+    assert "id" not in expiring
+    assert len(expiring) == 0
@@ -0,0 +1,78 @@
+import asyncio
+from functools import partial
+
+import orjson
+from benchmarks.fake_backends import FakeCacheStorage, FakeSearchEngine
+from cache_storage.local_cache import LocalCache
+from core.config import settings
+from models.genre import Genre
+from services.cache_invalidation import CacheInvalidationListener
+from services.caching_service import RedisCacheService, automatic_cache_deserializer
+from services.search_service import ElasticSearchService, automatic_search_deserializer
+from services.searchable_model_service import SearchableModelService
+
+CHANNEL = "changes"
+
+
+async def publish_changes(storage, index, ids):
+    """Publishes the changed documents as the ETL does: the generation of the index lists is switched first."""
+    generation = await storage.incr(f"{index}_generation")
+    await storage.publish(CHANNEL, orjson.dumps({"index": index, "ids": ids, "generation": generation}))
+
+
+async def wait_for(condition, timeout=1):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "Condition was not met in time"
+        await asyncio.sleep(0.001)
+
+
+def test_published_changes_evict_local_and_redis_entries(monkeypatch):
+    monkeypatch.setattr(settings, "cache_normalized_lists", False)
+
+    async def scenario():
+        storage = FakeCacheStorage()
+        engine = FakeSearchEngine({"genres": [{"id": str(i), "name": f"Genre {i}", "description": None} for i in "12"]})
+        service = SearchableModelService[Genre](
+            caching_service=RedisCacheService(
+                cache_storage=storage,
+                prefix_single="genre",
+                prefix_plural="genres",
+                deserialize=partial(automatic_cache_deserializer, Genre),
+            ),
+            search_service=ElasticSearchService(
+                search_engine=engine,
+                index="genres",
+                deserialize=partial(automatic_search_deserializer, Genre),
+            ),
+            local_cache=LocalCache(max_entries=100, max_bytes=1024 * 1024, expiration_time=30),
+        )
+        listener = CacheInvalidationListener(cache_storage=storage, channel=CHANNEL, services={"genres": service})
+        listener.start()
+        await wait_for(lambda: storage._subscribers)
+        # Lists are dropped once the listener is subscribed, the changes published before are lost
+        await asyncio.sleep(0.01)
+        await service.get_by_id("1")
+        await service.get_by_id("2")
+        await service.get_many_by_parameters(page_number=1, page_size=2)
+        assert await service.cache.get_list_from_cache(page_size=2, page_number=1)
+        await engine.index(index="genres", id="1", document={"id": "1", "name": "Updated", "description": None})
+
+        await publish_changes(storage, "genres", ["1"])
+        await wait_for(lambda: service.cache.keys.instance("1") not in storage._values)
+
+        assert storage._values["genres_generation"] == b"1"
+        assert await service.cache.get_list_from_cache(page_size=2, page_number=1) is None
+        assert service.local_cache.get(("instance", "1")) is None
+        assert service.local_cache.get(("list", None, None, 2, 1)) is None
+        # Documents that did not change stay cached
+        assert service.cache.keys.instance("2") in storage._values
+        assert service.local_cache.get(("instance", "2")) is not None
+        assert (await service.get_by_id("1")).name == "Updated"
+        assert [genre.name for genre in await service.get_many_by_parameters(page_number=1, page_size=2)] == [
+            "Updated",
+            "Genre 2",
+        ]
+        await listener.stop()
+
+    asyncio.run(scenario())
@@ -0,0 +1,48 @@
+from services.cache_keys import CacheKeyBuilder, normalize_search
+
+
+def create_keys(max_length=200):
+    return CacheKeyBuilder(prefix_plural="movies", prefix_single="movie", schema_version=2, max_length=max_length)
+
+
+def test_keys_start_with_the_schema_version():
+    keys = create_keys()
+
+    assert keys.instance("42") == "v2:movie_42"
+    assert (
+        keys.list(3, page_size=10, page_number=1, search="star", sort="-imdb_rating")
+        == "v2:movies_3_star_-imdb_rating_10_1"
+    )
+    assert keys.list(3, page_size=10, page_number=1, fields=("id", "title")) == "v2:movies_3___10_1_id,title"
+    assert keys.id_page(3, page_size=10, page_number=2) == "v2:movies_3_ids___10_2"
+    assert keys.lock("warm_up") == "v2:movies_lock_warm_up"
+
+
+def test_keys_shared_with_other_versions_are_not_versioned():
+    keys = create_keys()
+
+    assert keys.generation() == "movies_generation"
+    assert keys.popularity() == "movies_popularity"
+
+
+def test_long_keys_have_their_variable_part_hashed():
+    keys = create_keys(max_length=40)
+
+    long_key = keys.list(3, page_size=10, page_number=1, search="star " * 20)
+    other_key = keys.list(3, page_size=10, page_number=1, search="wars " * 20)
+
+    assert long_key.startswith("v2:movies_3_#")
+    assert len(long_key) == len("v2:movies_3_#") + 32
+    assert long_key != other_key
+    assert keys.list(3, page_size=10, page_number=1, search="star") == "v2:movies_3_star__10_1"
+
+
+def test_variants_of_a_search_text_share_the_keys():
+    keys = create_keys()
+
+    assert normalize_search("  Ｓtar   WARS ") == "star wars"
+    assert normalize_search("   ") is None
+    assert keys.list(1, page_size=10, page_number=1, search="Star  Wars") == keys.list(
+        1, page_size=10, page_number=1, search="star wars"
+    )
+    assert keys.id_page(1, page_size=10, page_number=1, search="   ") == keys.id_page(1, page_size=10, page_number=1)
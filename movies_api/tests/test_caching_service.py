@@ -0,0 +1,36 @@
+import time
+
+from core.config import settings
+from services.caching_service import _get_expire_times
+
+
+def test_expire_times_are_jittered_within_bounds(monkeypatch):
+    monkeypatch.setattr(settings, "cache_expire_time", 300)
+    monkeypatch.setattr(settings, "cache_fresh_time", 240)
+    monkeypatch.setattr(settings, "cache_expire_jitter", 0.1)
+    monkeypatch.setattr(settings, "cache_hot_expire_factor", 4)
+
+    for hot, expire_time in ((False, 300), (True, 1200)):
+        expire_times, fresh_times = set(), set()
+        for _ in range(200):
+            started_at = time.time()
+            stale_at, ttl = _get_expire_times(hot)
+            fresh_time = stale_at - started_at
+            assert expire_time * 0.9 <= ttl <= expire_time * 1.1
+            assert 240 * 0.9 - 1 <= fresh_time <= min(240 * 1.1, ttl)
+            expire_times.add(ttl)
+            fresh_times.add(round(fresh_time))
+        # Keys written in the same burst do not expire together
+        assert len(expire_times) > 10
+        assert len(fresh_times) > 10
+
+
+def test_entries_never_become_stale_without_stale_while_revalidate(monkeypatch):
+    monkeypatch.setattr(settings, "cache_stale_while_revalidate", False)
+    monkeypatch.setattr(settings, "cache_expire_time", 300)
+    monkeypatch.setattr(settings, "cache_expire_jitter", 0.1)
+
+    stale_at, ttl = _get_expire_times()
+
+    assert stale_at is None
+    assert 270 <= ttl <= 330
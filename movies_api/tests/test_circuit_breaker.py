@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+from backoff.circuit_breaker import (
+    BackendUnavailableError,
+    CircuitBreaker,
+    guard_public_methods,
+)
+
+
+class BackendError(Exception):
+    pass
+
+
+class NotFound(Exception):
+    pass
+
+
+def make_backend(breaker: CircuitBreaker):
+    @guard_public_methods(breaker=breaker, is_failure=lambda error: isinstance(error, BackendError))
+    class Backend:
+        def __init__(self):
+            self.calls = []
+
+        async def call(self, outcome: str = "ok"):
+            self.calls.append(outcome)
+            if outcome == "fail":
+                raise BackendError()
+            if outcome == "not_found":
+                raise NotFound()
+            if outcome == "hang":
+                await asyncio.sleep(10)
+            return outcome
+
+    return Backend()
+
+
+def open_circuit(breaker: CircuitBreaker) -> None:
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    breaker._opened_at -= breaker.recovery_time
+
+
+def test_non_failure_exception_of_trial_closes_circuit():
+    async def scenario():
+        breaker = CircuitBreaker("test", failure_threshold=1, recovery_time=60)
+        backend = make_backend(breaker)
+        open_circuit(breaker)
+
+        with pytest.raises(NotFound):
+            await backend.call("not_found")
+
+        assert not breaker.is_open
+        assert await backend.call() == "ok"
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_trial_lets_next_call_through():
+    async def scenario():
+        breaker = CircuitBreaker("test", failure_threshold=1, recovery_time=60)
+        backend = make_backend(breaker)
+        open_circuit(breaker)
+
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(backend.call("hang"), timeout=0.01)
+
+        assert breaker.is_open
+        assert await backend.call() == "ok"
+        assert not breaker.is_open
+
+    asyncio.run(scenario())
+
+
+def test_open_circuit_rejects_calls_while_trial_is_in_flight():
+    async def scenario():
+        breaker = CircuitBreaker("test", failure_threshold=1, recovery_time=60)
+        backend = make_backend(breaker)
+        open_circuit(breaker)
+
+        trial = asyncio.ensure_future(backend.call("hang"))
+        await asyncio.sleep(0)
+        with pytest.raises(BackendUnavailableError):
+            await backend.call()
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+
+        assert await backend.call() == "ok"
+
+    asyncio.run(scenario())
@@ -0,0 +1,75 @@
+import asyncio
+from functools import partial
+
+import orjson
+import pytest
+from benchmarks.fake_backends import FakeCacheStorage
+from cache_storage.codec import (
+    HEADER,
+    CacheCodec,
+    Compression,
+    Serializer,
+    UnsupportedCodecVersionError,
+)
+from models.genre import Genre
+from services.caching_service import RedisCacheService, automatic_cache_deserializer
+
+VALUE = [{"id": "1", "title": "Star Wars", "imdb_rating": 8.6, "genre": ["Action"] * 100}, None]
+
+
+@pytest.mark.parametrize("serializer", list(Serializer))
+@pytest.mark.parametrize("compression", list(Compression))
+def test_round_trip(serializer, compression):
+    codec = CacheCodec(serializer=serializer, compression=compression, compression_threshold=16)
+
+    data = codec.encode(VALUE, stale_at=1700000000.5)
+
+    assert codec.decode(data) == (VALUE, 1700000000.5)
+    assert codec.decode_json(data) == (orjson.dumps(VALUE), 1700000000.5)
+
+
+@pytest.mark.parametrize("compression", [Compression.LZ4, Compression.ZSTD])
+def test_payloads_below_the_threshold_are_not_compressed(compression):
+    codec = CacheCodec(compression=compression, compression_threshold=1024)
+
+    data = codec.encode({"id": "1"})
+
+    assert data[HEADER.size :] == b'{"id":"1"}'
+    assert codec.decode(data) == ({"id": "1"}, None)
+
+
+def test_entries_are_decoded_whatever_codec_wrote_them():
+    data = CacheCodec(serializer=Serializer.MSGPACK, compression=Compression.ZSTD, compression_threshold=0).encode(
+        VALUE
+    )
+
+    assert CacheCodec().decode(data) == (VALUE, None)
+
+
+def test_unknown_version_is_rejected():
+    data = bytes((2,)) + CacheCodec().encode(VALUE)[1:]
+
+    with pytest.raises(UnsupportedCodecVersionError):
+        CacheCodec().decode(data)
+    with pytest.raises(UnsupportedCodecVersionError):
+        CacheCodec().decode_json(data)
+
+
+def test_entries_of_unknown_versions_are_cache_misses():
+    async def scenario():
+        storage = FakeCacheStorage()
+        cache = RedisCacheService(
+            cache_storage=storage,
+            prefix_single="genre",
+            prefix_plural="genres",
+            deserialize=partial(automatic_cache_deserializer, Genre),
+        )
+        await cache.put_instance_to_cache(Genre(id="1", name="Drama", description=None))
+        key = cache.keys.instance("1")
+        storage._values[key] = bytes((2,)) + storage._values[key][1:]
+
+        assert await cache.get_instance_from_cache("1") is None
+        assert await cache.get_raw_instance_from_cache("1") is None
+        assert await cache.get_many_instances_from_cache(["1"]) == [None]
+
+    asyncio.run(scenario())
@@ -0,0 +1,92 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from cache_storage.frequency_sketch import FrequencySketch
+from cache_storage.local_cache import LocalCache
+
+
+def test_estimates_never_undercount():
+    sketch = FrequencySketch(width=64, depth=4, sample_size=10000)
+    for i in range(200):
+        for _ in range(i % 5):
+            sketch.increment(("instance", str(i)))
+
+    assert all(sketch.estimate(("instance", str(i))) >= i % 5 for i in range(200))
+    assert sketch.estimate(("instance", "unknown")) <= 4
+
+
+def test_keys_are_counted_in_the_same_counters_by_every_process():
+    script = (
+        "from cache_storage.frequency_sketch import FrequencySketch; "
+        "print(FrequencySketch(width=1024, depth=4, sample_size=10)._indexes(('instance', '1')))"
+    )
+    indexes = {
+        subprocess.run(
+            [sys.executable, "-c", script],
+            cwd=Path(__file__).parents[1],
+            env={"PYTHONHASHSEED": seed},
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout
+        for seed in ("1", "2")
+    }
+
+    assert len(indexes) == 1
+
+
+def test_counters_are_halved_after_the_sample_size():
+    sketch = FrequencySketch(width=1024, depth=4, sample_size=10, top_size=2)
+    for _ in range(9):
+        sketch.increment("hot")
+    assert sketch.estimate("hot") == 9
+
+    sketch.increment("cold")
+
+    assert sketch.estimate("hot") == 4
+    assert sketch.estimate("cold") == 0
+    assert sketch.get_top() == [("hot", 4)]
+
+
+def test_top_keeps_the_most_frequent_keys():
+    sketch = FrequencySketch(width=1024, depth=4, sample_size=10000, top_size=2)
+    for key, count in (("first", 3), ("second", 1), ("third", 5), ("fourth", 2)):
+        for _ in range(count):
+            sketch.increment(key)
+
+    assert sketch.get_top() == [("third", 5), ("first", 3)]
+
+
+def create_cache(sketch):
+    return LocalCache(max_entries=2, max_bytes=1000, expiration_time=30, sizeof=len, sketch=sketch)
+
+
+def test_full_cache_admits_only_keys_more_frequent_than_the_victim():
+    sketch = FrequencySketch(width=1024, depth=4, sample_size=10000)
+    cache = create_cache(sketch)
+    for key, count in (("first", 3), ("second", 3), ("rare", 1), ("frequent", 4)):
+        for _ in range(count):
+            sketch.increment(key)
+    cache.set("first", b"1")
+    cache.set("second", b"2")
+
+    cache.set("rare", b"3")
+    assert cache.get("rare") is None
+    assert cache.rejections == 1
+
+    cache.set("frequent", b"4")
+    assert cache.get("frequent") == b"4"
+    assert cache.get("first") is None
+
+
+def test_cache_with_room_or_known_key_admits_any_key():
+    sketch = FrequencySketch(width=1024, depth=4, sample_size=10000)
+    cache = create_cache(sketch)
+    cache.set("first", b"1")
+    cache.set("second", b"2")
+
+    cache.set("first", b"updated")
+
+    assert cache.get("first") == b"updated"
+    assert cache.rejections == 0
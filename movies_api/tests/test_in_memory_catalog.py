@@ -0,0 +1,125 @@
+import asyncio
+
+from models.genre import Genre
+from services import in_memory_catalog
+from services.in_memory_catalog import CatalogSnapshot, tokenize
+
+GENRES = [
+    Genre(id="1", name="Comedy", description="The art of making people laugh"),
+    Genre(id="2", name="War", description="Battles of a war and the soldiers"),
+    Genre(id="3", name="Drama", description=None),
+]
+
+
+def build_snapshot(genres):
+    return CatalogSnapshot.build({genre.id: genre for genre in genres}, ("name", "description"))
+
+
+def test_tokenize_splits_the_text_into_normalized_words():
+    assert tokenize("  Ｓci-Fi, WAR of 🎬 worlds ") == ["sci", "fi", "war", "of", "worlds"]
+    assert tokenize(None) == []
+    assert tokenize("") == []
+
+
+def test_search_matches_the_words_of_every_searchable_field():
+    snapshot = build_snapshot(GENRES)
+
+    assert snapshot.search("COMEDY") == ["1"]
+    assert snapshot.search("laugh") == ["1"]
+    assert snapshot.search("comedies") == []
+
+
+def test_search_ranks_documents_matching_more_distinct_words_first():
+    snapshot = build_snapshot(GENRES)
+
+    assert snapshot.search("war war drama") == ["2", "3"]
+    assert snapshot.search("laugh battles soldiers") == ["2", "1"]
+
+
+def test_search_breaks_ties_by_id():
+    genres = [Genre(id=genre_id, name="Drama", description=None) for genre_id in ("c", "a", "b")]
+
+    assert build_snapshot(genres).search("drama") == ["a", "b", "c"]
+
+
+class FakeIndex:
+    def __init__(self, genres):
+        self.index = "genres"
+        self.genres = {genre.id: genre for genre in genres} if genres is not None else None
+
+    async def get_by_cursor(self, page_size, cursor=None):
+        if self.genres is None:
+            return None
+        start = cursor or 0
+        genres = list(self.genres.values())[start : start + page_size]
+        next_cursor = start + page_size if start + page_size < len(self.genres) else None
+        return genres, next_cursor
+
+    async def get_many_by_ids(self, ids):
+        return [self.genres.get(genre_id) for genre_id in ids]
+
+
+class FakeService:
+    def __init__(self, genres):
+        self.search = FakeIndex(genres)
+
+    async def get_many_by_parameters(self, page_number, page_size, search=None, sort=None):
+        return ["from service"]
+
+
+def create_catalog(genres, max_documents=100):
+    return in_memory_catalog.InMemoryCatalog(
+        service=FakeService(genres),
+        search_fields=("name", "description"),
+        refresh_interval=60,
+        retry_delay=5,
+        max_documents=max_documents,
+        batch_size=2,
+    )
+
+
+def test_reload_serves_every_page_of_the_index_from_memory():
+    async def scenario():
+        catalog = create_catalog(GENRES)
+        await catalog.reload()
+
+        assert [genre.id for genre in await catalog.get_many_by_parameters(page_number=1, page_size=10)] == [
+            "1",
+            "2",
+            "3",
+        ]
+        page = await catalog.get_many_by_parameters(page_number=1, page_size=1, search="comedy")
+        assert [genre.id for genre in page] == ["1"]
+        raw = await catalog.get_raw_many_by_parameters(page_number=2, page_size=1, sort="-name", fields=("name",))
+        assert raw == b'[{"name":"Drama"}]'
+
+    asyncio.run(scenario())
+
+
+def test_missing_or_too_large_index_is_passed_to_the_service():
+    async def scenario():
+        for catalog in (create_catalog(None), create_catalog(GENRES, max_documents=2)):
+            await catalog.reload()
+
+            assert catalog.snapshot is None
+            assert await catalog.get_many_by_parameters(page_number=1, page_size=10) == ["from service"]
+
+    asyncio.run(scenario())
+
+
+def test_reload_changed_updates_changed_documents_and_removes_deleted_ones():
+    async def scenario():
+        catalog = create_catalog(GENRES)
+        await catalog.reload()
+        genres = catalog.service.search.genres
+        genres["1"] = Genre(id="1", name="Satire", description=None)
+        del genres["2"]
+
+        await catalog.reload_changed(["1", "2"])
+
+        assert sorted(catalog.snapshot.items) == ["1", "3"]
+        assert await catalog.get_many_by_parameters(page_number=1, page_size=10, search="comedy") == []
+        assert await catalog.get_many_by_parameters(page_number=1, page_size=10, search="satire") == [genres["1"]]
+        assert await catalog.get_many_by_parameters(page_number=1, page_size=10, search="drama") == [genres["3"]]
+
+    asyncio.run(scenario())
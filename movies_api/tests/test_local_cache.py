@@ -0,0 +1,71 @@
+import time
+
+from cache_storage.local_cache import LocalCache, SizeEstimator
+from models.genre import Genre
+
+
+def create_cache(max_entries=3, max_bytes=1000, sketch=None):
+    return LocalCache(max_entries=max_entries, max_bytes=max_bytes, expiration_time=30, sizeof=len, sketch=sketch)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = create_cache(max_entries=2)
+    cache.set("first", b"1")
+    cache.set("second", b"2")
+    cache.get("first")
+
+    cache.set("third", b"3")
+
+    assert cache.get("second") is None
+    assert cache.get("first") == b"1"
+    assert cache.get("third") == b"3"
+    assert cache.evictions == 1
+
+
+def test_entries_are_evicted_when_their_size_exceeds_the_limit():
+    cache = create_cache(max_entries=10, max_bytes=10)
+    cache.set("first", b"12345")
+    cache.set("second", b"12345")
+    assert cache.size_bytes == 10
+
+    cache.set("third", b"123")
+
+    assert cache.get("first") is None
+    assert cache.size_bytes == 8
+    cache.set("too large", b"12345678901")
+    assert cache.get("too large") is None
+
+
+def test_size_is_updated_when_entries_are_replaced_or_deleted():
+    cache = create_cache()
+    cache.set("key", b"12345")
+    cache.set("key", b"12")
+    cache.set("other", b"123")
+
+    cache.delete("key")
+    assert cache.size_bytes == 3
+    cache.delete_matching(lambda key: key == "other")
+    assert cache.size_bytes == 0
+    assert len(cache) == 0
+
+
+def test_expired_entries_are_not_returned(monkeypatch):
+    cache = create_cache()
+    cache.set("short", b"1", expiration_time=1)
+    cache.set("long", b"2")
+    now = time.monotonic()
+    monkeypatch.setattr("cache_storage.local_cache.time.monotonic", lambda: now + 10)
+
+    assert cache.get("short") is None
+    assert cache.get("long") == b"2"
+    assert cache.size_bytes == 1
+
+
+def test_size_estimator_measures_a_sample_of_the_models():
+    estimator = SizeEstimator(sample_interval=2)
+    genre = Genre(id="1", name="Drama", description=None)
+    size = len(genre.model_dump_json())
+
+    assert estimator(genre) == size
+    assert estimator(Genre(id="2", name="Drama and more", description="Long")) == size
+    assert estimator([b"12", "345"]) == 5
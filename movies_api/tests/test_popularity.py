@@ -0,0 +1,49 @@
+import asyncio
+
+from benchmarks.fake_backends import FakeCacheStorage
+from services import popularity
+from services.popularity import PopularityLog
+
+
+def create_log(storage):
+    return PopularityLog(
+        cache_storage=storage,
+        key="movies_popularity",
+        flush_interval=60,
+        max_size=2,
+        bucket_interval=10,
+        bucket_count=3,
+    )
+
+
+def test_top_sums_the_counts_of_the_recent_intervals(monkeypatch):
+    async def scenario():
+        storage = FakeCacheStorage()
+        log = create_log(storage)
+        for now, instance_ids in (
+            (100, ["old"] * 5),
+            (125, ["recent", "recent", "old", "old"]),
+            (131, ["recent", "new"]),
+        ):
+            monkeypatch.setattr(popularity.time, "time", lambda: now)
+            log.record(*instance_ids)
+            await log.flush()
+
+        # The counts of the interval starting at 100 are older than the last three intervals
+        assert await log.get_top(10) == ["recent", "old", "new"]
+        assert await log.get_top(1) == ["recent"]
+        assert await storage.zrevrange("movies_popularity_top", 0, -1) == []
+
+    asyncio.run(scenario())
+
+
+def test_only_the_most_requested_documents_of_an_interval_are_kept(monkeypatch):
+    async def scenario():
+        log = create_log(FakeCacheStorage())
+        monkeypatch.setattr(popularity.time, "time", lambda: 100)
+        log.record("first", "first", "first", "second", "second", "third")
+        await log.flush()
+
+        assert await log.get_top(10) == ["first", "second"]
+
+    asyncio.run(scenario())
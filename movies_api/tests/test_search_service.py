@@ -0,0 +1,62 @@
+import asyncio
+from functools import partial
+
+import pytest
+from benchmarks.fake_backends import FakeSearchEngine
+from core.config import settings
+from models.genre import Genre
+from services.search_service import (
+    ElasticSearchService,
+    InvalidCursorError,
+    SearchCursor,
+    automatic_search_deserializer,
+)
+
+# Names are shared by several genres, so pages sorted by name are only ordered by the id tie-break
+GENRES = [{"id": str(i), "name": f"Genre {i % 2}", "description": None} for i in range(5)]
+
+
+@pytest.fixture
+def search(monkeypatch):
+    monkeypatch.setattr(settings, "search_cursor_use_pit", True)
+    return ElasticSearchService(
+        search_engine=FakeSearchEngine({"genres": GENRES}),
+        index="genres",
+        deserialize=partial(automatic_search_deserializer, Genre),
+    )
+
+
+def test_cursor_sort_is_broken_by_id():
+    assert ElasticSearchService._get_cursor_sort_params(sort=None) == [{"_score": "desc"}, {"id": "asc"}]
+    assert ElasticSearchService._get_cursor_sort_params(sort="-name") == [{"name": "desc"}, {"id": "asc"}]
+
+
+def test_cursor_walks_every_document_once_and_closes_the_point_in_time(search):
+    async def scenario():
+        pages, cursor = [], None
+        while True:
+            items, cursor = await search.get_by_cursor(page_size=2, cursor=cursor, sort="-name")
+            pages.append([item.id for item in items])
+            if cursor is None:
+                break
+            assert cursor.pit_id in search.search_engine.points_in_time
+
+        assert pages == [["1", "3"], ["0", "2"], ["4"]]
+        assert search.search_engine.points_in_time == {}
+
+    asyncio.run(scenario())
+
+
+def test_cursor_of_a_closed_point_in_time_is_not_found(search):
+    async def scenario():
+        _, cursor = await search.get_by_cursor(page_size=2)
+        await search.search_engine.close_point_in_time(id=cursor.pit_id)
+
+        assert await search.get_by_cursor(page_size=2, cursor=cursor) is None
+
+    asyncio.run(scenario())
+
+
+def test_malformed_cursor_is_rejected():
+    with pytest.raises(InvalidCursorError, match="Malformed cursor"):
+        SearchCursor.decode("not a cursor")
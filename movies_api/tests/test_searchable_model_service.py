@@ -0,0 +1,253 @@
+import asyncio
+from functools import partial
+
+import orjson
+import pytest
+from benchmarks.fake_backends import FakeCacheStorage, FakeSearchEngine
+from cache_storage.frequency_sketch import FrequencySketch
+from cache_storage.local_cache import LocalCache
+from core.config import settings
+from models.genre import Genre
+from services.caching_service import RedisCacheService, automatic_cache_deserializer
+from services.search_service import (
+    ElasticSearchService,
+    InvalidCursorError,
+    automatic_search_deserializer,
+)
+from services.searchable_model_service import SearchableModelService
+
+GENRES = [{"id": str(i), "name": f"Genre {i}", "description": None} for i in range(5)]
+
+
+@pytest.fixture(params=[False, True], ids=["lists", "normalized_lists"])
+def service(request, monkeypatch):
+    monkeypatch.setattr(settings, "cache_normalized_lists", request.param)
+    sketch = FrequencySketch(width=1024, depth=4, sample_size=10000)
+    return SearchableModelService[Genre](
+        caching_service=RedisCacheService(
+            cache_storage=FakeCacheStorage(),
+            prefix_single="genre",
+            prefix_plural="genres",
+            deserialize=partial(automatic_cache_deserializer, Genre),
+        ),
+        search_service=ElasticSearchService(
+            search_engine=FakeSearchEngine({"genres": GENRES}),
+            index="genres",
+            deserialize=partial(automatic_search_deserializer, Genre),
+        ),
+        local_cache=LocalCache(max_entries=100, max_bytes=1024 * 1024, expiration_time=30, sketch=sketch),
+        frequency_sketch=sketch,
+    )
+
+
+def test_every_request_is_counted_once(service):
+    async def scenario():
+        sketch = service.frequency
+
+        await service.get_raw_by_id("1")
+        assert sketch.estimate(("raw_instance", "1")) == 1
+        assert sketch.estimate(("instance", "1")) == 0
+
+        await service.get_raw_many_by_parameters(page_number=1, page_size=3)
+        assert sketch.estimate(("raw_list", None, None, 3, 1)) == 1
+        assert sketch.estimate(("list", None, None, 3, 1)) == 0
+
+        await service.get_many_by_parameters(page_number=1, page_size=3, search="Genre")
+        await service.get_many_by_parameters(page_number=1, page_size=3, search="genre")
+        assert sketch.estimate(("list", "genre", None, 3, 1)) == 2
+
+        await service.get_many_by_ids(["2", "3"])
+        assert sketch.estimate(("instance", "2")) == 1
+        assert sketch._additions == 6
+
+    asyncio.run(scenario())
+
+
+def record_calls(monkeypatch, target, name):
+    """Records the arguments of every call to the async method: the positional ones, the keyword ones when none."""
+    calls = []
+    method = getattr(target, name)
+
+    async def recorded(*args, **kwargs):
+        calls.append(args or kwargs)
+        return await method(*args, **kwargs)
+
+    monkeypatch.setattr(target, name, recorded)
+    return calls
+
+
+def test_many_by_ids_are_returned_in_the_requested_order_and_loaded_once(service, monkeypatch):
+    async def scenario():
+        await service.get_by_id("0")
+        await service.get_by_id("1")
+        # "0" is cached locally, "1" only in Redis, "2" and "3" are not cached and "unknown" does not exist
+        service.local_cache.delete(("instance", "1"))
+        searches = record_calls(monkeypatch, service.search.search_engine, "mget")
+
+        items = await service.get_many_by_ids(["3", "unknown", "0", "1", "3", "2"])
+
+        assert [item.id if item else None for item in items] == ["3", None, "0", "1", "3", "2"]
+        assert searches == [{"index": "genres", "ids": ["3", "unknown", "2"]}]
+
+        items = await service.get_many_by_ids(["unknown", "2", "1"])
+
+        assert [item.id if item else None for item in items] == [None, "2", "1"]
+        assert len(searches) == 1
+
+    asyncio.run(scenario())
+
+
+def replace_genre(service, genre_id, name):
+    service.search.search_engine._documents["genres"][genre_id] = {"id": genre_id, "name": name, "description": None}
+
+
+def test_stale_entry_is_served_while_one_background_refresh_runs(service, monkeypatch):
+    monkeypatch.setattr(settings, "cache_lock_enabled", True)
+    monkeypatch.setattr(settings, "cache_fresh_time", 0)
+
+    async def scenario():
+        await service.get_by_id("1")
+        service.local_cache.clear()
+        replace_genre(service, "1", "Updated")
+        searches = record_calls(monkeypatch, service.search.search_engine, "get")
+
+        items = await asyncio.gather(*[service.get_by_id("1") for _ in range(3)])
+
+        assert [item.name for item in items] == ["Genre 1"] * 3
+        await asyncio.gather(*service._background_tasks)
+        assert searches == [{"index": "genres", "id": "1"}]
+        assert (await service.get_by_id("1")).name == "Updated"
+        assert (await service.cache.get_instance_from_cache("1")).value.name == "Updated"
+
+    asyncio.run(scenario())
+
+
+def test_stale_entry_refreshed_by_another_worker_is_not_loaded_again(service, monkeypatch):
+    monkeypatch.setattr(settings, "cache_lock_enabled", True)
+    monkeypatch.setattr(settings, "cache_fresh_time", 0)
+
+    async def scenario():
+        await service.get_by_id("1")
+        service.local_cache.clear()
+        await service.cache.acquire_lock("instance_1")
+        searches = record_calls(monkeypatch, service.search.search_engine, "get")
+
+        assert (await service.get_by_id("1")).name == "Genre 1"
+
+        await asyncio.gather(*service._background_tasks)
+        assert searches == []
+
+    asyncio.run(scenario())
+
+
+def test_miss_waits_for_the_worker_holding_the_lock(service, monkeypatch):
+    monkeypatch.setattr(settings, "cache_lock_enabled", True)
+    monkeypatch.setattr(settings, "cache_lock_poll_interval", 0.01)
+
+    async def scenario():
+        token = await service.cache.acquire_lock("instance_1")
+        searches = record_calls(monkeypatch, service.search.search_engine, "get")
+        lookup = asyncio.ensure_future(service.get_by_id("1"))
+        await asyncio.sleep(0.03)
+        assert not lookup.done()
+
+        # The worker holding the lock loads the document
+        item = await service.search.get_by_id("1")
+        await service.cache.put_instance_to_cache(item)
+        await service.cache.release_lock("instance_1", token)
+
+        assert await lookup == item
+        # Only the worker holding the lock queried the search engine
+        assert len(searches) == 1
+
+    asyncio.run(scenario())
+
+
+def test_cursor_is_rejected_for_another_search_or_sort(service):
+    async def scenario():
+        _, cursor = await service.get_many_by_cursor(page_size=2, cursor="", search="genre", sort="name")
+
+        for search, sort in (("other", "name"), ("genre", "-name"), (None, "name")):
+            with pytest.raises(InvalidCursorError, match="another search or sort"):
+                await service.get_many_by_cursor(page_size=2, cursor=cursor, search=search, sort=sort)
+        items, _ = await service.get_many_by_cursor(page_size=2, cursor=cursor, search="genre", sort="name")
+        assert [item.id for item in items] == ["2", "3"]
+
+    asyncio.run(scenario())
+
+
+def test_cursor_of_an_expired_point_in_time_has_expired(service, monkeypatch):
+    monkeypatch.setattr(settings, "search_cursor_use_pit", True)
+
+    async def scenario():
+        _, cursor = await service.get_many_by_cursor(page_size=2, cursor="")
+        engine = service.search.search_engine
+        # Elasticsearch drops the point in time once its keep alive is over
+        engine.points_in_time.clear()
+
+        with pytest.raises(InvalidCursorError, match="Cursor has expired"):
+            await service.get_many_by_cursor(page_size=2, cursor=cursor)
+
+    asyncio.run(scenario())
+
+
+def test_raw_documents_and_pages_are_the_json_of_the_models(service, monkeypatch):
+    async def assert_raw_is_the_json_of_the_models():
+        raw = await service.get_raw_by_id("1")
+        assert orjson.loads(raw) == (await service.get_by_id("1")).model_dump(mode="json")
+        raw = await service.get_raw_many_by_parameters(page_number=2, page_size=2, search="genre", sort="-name")
+        items = await service.get_many_by_parameters(page_number=2, page_size=2, search="genre", sort="-name")
+        assert orjson.loads(raw) == [item.model_dump(mode="json") for item in items]
+
+    async def scenario():
+        await assert_raw_is_the_json_of_the_models()
+        engine = service.search.search_engine
+        gets, searches = record_calls(monkeypatch, engine, "get"), record_calls(monkeypatch, engine, "search")
+
+        # Served from the local cache, then from Redis
+        await assert_raw_is_the_json_of_the_models()
+        service.local_cache.clear()
+        await assert_raw_is_the_json_of_the_models()
+
+        assert gets == searches == []
+        assert await service.get_raw_by_id("unknown") is None
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("service", [True], ids=["normalized_lists"], indirect=True)
+def test_evicted_documents_of_a_cached_id_page_are_loaded_by_id(service, monkeypatch):
+    async def scenario():
+        await service.get_many_by_parameters(page_number=1, page_size=3)
+        storage = service.cache.cache_storage
+        del storage._values[service.cache.keys.instance("1")]
+        service.local_cache.clear()
+        engine = service.search.search_engine
+        gets, searches = record_calls(monkeypatch, engine, "mget"), record_calls(monkeypatch, engine, "search")
+
+        items = await service.get_many_by_parameters(page_number=1, page_size=3)
+
+        assert [item.id for item in items] == ["0", "1", "2"]
+        assert gets == [{"index": "genres", "ids": ["1"]}]
+        assert searches == []
+        assert service.cache.keys.instance("1") in storage._values
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("service", [True], ids=["normalized_lists"], indirect=True)
+def test_invalidated_document_drops_the_cached_id_pages(service, monkeypatch):
+    async def scenario():
+        await service.get_many_by_parameters(page_number=1, page_size=3)
+        engine = service.search.search_engine
+        await engine.index(index="genres", id="1", document={"id": "1", "name": "Updated", "description": None})
+        searches = record_calls(monkeypatch, engine, "search")
+
+        await service.invalidate(["1"], generation=1)
+
+        assert await service.cache.get_id_page_from_cache(page_size=3, page_number=1) is None
+        items = await service.get_many_by_parameters(page_number=1, page_size=3)
+        assert [item.name for item in items] == ["Genre 0", "Updated", "Genre 2"]
+        assert len(searches) == 1
+
+    asyncio.run(scenario())
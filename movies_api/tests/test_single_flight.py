@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+from services.single_flight import SingleFlight
+
+
+def test_concurrent_calls_with_the_same_key_are_coalesced():
+    async def scenario():
+        single_flight = SingleFlight()
+        calls = []
+
+        async def load(value):
+            calls.append(value)
+            await asyncio.sleep(0.01)
+            return value
+
+        results = await asyncio.gather(
+            single_flight.do("key", lambda: load("first")),
+            single_flight.do("key", lambda: load("second")),
+            single_flight.do("other", lambda: load("other")),
+        )
+
+        assert results == ["first", "first", "other"]
+        assert calls == ["first", "other"]
+        assert len(single_flight) == 0
+
+        assert await single_flight.do("key", lambda: load("third")) == "third"
+
+    asyncio.run(scenario())
+
+
+def test_error_is_raised_to_every_caller():
+    async def scenario():
+        single_flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("failed")
+
+        results = await asyncio.gather(
+            single_flight.do("key", fail), single_flight.do("key", fail), return_exceptions=True
+        )
+
+        assert [type(result) for result in results] == [ValueError, ValueError]
+        assert "key" not in single_flight
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_caller_does_not_cancel_the_call_for_the_others():
+    async def scenario():
+        single_flight = SingleFlight()
+
+        async def load():
+            await asyncio.sleep(0.01)
+            return "value"
+
+        first = asyncio.ensure_future(single_flight.do("key", load))
+        second = asyncio.ensure_future(single_flight.do("key", load))
+        await asyncio.sleep(0)
+        first.cancel()
+
+        assert await second == "value"
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+    asyncio.run(scenario())
@@ -101,7 +101,9 @@ class PersonTransformQuery(BaseQueryBuilder):
             SELECT pfw.person_id,
             jsonb_build_object(
                'id', fw.id,
-               'roles', COALESCE(array_agg(DISTINCT pfw.role) FILTER (WHERE pfw.role IS NOT NULL), ARRAY[]::text[])
+               'roles', COALESCE(array_agg(DISTINCT pfw.role) FILTER (WHERE pfw.role IS NOT NULL), ARRAY[]::text[]),
+               'title', fw.title,
+               'imdb_rating', fw.rating
             ) AS film_roles
             FROM content.person_film_work pfw
             LEFT JOIN content.film_work fw ON fw.id = pfw.film_work_id
@@ -0,0 +1,38 @@
+import json
+import logging
+from typing import Iterable
+
+from load.elastic_config import ElasticIndexName
+from redis.client import Redis
+from time_event_decorators.backoff import backoff_public_methods
+
+
+@backoff_public_methods()
+class RedisChangesPublisher:
+    """
+    Notifies the API about documents reindexed by the ETL.
+
+    Every message carries the index name, the ids of the changed documents and the new
+    generation of the index, which the API uses to drop every cached search page at once.
+    """
+
+    def __init__(self, redis_adapter: Redis, channel: str) -> None:
+        self.redis_adapter = redis_adapter
+        self.channel = channel
+
+    def publish_changes(self, es_index: ElasticIndexName, ids: Iterable) -> None:
+        """
+        Publishes ids of the changed documents.
+
+        :param es_index: The index the documents were loaded to.
+        :param ids: The ids of the loaded documents.
+
+        :return: None
+        """
+        changed_ids = [str(document_id) for document_id in ids]
+        if not changed_ids:
+            return
+        generation = self.redis_adapter.incr(f"{es_index.value}_generation")
+        message = json.dumps({"index": es_index.value, "ids": changed_ids, "generation": generation})
+        self.redis_adapter.publish(self.channel, message)
+        logging.info("Published %d changed documents of %s", len(changed_ids), es_index.value)
@@ -47,6 +47,11 @@ ELASTIC_PERSON_MAPPING = {
                     "type": "text",
                     "analyzer": "ru_en",
                 },
+                "title": {
+                    "type": "text",
+                    "analyzer": "ru_en",
+                },
+                "imdb_rating": {"type": "float"},
             },
         },
     },
@@ -2,23 +2,32 @@ import logging
 from typing import Optional
 
 from elasticsearch import Elasticsearch, helpers
+from load.changes_publisher import RedisChangesPublisher
 from load.elastic_config import ElasticConfig, ElasticIndexName
 from time_event_decorators.backoff import backoff_public_methods
 
 
 @backoff_public_methods()
 class ElasticLoader:
-    def __init__(self, es_configs: list[ElasticConfig], es_indexes: list[ElasticIndexName], es_url: str) -> None:
+    def __init__(
+        self,
+        es_configs: list[ElasticConfig],
+        es_indexes: list[ElasticIndexName],
+        es_url: str,
+        changes_publisher: Optional[RedisChangesPublisher] = None,
+    ) -> None:
         """
         Initialize the ElasticsearchLoader.
 
         :param es_indexes: The names of the Elasticsearch indexes to use.
         :param mappings: Optional mappings for the Elasticsearch index. Default is None.
         :param settings: Optional settings for the Elasticsearch index. Default is None.
+        :param changes_publisher: Optional publisher notifying the API about loaded documents. Default is None.
         """
         self.es = Elasticsearch(es_url)
         self.es_indexes = es_indexes
         self.es_configs = es_configs
+        self.changes_publisher = changes_publisher
         self.create_indexes()
 
     def load_data_to_es(self, es_data: Optional[list], es_index: ElasticIndexName):
@@ -35,11 +44,17 @@ class ElasticLoader:
             logging.info("You passed empty data to load to: %s".format(es_index))
             return
         actions = ElasticLoader.transform_data_to_actions(es_data, es_index)
-        helpers.bulk(self.es, actions)
+        if self.changes_publisher is None:
+            helpers.bulk(self.es, actions)
+            return
+        # Documents have to be searchable before the API drops their cached copies
+        helpers.bulk(self.es, actions, refresh="wait_for")
+        self.changes_publisher.publish_changes(es_index, [action["_id"] for action in actions])
 
     def create_indexes(self):
         for elastic_configuration in self.es_configs:
             if self.has_index(elastic_configuration.elastic_index.value):
+                self.update_mapping(elastic_configuration)
                 continue
             self.es.indices.create(
                 index=elastic_configuration.elastic_index.value,
@@ -47,6 +62,20 @@ class ElasticLoader:
                 settings=elastic_configuration.setting,
             )
 
+    def update_mapping(self, elastic_configuration: ElasticConfig):
+        """
+        Adds the fields missing from the mapping of an existing index.
+
+        Strict mappings reject documents with unknown fields, so new fields have to be
+        mapped before the documents holding them are loaded. Documents loaded before
+        get the new fields once they are reindexed.
+        """
+        self.es.indices.put_mapping(
+            index=elastic_configuration.elastic_index.value,
+            dynamic=elastic_configuration.mapping.get("dynamic"),
+            properties=elastic_configuration.mapping["properties"],
+        )
+
     def has_index(self, es_index) -> bool:
         """
         Check if the Elasticsearch index exists.
@@ -2,6 +2,7 @@ from extract_transform.boundaries import get_query_boundaries
 from extract_transform.extract_settings import setup_database_orchester
 from extract_transform.postgres_orchester import PostgresOrchester
 from extract_transform.query_manager import PostgresTableName
+from load.changes_publisher import RedisChangesPublisher
 from load.elastic_config import ELASTIC_CONFIGS, ElasticIndexName
 from load.elastic_search_loader import ElasticLoader
 from project_setup.env_settings import Settings
@@ -45,12 +46,17 @@ def synchronise_postgres_elastic(
 
 if __name__ == "__main__":
     settings = Settings()
+    redis_adapter = Redis.from_url(url=settings.redis_url)
     elastic_search_loader = ElasticLoader(
         es_url=settings.elastic_url,
         es_indexes=ELASTIC_INDEXES,
         es_configs=ELASTIC_CONFIGS,
+        changes_publisher=RedisChangesPublisher(
+            redis_adapter=redis_adapter,
+            channel=settings.cache_invalidation_channel,
+        ),
     )
-    redis_storage = RedisStorage(redis_adapter=Redis.from_url(url=settings.redis_url))
+    redis_storage = RedisStorage(redis_adapter=redis_adapter)
     state = State(storage=redis_storage)
     postgres_receiver_orchester = setup_database_orchester(settings.database_url)
     while True:
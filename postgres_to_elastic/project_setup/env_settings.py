@@ -17,6 +17,7 @@ class Settings(BaseSettings):
     elastic_port: int
     elastic_scheme: str
     repeat_time_seconds: int
+    cache_invalidation_channel: str = "elastic_changes"
 
     @property
     def elastic_url(self):
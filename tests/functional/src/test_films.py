@@ -59,3 +59,34 @@ async def test_search_film(make_get_request, search_data: dict, expected_answer:
 async def test_search_film_invalid_params(make_get_request, search_data: dict, expected_answer: dict):
     status, body = await make_get_request("/api/v1/films/search", search_data)
     assert status == expected_answer["status"]
+
+
+@pytest.mark.parametrize(
+    "search_data, expected_answer",
+    [
+        ({"search": "The Star", "cursor": "not-a-cursor"}, {"status": HTTPStatus.BAD_REQUEST}),
+        ({"search": "The Star", "page_size": 100, "page_number": 101}, {"status": HTTPStatus.UNPROCESSABLE_ENTITY}),
+    ],
+)
+async def test_search_film_invalid_pagination(make_get_request, search_data: dict, expected_answer: dict):
+    status, body = await make_get_request("/api/v1/films/search", search_data)
+    assert status == expected_answer["status"]
+
+
+async def test_search_film_first_cursor_page(make_get_request):
+    status, body = await make_get_request("/api/v1/films/search", {"search": "The Star", "cursor": ""})
+
+    assert status == HTTPStatus.OK
+    assert len(body) == 50
+
+
+async def test_search_film_fields(make_get_request):
+    status, body = await make_get_request("/api/v1/films/search", {"search": "The Star", "fields": "title,id"})
+
+    assert status == HTTPStatus.OK
+    assert len(body) == 50
+    assert all(set(film) == {"id", "title"} for film in body)
+
+    status, _ = await make_get_request("/api/v1/films/search", {"search": "The Star", "fields": "budget"})
+
+    assert status == HTTPStatus.UNPROCESSABLE_ENTITY
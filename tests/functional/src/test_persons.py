@@ -3,7 +3,9 @@ from http import HTTPStatus
 import pytest
 
 from tests.functional.testdata.data_generator import (
+    generate_person_with_film_summaries,
     generate_persons,
+    generate_single_film,
     generate_single_person,
 )
 
@@ -61,3 +63,59 @@ async def test_get_person_not_exists(make_get_request, search_data: dict, expect
 async def test_search_person_invalid_params(make_get_request, search_data: dict, expected_answer: dict):
     status, body = await make_get_request("/api/v1/persons/search", search_data)
     assert status == expected_answer["status"]
+
+
+@pytest.mark.parametrize(
+    "search_data, expected_answer",
+    [
+        (
+            {"person_id": "0e5ba8a1-3b4e-4d0e-9b4c-5d1b1d0c8b3f"},
+            {
+                "status": HTTPStatus.OK,
+                "body": [{"id": "1111", "title": "The Star", "imdb_rating": 8.5, "roles": ["actor", "writer"]}],
+            },
+        ),
+    ],
+)
+async def test_get_person_films(make_get_request, es_write_data, search_data: dict, expected_answer: dict):
+    # Only the first film of the person is indexed, films missing from the index are left out
+    await es_write_data(generate_single_film("1111"), "movies")
+    await es_write_data(generate_single_person(search_data.get("person_id")), INDEX)
+
+    status, body = await make_get_request(f"/api/v1/persons/{search_data.get('person_id')}/film")
+
+    assert status == expected_answer["status"]
+    assert body == expected_answer["body"]
+
+
+@pytest.mark.parametrize(
+    "search_data, expected_answer",
+    [
+        (
+            {"person_id": "5f0c2b8e-7d4a-4c1e-a3b6-2e9d8f1a4c70"},
+            {
+                "status": HTTPStatus.OK,
+                "body": [{"id": "3333", "title": "The Moon", "imdb_rating": 7.1, "roles": ["director"]}],
+            },
+        ),
+    ],
+)
+async def test_get_person_films_indexed_with_person(
+    make_get_request, es_write_data, search_data: dict, expected_answer: dict
+):
+    # The film is not in the movies index, its title and rating are read from the person document
+    await es_write_data(generate_person_with_film_summaries(search_data.get("person_id")), INDEX)
+
+    status, body = await make_get_request(f"/api/v1/persons/{search_data.get('person_id')}/film")
+
+    assert status == expected_answer["status"]
+    assert body == expected_answer["body"]
+
+
+@pytest.mark.parametrize(
+    "search_data, expected_answer",
+    [({"person_id": "accb643b-db2c-4f5b-b59b-e9727bb5e839"}, {"status": HTTPStatus.NOT_FOUND})],
+)
+async def test_get_films_of_person_not_exists(make_get_request, search_data: dict, expected_answer: dict):
+    status, body = await make_get_request(f"/api/v1/persons/{search_data.get('person_id')}/film")
+    assert status == expected_answer["status"]
@@ -63,6 +63,16 @@ def generate_single_person(person_id: str):
     ]
 
 
+def generate_person_with_film_summaries(person_id: str):
+    return [
+        {
+            "id": person_id,
+            "full_name": "Bahrom",
+            "films": [{"id": "3333", "roles": ["director"], "title": "The Moon", "imdb_rating": 7.1}],
+        }
+    ]
+
+
 def generate_persons(count: int, full_name: str):
     return [
         {
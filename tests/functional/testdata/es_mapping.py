@@ -30,6 +30,11 @@ ELASTIC_MAPS = {
                         "type": "text",
                         "analyzer": "ru_en",
                     },
+                    "title": {
+                        "type": "text",
+                        "analyzer": "ru_en",
+                    },
+                    "imdb_rating": {"type": "float"},
                 },
             },
         },